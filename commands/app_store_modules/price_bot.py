@@ -84,8 +84,24 @@ class AppStorePriceBot:
             max_name_length=35,
         )
 
+        # 缓存预热：在热门应用的价格缓存过期前刷新
+        cache_manager.register_warm_fetcher(
+            "app_store",
+            self._warm_app_prices,
+            key_prefix="app_store:prices:",
+            max_age_seconds=self.redis_cache_duration,
+        )
+
         logger.info("✅ AppStorePriceBot 初始化完成")
 
+    async def _warm_app_prices(self, cache_key: str) -> bool:
+        """预热应用价格缓存（键格式: app_store:prices:{platform}:{app_id}:{country_code}）"""
+        _, _, platform, app_id, country_code = cache_key.split(":", 4)
+        result = await self.get_app_prices(
+            "", country_code, int(app_id), platform, use_cache=False, use_db=False
+        )
+        return result.get("status") == "ok"
+
     async def load_or_fetch_search_results(
         self, query: str, country_code: str = "US", platform: str = "iphone"
     ) -> list[dict]:
@@ -141,54 +157,139 @@ class AppStorePriceBot:
 
         return all_results
 
-    async def get_app_prices(
-        self, app_name: str, country_code: str, app_id: int, platform: str
+    @staticmethod
+    def _format_cached_prices(
+        country_code: str, cached_data: dict, cache_timestamp: float | None
     ) -> dict:
-        """获取指定国家的应用价格信息（方案C: 分层缓存）"""
-        cache_key = CacheKeyBuilder.app_prices(app_id, country_code, platform)
+        """将 Redis 缓存数据转换为价格结果"""
+        cache_info = (
+            f"*(缓存于: {datetime.fromtimestamp(cache_timestamp).strftime('%Y-%m-%d %H:%M')})*"
+            if cache_timestamp
+            else ""
+        )
+        return {
+            "country_code": country_code,
+            "country_name": SUPPORTED_COUNTRIES.get(country_code, {}).get(
+                "name", country_code
+            ),
+            "flag_emoji": get_country_flag(country_code),
+            "status": "ok",
+            "app_price_str": cached_data.get("app_price_str"),
+            "app_price_cny": cached_data.get("app_price_cny"),
+            "in_app_purchases": cached_data.get("in_app_purchases", []),
+            "cache_info": cache_info,
+            "real_app_name": cached_data.get("real_app_name"),
+            # 元数据
+            "developer_name": cached_data.get("developer_name"),
+            "developer_url": cached_data.get("developer_url"),
+            "rating_value": cached_data.get("rating_value"),
+            "review_count": cached_data.get("review_count"),
+            "app_category": cached_data.get("app_category"),
+            "operating_system": cached_data.get("operating_system"),
+            "supported_devices": cached_data.get("supported_devices"),
+            "icon_url": cached_data.get("icon_url"),
+        }
 
-        # 第1层：Redis热缓存查询
-        cached_data = await self.cache_manager.load_cache(
-            cache_key,
-            max_age_seconds=self.redis_cache_duration,
+    def _format_db_prices(self, country_code: str, db_data: dict) -> dict:
+        """将 MySQL 持久化数据转换为价格结果"""
+        return {
+            "country_code": country_code,
+            "country_name": SUPPORTED_COUNTRIES.get(country_code, {}).get(
+                "name", country_code
+            ),
+            "flag_emoji": get_country_flag(country_code),
+            "status": "ok",
+            "app_price_str": db_data.get("app_price_str"),
+            "app_price_cny": db_data.get("app_price_cny"),
+            "in_app_purchases": db_data.get("in_app_purchases", []),
+            "cache_info": f"*(数据更新于: {db_data.get('age_hours', 0):.1f}小时前)*",
+            "real_app_name": db_data.get("real_app_name") or db_data.get("item_name"),
+            # 元数据
+            "developer_name": db_data.get("developer_name"),
+            "developer_url": db_data.get("developer_url"),
+            "rating_value": db_data.get("rating_value"),
+            "review_count": db_data.get("review_count"),
+            "app_category": db_data.get("app_category"),
+            "operating_system": db_data.get("operating_system"),
+            "supported_devices": db_data.get("supported_devices"),
+            "icon_url": db_data.get("icon_url"),
+        }
+
+    async def _load_db_prices_many(
+        self, app_id: int, platform: str, countries: list[str]
+    ) -> dict[str, dict]:
+        """一次查询从 MySQL 读取多个国家的新鲜价格，并批量回写 Redis 热缓存
+
+        Returns:
+            {国家代码: 价格结果}，只包含命中的国家
+        """
+        if not self.smart_cache_manager or not countries:
+            return {}
+
+        try:
+            db_prices = await self.smart_cache_manager.db.get_latest_prices(
+                service="app_store",
+                item_id=str(app_id),
+                country_codes=countries,
+                freshness_threshold=self.db_freshness,
+            )
+        except Exception as e:
+            logger.warning(f"App Store MySQL批量查询失败: {e}")
+            return {}
+
+        if not db_prices:
+            return {}
+
+        logger.info(
+            f"✅ App Store MySQL缓存命中: {app_id}, {len(db_prices)}/{len(countries)} 个国家"
+        )
+        # 回写Redis热缓存（一个 pipeline）
+        await self.cache_manager.save_many(
+            {
+                CacheKeyBuilder.app_prices(app_id, country, platform): db_data
+                for country, db_data in db_prices.items()
+            },
             subdirectory="app_store",
+            ttl=self.redis_cache_duration,
         )
+        return {
+            country: self._format_db_prices(country, db_data)
+            for country, db_data in db_prices.items()
+        }
 
-        if cached_data:
-            logger.debug(f"✅ App Store Redis缓存命中: {app_id}/{country_code}")
-            cache_timestamp = await self.cache_manager.get_cache_timestamp(
-                cache_key, subdirectory="app_store"
-            )
-            cache_info = (
-                f"*(缓存于: {datetime.fromtimestamp(cache_timestamp).strftime('%Y-%m-%d %H:%M')})*"
-                if cache_timestamp
-                else ""
+    async def get_app_prices(
+        self,
+        app_name: str,
+        country_code: str,
+        app_id: int,
+        platform: str,
+        use_cache: bool = True,
+        use_db: bool = True,
+    ) -> dict:
+        """获取指定国家的应用价格信息（方案C: 分层缓存）
+
+        Args:
+            use_cache: 是否查询 Redis 热缓存（调用方已批量查询过时传 False）
+            use_db: 是否查询 MySQL 持久化缓存（调用方已批量查询过时传 False）
+        """
+        cache_key = CacheKeyBuilder.app_prices(app_id, country_code, platform)
+
+        # 第1层：Redis热缓存查询（数据和时间戳一次取回）
+        if use_cache:
+            cached = await self.cache_manager.load_many(
+                [cache_key],
+                subdirectory="app_store",
+                max_age_seconds=self.redis_cache_duration,
             )
-            return {
-                "country_code": country_code,
-                "country_name": SUPPORTED_COUNTRIES.get(country_code, {}).get(
-                    "name", country_code
-                ),
-                "flag_emoji": get_country_flag(country_code),
-                "status": "ok",
-                "app_price_str": cached_data.get("app_price_str"),
-                "app_price_cny": cached_data.get("app_price_cny"),
-                "in_app_purchases": cached_data.get("in_app_purchases", []),
-                "cache_info": cache_info,
-                "real_app_name": cached_data.get("real_app_name"),
-                # 元数据
-                "developer_name": cached_data.get("developer_name"),
-                "developer_url": cached_data.get("developer_url"),
-                "rating_value": cached_data.get("rating_value"),
-                "review_count": cached_data.get("review_count"),
-                "app_category": cached_data.get("app_category"),
-                "operating_system": cached_data.get("operating_system"),
-                "supported_devices": cached_data.get("supported_devices"),
-                "icon_url": cached_data.get("icon_url"),
-            }
+            cached_data, cache_timestamp = cached.get(cache_key, (None, None))
+            if cached_data:
+                logger.debug(f"✅ App Store Redis缓存命中: {app_id}/{country_code}")
+                return self._format_cached_prices(
+                    country_code, cached_data, cache_timestamp
+                )
 
         # 第2层：MySQL持久化缓存查询
-        if self.smart_cache_manager:
+        if use_db and self.smart_cache_manager:
             try:
                 db_data = await self.smart_cache_manager.db.get_latest_price(
                     service="app_store",
@@ -205,29 +306,7 @@ class AppStorePriceBot:
                         subdirectory="app_store",
                         ttl=self.redis_cache_duration,
                     )
-                    return {
-                        "country_code": country_code,
-                        "country_name": SUPPORTED_COUNTRIES.get(country_code, {}).get(
-                            "name", country_code
-                        ),
-                        "flag_emoji": get_country_flag(country_code),
-                        "status": "ok",
-                        "app_price_str": db_data.get("app_price_str"),
-                        "app_price_cny": db_data.get("app_price_cny"),
-                        "in_app_purchases": db_data.get("in_app_purchases", []),
-                        "cache_info": f"*(数据更新于: {db_data.get('age_hours', 0):.1f}小时前)*",
-                        "real_app_name": db_data.get("real_app_name")
-                        or db_data.get("item_name"),
-                        # 元数据
-                        "developer_name": db_data.get("developer_name"),
-                        "developer_url": db_data.get("developer_url"),
-                        "rating_value": db_data.get("rating_value"),
-                        "review_count": db_data.get("review_count"),
-                        "app_category": db_data.get("app_category"),
-                        "operating_system": db_data.get("operating_system"),
-                        "supported_devices": db_data.get("supported_devices"),
-                        "icon_url": db_data.get("icon_url"),
-                    }
+                    return self._format_db_prices(country_code, db_data)
             except Exception as e:
                 logger.warning(f"App Store MySQL查询失败: {e}")
 
@@ -497,10 +576,50 @@ class AppStorePriceBot:
     async def get_multi_country_prices(
         self, app_name: str, app_id: int, platform: str, countries: list[str]
     ) -> list[dict]:
-        """获取多个国家的应用价格"""
-        tasks = [
-            self.get_app_prices(app_name, country, app_id, platform)
+        """获取多个国家的应用价格
+
+        Redis 和 MySQL 各只查询一次，两层都未命中的国家再并发爬取
+        """
+        cache_keys = {
+            country: CacheKeyBuilder.app_prices(app_id, country, platform)
             for country in countries
-        ]
-        price_results = await asyncio.gather(*tasks)
-        return price_results
+        }
+        cached = await self.cache_manager.load_many(
+            list(cache_keys.values()),
+            subdirectory="app_store",
+            max_age_seconds=self.redis_cache_duration,
+        )
+
+        results: dict[str, dict] = {}
+        missing = []
+        for country, cache_key in cache_keys.items():
+            cached_data, cache_timestamp = cached.get(cache_key, (None, None))
+            if cached_data:
+                results[country] = self._format_cached_prices(
+                    country, cached_data, cache_timestamp
+                )
+            else:
+                missing.append(country)
+
+        if results:
+            logger.debug(
+                f"✅ App Store Redis缓存命中: {app_id}, {len(results)}/{len(cache_keys)} 个国家"
+            )
+
+        # 第2层：MySQL 一次查询所有未命中的国家
+        if missing:
+            db_results = await self._load_db_prices_many(app_id, platform, missing)
+            results.update(db_results)
+            missing = [country for country in missing if country not in db_results]
+
+        fetched = await asyncio.gather(
+            *(
+                self.get_app_prices(
+                    app_name, country, app_id, platform, use_cache=False, use_db=False
+                )
+                for country in missing
+            )
+        )
+        results.update(zip(missing, fetched))
+
+        return [results[country] for country in countries]
@@ -58,8 +58,6 @@ async def appleservices_inline_execute(args: str, bot_instance=None) -> dict:
             "error": str | None
         }
     """
-    import asyncio
-
     if not bot_instance:
         return {
             "success": False,
@@ -106,7 +104,7 @@ async def appleservices_inline_execute(args: str, bot_instance=None) -> dict:
         display_name = {"icloud": "iCloud", "appleone": "Apple One", "applemusic": "Apple Music"}.get(service, service)
 
         # 构建URL并获取数据
-        tasks = []
+        targets = []
         for country in countries:
             url = ""
             if service == "icloud":
@@ -124,9 +122,9 @@ async def appleservices_inline_execute(args: str, bot_instance=None) -> dict:
                 url = "https://www.apple.com.cn/apple-music/"
             else:
                 url = f"https://www.apple.com/{country.lower()}/{service}/"
-            tasks.append(bot_instance.get_service_info(url, country, service))
+            targets.append((url, country))
 
-        country_results = await asyncio.gather(*tasks)
+        country_results = await bot_instance.get_multi_country_service_info(targets, service)
 
         # 组装消息
         raw_message_parts = [f"*📱 {display_name} 价格信息*", ""]
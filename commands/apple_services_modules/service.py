@@ -5,6 +5,7 @@ Apple服务价格查询的业务逻辑服务类
 支持 iCloud、Apple One、Apple Music 价格查询
 """
 
+import asyncio
 import logging
 import re
 
@@ -204,16 +205,56 @@ class AppleServicesService:
                 countries.append(resolved_code)
         return countries if countries else DEFAULT_COUNTRIES
 
-    async def get_service_info(self, url: str, country_code: str, service: str) -> str:
-        """Fetches and parses Apple service price information with caching."""
-        cache_key = f"apple_services:{service}:{country_code}"
-        cached_result = await self.cache_manager.load_cache(
-            cache_key,
-            max_age_seconds=self.redis_cache_duration,
+    async def get_multi_country_service_info(
+        self, targets: list[tuple[str, str]], service: str
+    ) -> list[str]:
+        """批量获取多个国家的服务价格：Redis 缓存一次批量查询，未命中的国家并发获取
+
+        Args:
+            targets: [(url, country_code), ...]
+            service: 服务类型
+
+        Returns:
+            与 targets 顺序一致的结果列表
+        """
+        cache_keys = [f"apple_services:{service}:{country}" for _, country in targets]
+        cached = await self.cache_manager.load_many(
+            cache_keys,
             subdirectory="apple_services",
+            max_age_seconds=self.redis_cache_duration,
         )
-        if cached_result:
-            return cached_result
+
+        results: list[str | None] = []
+        pending = []
+        for index, ((url, country), cache_key) in enumerate(zip(targets, cache_keys)):
+            cached_result, _ = cached.get(cache_key, (None, None))
+            results.append(cached_result or None)
+            if not cached_result:
+                pending.append((index, url, country))
+
+        fetched = await asyncio.gather(
+            *(
+                self.get_service_info(url, country, service, use_cache=False)
+                for _, url, country in pending
+            )
+        )
+        for (index, _, _), result in zip(pending, fetched):
+            results[index] = result
+        return results
+
+    async def get_service_info(
+        self, url: str, country_code: str, service: str, use_cache: bool = True
+    ) -> str:
+        """Fetches and parses Apple service price information with caching."""
+        cache_key = f"apple_services:{service}:{country_code}"
+        if use_cache:
+            cached_result = await self.cache_manager.load_cache(
+                cache_key,
+                max_age_seconds=self.redis_cache_duration,
+                subdirectory="apple_services",
+            )
+            if cached_result:
+                return cached_result
 
         country_info = SUPPORTED_COUNTRIES.get(country_code)
         if not country_info:
@@ -440,8 +481,6 @@ class AppleServicesService:
 
     async def command_handler(self, update, context):
         """统一的命令处理器，兼容委托模式"""
-        import asyncio
-
         from utils.config_manager import get_config
         from utils.formatter import foldable_text_v2, foldable_text_with_markdown_v2
         from utils.message_manager import (
@@ -526,7 +565,7 @@ class AppleServicesService:
             else:  # service_type == "applemusic"
                 display_name = "Apple Music"
 
-            tasks = []
+            targets = []
             for country in countries:
                 url = ""
                 # Apple 官网使用 /uk/ 而非 /gb/
@@ -546,9 +585,11 @@ class AppleServicesService:
                     url = "https://www.apple.com.cn/apple-music/"
                 else:
                     url = f"https://www.apple.com/{url_cc}/{service_type}/"
-                tasks.append(self.get_service_info(url, country, service_type))
+                targets.append((url, country))
 
-            country_results = await asyncio.gather(*tasks)
+            country_results = await self.get_multi_country_service_info(
+                targets, service_type
+            )
 
             # 组装原始文本消息
             raw_message_parts = []
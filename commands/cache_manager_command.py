@@ -4,6 +4,8 @@
 替换所有 *_cleancache 命令，提供统一的缓存管理接口
 """
 
+import io
+import json
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
@@ -355,6 +357,165 @@ async def cleancache_callback_handler(update: Update, context: ContextTypes.DEFA
         
         logger.info(f"通过回调清理缓存: {service}, 结果: {success}")
 
+def format_l1_stats(l1_stats: dict) -> str:
+    """格式化 L1 缓存统计"""
+    if not l1_stats:
+        return "L1 缓存未启用"
+
+    lines = []
+    total_hits = total_misses = 0
+    for subdirectory, stats in sorted(l1_stats.items(), key=lambda x: x[1]["hits"], reverse=True):
+        total_hits += stats["hits"]
+        total_misses += stats["misses"]
+        lines.append(
+            f"• `{subdirectory}`: 命中 {stats['hits']} / 未命中 {stats['misses']} "
+            f"({stats['hit_rate'] * 100:.1f}%), 条目 {stats['size']}/{stats['limit']}"
+        )
+
+    lookups = total_hits + total_misses
+    overall = f"{total_hits / lookups * 100:.1f}%" if lookups else "0.0%"
+    lines.append(f"\n节省 Redis 往返: {total_hits} 次（总命中率 {overall}）")
+    return "\n".join(lines)
+
+
+def format_swr_stats(swr_stats: dict) -> str:
+    """格式化 SWR（过期数据返回）统计"""
+    if not swr_stats:
+        return "暂无过期数据返回记录"
+
+    lines = []
+    for subdirectory, stats in sorted(swr_stats.items(), key=lambda x: x[1]["stale_served"], reverse=True):
+        lines.append(
+            f"• `{subdirectory}`: 返回过期数据 {stats['stale_served']} 次, "
+            f"后台刷新成功 {stats['refreshes']} / 失败 {stats['refresh_failures']}"
+        )
+    return "\n".join(lines)
+
+
+def format_bytes(num_bytes: float) -> str:
+    """格式化字节数"""
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / 1024 / 1024:.1f}MB"
+    if num_bytes >= 1024:
+        return f"{num_bytes / 1024:.1f}KB"
+    return f"{num_bytes:.0f}B"
+
+
+def format_size_stats(size_stats: dict) -> str:
+    """格式化每个子目录写入的字节数（编码压缩前 / 实际存储）"""
+    if not size_stats:
+        return "暂无写入记录"
+
+    lines = []
+    total_raw = total_stored = 0
+    for subdirectory, stats in sorted(size_stats.items(), key=lambda x: x[1]["raw_bytes"], reverse=True):
+        total_raw += stats["raw_bytes"]
+        total_stored += stats["stored_bytes"]
+        ratio = stats["stored_bytes"] / stats["raw_bytes"] * 100 if stats["raw_bytes"] else 100
+        lines.append(
+            f"• `{subdirectory}`: {stats['writes']} 次写入, "
+            f"{format_bytes(stats['raw_bytes'])} → {format_bytes(stats['stored_bytes'])} ({ratio:.0f}%)"
+        )
+
+    lines.append(
+        f"\n合计: {format_bytes(total_raw)} → {format_bytes(total_stored)}，"
+        f"节省 {format_bytes(max(total_raw - total_stored, 0))}"
+    )
+    return "\n".join(lines)
+
+
+def format_metrics_overview(groups: dict) -> str:
+    """格式化每个子目录的命中率与延迟概览"""
+    lines = []
+    for subdirectory, group in groups.items():
+        counters = group["counters"]
+        histograms = group["histograms"]
+        hits = counters.get("redis_hits", 0)
+        stale = counters.get("redis_stale", 0)
+        misses = counters.get("redis_misses", 0)
+        lookups = hits + stale + misses
+        if not lookups and not counters.get("fetches"):
+            continue
+
+        parts = []
+        if lookups:
+            parts.append(f"命中 {(hits + stale) / lookups * 100:.1f}%（过期 {stale}）/ {lookups} 次")
+        if "redis_read_ms" in histograms:
+            parts.append(f"读 p95 {histograms['redis_read_ms']['p95']}ms")
+        if "value_bytes" in histograms:
+            parts.append(f"均值 {format_bytes(histograms['value_bytes']['avg'])}")
+        if "fetch_ms" in histograms:
+            parts.append(f"爬取 p95 {histograms['fetch_ms']['p95']}ms")
+        lines.append(f"• `{subdirectory}`: " + ", ".join(parts))
+
+    return "\n".join(lines) if lines else "暂无查询记录"
+
+
+def format_metrics_detail(subdirectory: str, group: dict | None) -> str:
+    """格式化单个子目录的全部指标"""
+    if not group:
+        return f"📊 **缓存指标:** `{subdirectory}`\n\n暂无记录"
+
+    lines = [f"📊 **缓存指标:** `{subdirectory}`", "", "**计数:**"]
+    for name, value in sorted(group["counters"].items()):
+        lines.append(f"• `{name}`: {value}")
+
+    if group["histograms"]:
+        lines.extend(["", "**分布（count / avg / p50 / p95 / p99 / max）:**"])
+        for name, stats in sorted(group["histograms"].items()):
+            lines.append(
+                f"• `{name}`: {stats['count']} / {stats['avg']} / {stats['p50']} / "
+                f"{stats['p95']} / {stats['p99']} / {stats['max']}"
+            )
+    return "\n".join(lines)
+
+
+@with_error_handling
+async def cachestats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """查看缓存统计"""
+    if not update.message:
+        return
+
+    cache_manager = context.bot_data.get('cache_manager')
+    if not cache_manager:
+        await send_error(context, update.effective_chat.id, "缓存管理器不可用")
+        await delete_user_command(context, update.effective_chat.id, update.message.message_id)
+        return
+
+    args = context.args or []
+    snapshot = cache_manager.get_metrics_snapshot()
+
+    # /cachestats json: 导出机器可读的完整快照
+    if args and args[0].lower() == "json":
+        document = io.BytesIO(json.dumps(snapshot, ensure_ascii=False, indent=2).encode("utf-8"))
+        document.name = "cache_metrics.json"
+        await context.bot.send_document(chat_id=update.effective_chat.id, document=document)
+        await delete_user_command(context, update.effective_chat.id, update.message.message_id)
+        return
+
+    # /cachestats <子目录>: 查看单个子目录的全部指标
+    if args:
+        subdirectory = args[0]
+        message = format_metrics_detail(subdirectory, snapshot["groups"].get(subdirectory))
+        await send_help(context, update.effective_chat.id, message, parse_mode='Markdown')
+        await delete_user_command(context, update.effective_chat.id, update.message.message_id)
+        return
+
+    message = (
+        "📊 **缓存统计**\n\n**Redis 命中率与延迟:**\n"
+        + format_metrics_overview(snapshot["groups"])
+        + "\n\n**L1 进程内缓存:**\n"
+        + format_l1_stats(cache_manager.get_l1_stats())
+        + "\n\n**Stale-while-revalidate:**\n"
+        + format_swr_stats(cache_manager.get_swr_stats())
+        + "\n\n**写入大小（编码前 → 存储）:**\n"
+        + format_size_stats(cache_manager.get_size_stats())
+    )
+
+    await send_help(context, update.effective_chat.id, message, parse_mode='Markdown')
+    await delete_user_command(context, update.effective_chat.id, update.message.message_id)
+
+
 # 注册命令
 command_factory.register_command(
     "cleancache",
@@ -363,6 +524,13 @@ command_factory.register_command(
     description="统一缓存管理（替代所有*_cleancache命令）"
 )
 
+command_factory.register_command(
+    "cachestats",
+    cachestats_command,
+    permission=Permission.ADMIN,
+    description="查看缓存统计（/cachestats [子目录|json]）"
+)
+
 # 注册回调处理器
 command_factory.register_callback(
     "^cleancache_",
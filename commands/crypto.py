@@ -12,6 +12,7 @@ from utils.permissions import Permission
 from utils.config_manager import get_config
 from utils.formatter import foldable_text_v2, foldable_text_with_markdown_v2
 from utils.message_manager import send_message_with_auto_delete, delete_user_command, _schedule_deletion, send_error, send_success, send_help
+from utils.redis_cache_manager import NEGATIVE_ERROR, NEGATIVE_NOT_FOUND
 
 # 全局变量
 cache_manager = None
@@ -33,10 +34,12 @@ COINGECKO_GLOBAL_URL = "https://api.coingecko.com/api/v3/global"
 async def get_crypto_price(symbol: str, convert_currency: str) -> Optional[Dict]:
     """从API获取加密货币价格，并缓存结果"""
     cache_key = f"crypto_{symbol.lower()}_{convert_currency.lower()}"
-    cached_data = await cache_manager.load_cache(cache_key, subdirectory="crypto")
+    cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="crypto")
     if cached_data:
         logging.info(f"使用缓存的加密货币数据: {symbol} -> {convert_currency}")
         return cached_data
+    if negative:
+        return None
 
     config = get_config()
     if not config.cmc_api_key:
@@ -55,10 +58,15 @@ async def get_crypto_price(symbol: str, convert_currency: str) -> Optional[Dict]
                 return data
             else:
                 logging.warning(f"CMC API 返回错误: {data.get('status')}")
+                await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
         else:
             logging.warning(f"CMC API 请求失败: HTTP {response.status_code}")
+            # 400 表示符号无效（不存在），其余状态码视为暂时性错误
+            reason = NEGATIVE_NOT_FOUND if response.status_code == 400 else NEGATIVE_ERROR
+            await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=reason)
     except Exception as e:
         logging.error(f"CMC API 请求异常: {e}")
+        await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     return None
 
 async def get_coingecko_markets(vs_currency: str = "usd", order: str = "market_cap_desc", per_page: int = 10, page: int = 1, sort_by_change: str = None) -> Optional[List[Dict]]:
@@ -67,10 +75,12 @@ async def get_coingecko_markets(vs_currency: str = "usd", order: str = "market_c
     actual_per_page = per_page if not sort_by_change else 100  # 获取更多数据用于排序
     cache_key = f"coingecko_markets_{vs_currency}_{order}_{sort_by_change or 'none'}_{per_page}_{page}"
     
-    cached_data = await cache_manager.load_cache(cache_key, subdirectory="crypto")
+    cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="crypto")
     if cached_data:
         logging.info(f"使用缓存的CoinGecko市场数据: {order}")
         return cached_data
+    if negative:
+        return None
 
     params = {
         "vs_currency": vs_currency,
@@ -104,17 +114,21 @@ async def get_coingecko_markets(vs_currency: str = "usd", order: str = "market_c
                 return result
         else:
             logging.warning(f"CoinGecko Markets API 请求失败: HTTP {response.status_code}")
+            await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     except Exception as e:
         logging.error(f"CoinGecko Markets API 请求异常: {e}")
+        await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     return None
 
 async def get_coingecko_trending() -> Optional[Dict]:
     """从CoinGecko获取热门搜索数据"""
     cache_key = "coingecko_trending"
-    cached_data = await cache_manager.load_cache(cache_key, subdirectory="crypto")
+    cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="crypto")
     if cached_data:
         logging.info("使用缓存的CoinGecko热门搜索数据")
         return cached_data
+    if negative:
+        return None
 
     try:
         response = await httpx_client.get(COINGECKO_TRENDING_URL, timeout=20)
@@ -125,17 +139,21 @@ async def get_coingecko_trending() -> Optional[Dict]:
                 return data
         else:
             logging.warning(f"CoinGecko Trending API 请求失败: HTTP {response.status_code}")
+            await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     except Exception as e:
         logging.error(f"CoinGecko Trending API 请求异常: {e}")
+        await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     return None
 
 async def get_coingecko_single_coin(coin_id: str, vs_currency: str = "usd") -> Optional[Dict]:
     """从CoinGecko获取单个币种价格"""
     cache_key = f"coingecko_single_{coin_id}_{vs_currency}"
-    cached_data = await cache_manager.load_cache(cache_key, subdirectory="crypto")
+    cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="crypto")
     if cached_data:
         logging.info(f"使用缓存的CoinGecko单币数据: {coin_id}")
         return cached_data
+    if negative:
+        return None
 
     params = {
         "ids": coin_id,
@@ -155,10 +173,14 @@ async def get_coingecko_single_coin(coin_id: str, vs_currency: str = "usd") -> O
                 coin_data = data[0]
                 await cache_manager.save_cache(cache_key, coin_data, subdirectory="crypto")
                 return coin_data
+            # 返回空列表：币种ID不存在
+            await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_NOT_FOUND)
         else:
             logging.warning(f"CoinGecko Single Coin API 请求失败: HTTP {response.status_code}")
+            await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     except Exception as e:
         logging.error(f"CoinGecko Single Coin API 请求异常: {e}")
+        await cache_manager.save_negative(cache_key, subdirectory="crypto", reason=NEGATIVE_ERROR)
     return None
 
 def format_crypto_ranking(coins: List[Dict], title: str, vs_currency: str = "usd") -> str:
@@ -0,0 +1,134 @@
+"""
+命令处理耗时统计命令
+/handlerstats [命令|slow|json|reset]
+"""
+
+import io
+import json
+import logging
+import time
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from utils.command_factory import command_factory
+from utils.handler_timing import PHASES, handler_timing
+from utils.message_manager import delete_user_command, send_help, send_success
+from utils.permissions import Permission
+
+
+logger = logging.getLogger(__name__)
+
+# 概览中显示的处理器数量（按 p95 降序）
+OVERVIEW_LIMIT = 20
+
+
+def format_overview(groups: dict) -> str:
+    """按总耗时 p95 降序列出各处理器"""
+    rows = [(name, group) for name, group in groups.items() if "total_ms" in group["histograms"]]
+    if not rows:
+        return "暂无处理记录"
+
+    rows.sort(key=lambda item: item[1]["histograms"]["total_ms"]["p95"], reverse=True)
+    lines = []
+    for name, group in rows[:OVERVIEW_LIMIT]:
+        total = group["histograms"]["total_ms"]
+        counters = group["counters"]
+        line = f"• `{name}`: {total['count']} 次, p50 {total['p50']} / p95 {total['p95']} / p99 {total['p99']}ms"
+        if counters.get("slow"):
+            line += f", 慢 {counters['slow']}"
+        if counters.get("errors"):
+            line += f", 错误 {counters['errors']}"
+        lines.append(line)
+    if len(rows) > OVERVIEW_LIMIT:
+        lines.append(f"… 另有 {len(rows) - OVERVIEW_LIMIT} 个处理器")
+    return "\n".join(lines)
+
+
+def format_detail(name: str, group: dict | None) -> str:
+    """格式化单个处理器的阶段耗时分布"""
+    if not group:
+        return f"⏱ **处理耗时:** `{name}`\n\n暂无记录"
+
+    counters = group["counters"]
+    histograms = group["histograms"]
+    lines = [
+        f"⏱ **处理耗时:** `{name}`",
+        "",
+        f"调用 {counters.get('calls', 0)} 次, 慢 {counters.get('slow', 0)}, 错误 {counters.get('errors', 0)}",
+        "",
+        "**分布（count / p50 / p95 / p99 / max ms）:**",
+    ]
+    for phase in ("total", *PHASES, "other"):
+        stats = histograms.get(f"{phase}_ms")
+        if stats:
+            lines.append(
+                f"• `{phase}`: {stats['count']} / {stats['p50']} / {stats['p95']} / {stats['p99']} / {stats['max']}"
+            )
+    return "\n".join(lines)
+
+
+def format_slow_log(entries: list[dict], threshold_ms: int) -> str:
+    """格式化最近的慢日志（新的在前）"""
+    if not entries:
+        return f"🐢 **慢处理日志**（阈值 {threshold_ms}ms）\n\n暂无记录"
+
+    lines = [f"🐢 **慢处理日志**（阈值 {threshold_ms}ms，最近 {min(len(entries), 10)} 条）", ""]
+    for entry in reversed(entries[-10:]):
+        breakdown = ", ".join(f"{phase} {ms}" for phase, ms in entry["breakdown_ms"].items() if ms)
+        when = time.strftime("%m-%d %H:%M:%S", time.localtime(entry["at"]))
+        lines.append(f"• {when} `{entry['handler']}` {entry['total_ms']}ms")
+        lines.append(f"  {breakdown + ', ' if breakdown else ''}other {entry['other_ms']}")
+    return "\n".join(lines)
+
+
+async def handlerstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """查看命令处理耗时统计"""
+    if not update.message:
+        return
+
+    chat_id = update.effective_chat.id
+    await delete_user_command(context, chat_id, update.message.message_id)
+
+    args = context.args or []
+    option = args[0] if args else ""
+    snapshot = handler_timing.snapshot()
+
+    # /handlerstats json: 导出完整快照（含慢日志）
+    if option.lower() == "json":
+        document = io.BytesIO(json.dumps(snapshot, ensure_ascii=False, indent=2).encode("utf-8"))
+        document.name = "handler_timing.json"
+        await context.bot.send_document(chat_id=chat_id, document=document)
+        return
+
+    if option.lower() == "reset":
+        handler_timing.reset()
+        await send_success(context, chat_id, "处理耗时统计已重置")
+        return
+
+    if option.lower() == "slow":
+        message = format_slow_log(snapshot["slow_log"], snapshot["slow_threshold_ms"])
+    elif option:
+        # /handlerstats <命令>: 查看单个处理器的阶段分解
+        name = option.lstrip("/")
+        message = format_detail(name, snapshot["groups"].get(name))
+    else:
+        status = "" if handler_timing.enabled else "（统计未启用）"
+        message = (
+            f"⏱ **命令处理耗时**{status}\n\n"
+            + format_overview(snapshot["groups"])
+            + "\n\n`/handlerstats <命令>` 阶段分解 | `slow` 慢日志 | `json` 导出 | `reset` 重置"
+        )
+
+    await send_help(context, chat_id, message, parse_mode="Markdown")
+
+
+command_factory.register_command(
+    "handlerstats",
+    handlerstats_command,
+    permission=Permission.ADMIN,
+    description="查看命令处理耗时（/handlerstats [命令|slow|json|reset]）",
+    use_retry=False,
+)
+
+logger.info("命令处理耗时统计命令模块已加载")
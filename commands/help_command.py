@@ -102,8 +102,9 @@ Inline: `@bot netease 关键词$` - Inline搜索(有缓存直接发音频)
 🔧 *管理员*
 权限: `/admin` - 统一管理面板(用户/群组/反垃圾)
 缓存: `/cleancache` - 统一缓存管理菜单 | `/cleancache all` - 清理全部
+性能: `/handlerstats` - 命令耗时分布与慢日志
 用户: `/cache` `/cleanid [天数]`
-数据: `/addpoint` `/removepoint` `/listpoints`
+数据: `/addpoint` `/removepoint` `/listpoints` | `/exportprices` - 导出价格历史(CSV/Parquet)
 反垃圾: 通过 `/admin` 管理(启用/禁用/统计/日志/配置)"""
 
     super_admin_help_text = """
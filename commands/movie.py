@@ -29,6 +29,7 @@ from utils.country_data import SUPPORTED_COUNTRIES, get_country_flag
 from utils.formatter import foldable_text_v2, foldable_text_with_markdown_v2
 from utils.message_manager import delete_user_command, send_error, send_success, send_message_with_auto_delete
 from utils.permissions import Permission
+from utils.redis_cache_manager import NEGATIVE_ERROR, NEGATIVE_NOT_FOUND
 from utils.session_manager import SessionManager
 
 logger = logging.getLogger(__name__)
@@ -365,8 +366,18 @@ class MovieService:
         """获取Trakt API密钥"""
         return config_manager.config.trakt_api_key if hasattr(config_manager.config, 'trakt_api_key') else None
     
-    async def _make_tmdb_request(self, endpoint: str, params: Dict[str, Any] = None, language: str = "zh-CN") -> Optional[Dict]:
-        """发起TMDB API请求"""
+    async def _make_tmdb_request(
+        self,
+        endpoint: str,
+        params: Dict[str, Any] = None,
+        language: str = "zh-CN",
+        negative_cache_key: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """发起TMDB API请求
+
+        Args:
+            negative_cache_key: 请求失败时写入负缓存的键（404 视为不存在，其余视为暂时性错误）
+        """
         api_key = await self._get_tmdb_api_key()
         if not api_key:
             logger.error("TMDB API密钥未配置")
@@ -381,8 +392,16 @@ class MovieService:
             response = await httpx_client.get(url, params=request_params, timeout=20.0)
             response.raise_for_status()
             return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"TMDB API请求失败: {e}")
+            if negative_cache_key:
+                reason = NEGATIVE_NOT_FOUND if e.response.status_code == 404 else NEGATIVE_ERROR
+                await cache_manager.save_negative(negative_cache_key, subdirectory="movie", reason=reason)
+            return None
         except httpx.RequestError as e:
             logger.error(f"TMDB API请求失败: {e}")
+            if negative_cache_key:
+                await cache_manager.save_negative(negative_cache_key, subdirectory="movie", reason=NEGATIVE_ERROR)
             return None
         except Exception as e:
             logger.error(f"TMDB API请求异常: {e}")
@@ -543,11 +562,13 @@ class MovieService:
     async def search_movies(self, query: str, page: int = 1) -> Optional[Dict]:
         """搜索电影"""
         cache_key = f"movie_search_{query.lower()}_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("search/movie", {"query": query, "page": page})
+        data = await self._make_tmdb_request("search/movie", {"query": query, "page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -555,11 +576,13 @@ class MovieService:
     async def get_popular_movies(self, page: int = 1) -> Optional[Dict]:
         """获取热门电影"""
         cache_key = f"movie_popular_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("movie/popular", {"page": page})
+        data = await self._make_tmdb_request("movie/popular", {"page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -567,14 +590,16 @@ class MovieService:
     async def get_movie_details(self, movie_id: int) -> Optional[Dict]:
         """获取电影详情"""
         cache_key = f"movie_detail_{movie_id}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
         # 获取中文详情信息
         data = await self._make_tmdb_request(f"movie/{movie_id}", {
             "append_to_response": "credits,recommendations,watch/providers"
-        })
+        }, negative_cache_key=cache_key)
         
         if data:
             # 如果关键字段为空，获取英文信息补充
@@ -618,11 +643,13 @@ class MovieService:
     async def get_movie_recommendations(self, movie_id: int, page: int = 1) -> Optional[Dict]:
         """获取电影推荐"""
         cache_key = f"movie_rec_{movie_id}_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request(f"movie/{movie_id}/recommendations", {"page": page})
+        data = await self._make_tmdb_request(f"movie/{movie_id}/recommendations", {"page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -634,11 +661,13 @@ class MovieService:
     async def search_tv_shows(self, query: str, page: int = 1) -> Optional[Dict]:
         """搜索电视剧"""
         cache_key = f"tv_search_{query.lower()}_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("search/tv", {"query": query, "page": page})
+        data = await self._make_tmdb_request("search/tv", {"query": query, "page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -646,11 +675,13 @@ class MovieService:
     async def get_popular_tv_shows(self, page: int = 1) -> Optional[Dict]:
         """获取热门电视剧"""
         cache_key = f"tv_popular_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("tv/popular", {"page": page})
+        data = await self._make_tmdb_request("tv/popular", {"page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -897,14 +928,16 @@ class MovieService:
     async def get_tv_details(self, tv_id: int) -> Optional[Dict]:
         """获取电视剧详情"""
         cache_key = f"tv_detail_{tv_id}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
         # 获取中文详情信息
         data = await self._make_tmdb_request(f"tv/{tv_id}", {
             "append_to_response": "credits,recommendations,watch/providers"
-        })
+        }, negative_cache_key=cache_key)
         
         if data:
             # 如果关键字段为空，获取英文信息补充
@@ -948,11 +981,13 @@ class MovieService:
     async def get_tv_recommendations(self, tv_id: int, page: int = 1) -> Optional[Dict]:
         """获取电视剧推荐"""
         cache_key = f"tv_rec_{tv_id}_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request(f"tv/{tv_id}/recommendations", {"page": page})
+        data = await self._make_tmdb_request(f"tv/{tv_id}/recommendations", {"page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -960,12 +995,14 @@ class MovieService:
     async def get_tv_season_details(self, tv_id: int, season_number: int) -> Optional[Dict]:
         """获取电视剧季详情（支持中英文fallback）"""
         cache_key = f"tv_season_{tv_id}_{season_number}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
         # 获取中文季详情信息
-        data = await self._make_tmdb_request(f"tv/{tv_id}/season/{season_number}")
+        data = await self._make_tmdb_request(f"tv/{tv_id}/season/{season_number}", negative_cache_key=cache_key)
         
         if data:
             # 检查剧集的简介是否需要英文补充
@@ -1017,12 +1054,14 @@ class MovieService:
     async def get_tv_episode_details(self, tv_id: int, season_number: int, episode_number: int) -> Optional[Dict]:
         """获取电视剧集详情（支持中英文fallback）"""
         cache_key = f"tv_episode_{tv_id}_{season_number}_{episode_number}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
         # 获取中文集详情信息
-        data = await self._make_tmdb_request(f"tv/{tv_id}/season/{season_number}/episode/{episode_number}")
+        data = await self._make_tmdb_request(f"tv/{tv_id}/season/{season_number}/episode/{episode_number}", negative_cache_key=cache_key)
         
         if data:
             # 如果关键字段为空，获取英文信息补充（和tv_details相同逻辑）
@@ -1052,11 +1091,13 @@ class MovieService:
             time_window: "day", "week"
         """
         cache_key = f"trending_{media_type}_{time_window}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request(f"trending/{media_type}/{time_window}")
+        data = await self._make_tmdb_request(f"trending/{media_type}/{time_window}", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1064,11 +1105,13 @@ class MovieService:
     async def get_now_playing_movies(self) -> Optional[Dict]:
         """获取正在上映的电影"""
         cache_key = "now_playing_movies"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("movie/now_playing")
+        data = await self._make_tmdb_request("movie/now_playing", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1076,11 +1119,13 @@ class MovieService:
     async def get_upcoming_movies(self) -> Optional[Dict]:
         """获取即将上映的电影"""
         cache_key = "upcoming_movies"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("movie/upcoming")
+        data = await self._make_tmdb_request("movie/upcoming", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1088,11 +1133,13 @@ class MovieService:
     async def get_tv_airing_today(self) -> Optional[Dict]:
         """获取今日播出的电视剧"""
         cache_key = "tv_airing_today"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("tv/airing_today")
+        data = await self._make_tmdb_request("tv/airing_today", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1100,11 +1147,13 @@ class MovieService:
     async def get_tv_on_the_air(self) -> Optional[Dict]:
         """获取正在播出的电视剧"""
         cache_key = "tv_on_the_air"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("tv/on_the_air")
+        data = await self._make_tmdb_request("tv/on_the_air", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1116,11 +1165,13 @@ class MovieService:
     async def search_person(self, query: str, page: int = 1) -> Optional[Dict]:
         """搜索人物"""
         cache_key = f"person_search_{query.lower()}_{page}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request("search/person", {"query": query, "page": page})
+        data = await self._make_tmdb_request("search/person", {"query": query, "page": page}, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1128,13 +1179,15 @@ class MovieService:
     async def get_person_details(self, person_id: int) -> Optional[Dict]:
         """获取人物详情"""
         cache_key = f"person_detail_{person_id}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
         data = await self._make_tmdb_request(f"person/{person_id}", {
             "append_to_response": "movie_credits,tv_credits,combined_credits"
-        })
+        }, negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1146,11 +1199,13 @@ class MovieService:
     async def get_movie_watch_providers(self, movie_id: int, region: str = "CN") -> Optional[Dict]:
         """获取电影观看平台信息"""
         cache_key = f"movie_watch_providers_{movie_id}_{region}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request(f"movie/{movie_id}/watch/providers")
+        data = await self._make_tmdb_request(f"movie/{movie_id}/watch/providers", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -1158,11 +1213,13 @@ class MovieService:
     async def get_tv_watch_providers(self, tv_id: int, region: str = "CN") -> Optional[Dict]:
         """获取电视剧观看平台信息"""
         cache_key = f"tv_watch_providers_{tv_id}_{region}"
-        cached_data = await cache_manager.load_cache(cache_key, subdirectory="movie")
+        cached_data, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory="movie")
         if cached_data:
             return cached_data
+        if negative:
+            return None
             
-        data = await self._make_tmdb_request(f"tv/{tv_id}/watch/providers")
+        data = await self._make_tmdb_request(f"tv/{tv_id}/watch/providers", negative_cache_key=cache_key)
         if data:
             await cache_manager.save_cache(cache_key, data, subdirectory="movie")
         return data
@@ -215,6 +215,15 @@ def set_dependencies(cache_manager):
     """设置依赖"""
     global _cache_manager
     _cache_manager = cache_manager
+    # 缓存预热：在热门新闻源的缓存过期前刷新
+    cache_manager.register_warm_fetcher("news", _warm_news)
+
+
+async def _warm_news(cache_key: str) -> bool:
+    """预热新闻缓存（键格式: {source_id}_{count}）"""
+    source_id, count = cache_key.rsplit('_', 1)
+    items = await get_news(source_id, int(count), use_cache=False)
+    return bool(items)
 
 
 def create_news_sources_keyboard() -> InlineKeyboardMarkup:
@@ -275,13 +284,14 @@ def create_news_settings_keyboard(source: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
-async def get_news(source_id: str, count: int = 10) -> List[Dict]:
+async def get_news(source_id: str, count: int = 10, use_cache: bool = True) -> List[Dict]:
     """
     获取指定源的新闻
     
     Args:
         source_id: 新闻源ID
         count: 获取数量，默认10条
+        use_cache: 是否读取缓存（缓存预热时传 False）
         
     Returns:
         新闻列表
@@ -290,7 +300,7 @@ async def get_news(source_id: str, count: int = 10) -> List[Dict]:
     if source_id.lower() == 'verge':
         # 检查缓存
         cache_key = f"verge_{count}"
-        if _cache_manager:
+        if _cache_manager and use_cache:
             try:
                 cached_data = await _cache_manager.load_cache(cache_key, subdirectory="news")
                 if cached_data:
@@ -321,7 +331,7 @@ async def get_news(source_id: str, count: int = 10) -> List[Dict]:
     
     # 检查缓存
     cache_key = f"{source_id}_{count}"
-    if _cache_manager:
+    if _cache_manager and use_cache:
         try:
             cached_data = await _cache_manager.load_cache(cache_key, subdirectory="news")
             if cached_data:
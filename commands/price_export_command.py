@@ -0,0 +1,150 @@
+"""
+价格历史导出命令
+/exportprices <服务> [天数] [csv|parquet] [item=<商品ID>] [cc=<国家>]
+以流式方式导出 price_history，文件不超过 Telegram 上传上限时直接发送，否则保留在导出目录
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import re
+import time
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from utils.command_factory import command_factory
+from utils.config_manager import get_config
+from utils.message_manager import delete_user_command, send_error, send_help, send_success
+from utils.permissions import Permission
+from utils.price_export import EXPORT_FORMATS, PYARROW_AVAILABLE, export_price_history
+
+
+logger = logging.getLogger(__name__)
+
+# Bot API 上传文件大小上限
+TELEGRAM_UPLOAD_LIMIT = 50 * 1024 * 1024
+
+USAGE_TEXT = (
+    "📤 *价格历史导出*\n\n"
+    "用法: `/exportprices <服务> [天数] [csv|parquet] [item=<商品ID>] [cc=<国家>]`\n\n"
+    "示例:\n"
+    "• `/exportprices steam` - 导出 Steam 全部历史（CSV）\n"
+    "• `/exportprices app_store 90 parquet` - 最近 90 天，Parquet 格式\n"
+    "• `/exportprices steam 30 item=570 cc=US` - 单个商品单个国家\n\n"
+    f"Parquet: {'可用' if PYARROW_AVAILABLE else '未安装 pyarrow'}"
+)
+
+
+def parse_export_args(args: list[str]) -> dict:
+    """解析命令参数，参数无效时抛出 ValueError"""
+    options = {"service": args[0], "fmt": "csv", "days": None, "item_id": None, "country_code": None}
+    for arg in args[1:]:
+        lower = arg.lower()
+        if arg.isdigit():
+            options["days"] = int(arg)
+        elif lower in EXPORT_FORMATS:
+            options["fmt"] = lower
+        elif lower.startswith("item="):
+            options["item_id"] = arg[5:]
+        elif lower.startswith("cc="):
+            options["country_code"] = arg[3:].upper()
+        else:
+            raise ValueError(f"无法识别的参数: {arg}")
+    return options
+
+
+async def exportprices_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """导出价格历史"""
+    if not update.message:
+        return
+
+    chat_id = update.effective_chat.id
+    await delete_user_command(context, chat_id, update.message.message_id)
+
+    if not context.args:
+        await send_help(context, chat_id, USAGE_TEXT, parse_mode="Markdown")
+        return
+
+    price_history_manager = context.bot_data.get("price_history_manager")
+    if not price_history_manager:
+        await send_error(context, chat_id, "价格历史管理器不可用")
+        return
+
+    try:
+        options = parse_export_args(context.args)
+    except ValueError as e:
+        await send_error(context, chat_id, str(e))
+        return
+
+    config = get_config()
+    os.makedirs(config.price_export_dir, exist_ok=True)
+    scope = "_".join(filter(None, [options["service"], options["item_id"], options["country_code"]]))
+    scope = re.sub(r"[^\w.-]", "_", scope)
+    filename = f"price_history_{scope}_{time.strftime('%Y%m%d_%H%M%S')}.{options['fmt']}"
+    path = os.path.join(config.price_export_dir, filename)
+
+    started = time.monotonic()
+    try:
+        # 文件打开/关闭放到线程中执行，写入由 export_price_history 在线程中完成
+        fileobj = await asyncio.to_thread(open, path, "wb")
+        try:
+            rows = await export_price_history(
+                price_history_manager,
+                fileobj,
+                fmt=options["fmt"],
+                service=options["service"],
+                item_id=options["item_id"],
+                country_code=options["country_code"],
+                days=options["days"],
+                chunk_size=config.price_export_chunk_size,
+            )
+        finally:
+            await asyncio.to_thread(fileobj.close)
+    except ValueError as e:
+        os.remove(path)
+        await send_error(context, chat_id, str(e))
+        return
+    except Exception:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        raise
+
+    elapsed = time.monotonic() - started
+    size = await asyncio.to_thread(os.path.getsize, path)
+    summary = f"{rows} 行, {size / 1024 / 1024:.1f} MB, 耗时 {elapsed:.1f}s"
+
+    if rows == 0:
+        os.remove(path)
+        await send_error(context, chat_id, "没有符合条件的价格历史")
+        return
+
+    if size > TELEGRAM_UPLOAD_LIMIT:
+        await send_success(context, chat_id, f"导出完成（{summary}），文件超过上传上限，已保存到: {path}")
+        return
+
+    try:
+        fileobj = await asyncio.to_thread(open, path, "rb")
+        try:
+            await context.bot.send_document(
+                chat_id=chat_id,
+                document=fileobj,
+                filename=filename,
+                caption=f"📤 价格历史导出: {summary}",
+            )
+        finally:
+            fileobj.close()
+    finally:
+        os.remove(path)
+
+
+command_factory.register_command(
+    "exportprices",
+    exportprices_command,
+    permission=Permission.ADMIN,
+    description="导出价格历史（/exportprices <服务> [天数] [csv|parquet]）",
+    use_retry=False,
+)
+
+logger.info("价格历史导出命令模块已加载")
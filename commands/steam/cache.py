@@ -69,6 +69,8 @@ async def save_game_to_mysql(
             "platforms": game_data.get("platforms", {}),
             "metacritic_score": game_data.get("metacritic", {}).get("score"),
             "recommendations_total": game_data.get("recommendations", {}).get("total"),
+            # 按国家的购买选项（MySQL 命中时用于还原展示）
+            "package_groups": game_data.get("package_groups", []),
         }
 
         # 如果有汇率转换器，计算CNY价格
@@ -120,6 +122,10 @@ async def save_bundle_to_mysql(
             ),
             "type": "bundle",
             "items_count": len(bundle_data.get("items", [])),
+            # 展示用的原始价格文本和包含内容（MySQL 命中时用于还原展示）
+            "url": bundle_data.get("url"),
+            "items": bundle_data.get("items", []),
+            "price_info": price_info,
         }
 
         await smart_cache_manager.db.save_price(
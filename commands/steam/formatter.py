@@ -415,7 +415,12 @@ async def format_bundle_info(bundle_data: dict, cc: str) -> str:
 async def search_multiple_countries(game_query: str, country_inputs: list[str]) -> str:
     """跨多个国家搜索游戏价格"""
     from .models import ErrorHandler
-    from .search import get_game_details, search_game
+    from .search import (
+        get_cached_game_details_many,
+        get_game_details,
+        get_game_details_many_from_db,
+        search_game,
+    )
 
     results = []
     valid_country_codes = []
@@ -438,13 +443,21 @@ async def search_multiple_countries(game_query: str, country_inputs: list[str])
     game = select_best_match(search_results, game_query)
     app_id = str(game.get("id"))
 
+    # 先批量读取 Redis 缓存，再一次查询 MySQL，两层都未命中的国家才逐个请求（并保持请求间隔）
+    cached_details = await get_cached_game_details_many(app_id, valid_country_codes)
+    missing = [cc for cc in valid_country_codes if cc not in cached_details]
+    if missing:
+        cached_details.update(await get_game_details_many_from_db(app_id, missing))
+
     for cc in valid_country_codes:
         try:
-            game_details = await get_game_details(app_id, cc)
+            game_details = cached_details.get(cc)
+            if game_details is None:
+                game_details = await get_game_details(app_id, cc, use_db=False)
+                await asyncio.sleep(config.REQUEST_DELAY)
             if game_details:
                 formatted_info = await format_game_info(game_details, cc)
                 results.append(formatted_info)
-            await asyncio.sleep(config.REQUEST_DELAY)
         except Exception as e:
             error_msg = ErrorHandler.handle_network_error(e)
             results.append(f"❌ {cc}区查询失败: {error_msg}")
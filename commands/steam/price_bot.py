@@ -9,6 +9,7 @@ import logging
 from utils.rate_converter import RateConverter
 
 from .cache import set_cache_manager, set_rate_converter, set_smart_cache_manager
+from .models import Config
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +45,24 @@ class SteamPriceBot:
         if smart_cache_manager:
             set_smart_cache_manager(smart_cache_manager)
 
+        # 缓存预热：在热门游戏的价格缓存过期前刷新
+        cache_manager.register_warm_fetcher(
+            "steam",
+            self._warm_game_details,
+            key_prefix="steam:game:",
+            max_age_seconds=Config().steam_redis_cache,
+        )
+
         logger.info("SteamPriceBot 依赖注入完成")
 
+    async def _warm_game_details(self, cache_key: str) -> bool:
+        """预热游戏详情缓存（键格式: steam:game:{app_id}:{cc}）"""
+        from .search import get_game_details
+
+        _, _, app_id, cc = cache_key.split(":", 3)
+        result = await get_game_details(app_id, cc, use_cache=False, use_db=False)
+        return bool(result.get("success"))
+
     def get_dependencies(self):
         """获取当前依赖（用于调试）"""
         return {
@@ -17,7 +17,6 @@ from .cache import (
     cache_helper,
     save_bundle_to_mysql,
     save_game_to_mysql,
-    smart_cache_manager,
 )
 from .models import Config
 
@@ -127,38 +126,157 @@ async def search_game(query: str, cc: str, use_cache: bool = True) -> list[dict]
         return []
 
 
-async def get_game_details(app_id: str, cc: str) -> dict:
-    """从 Steam API 获取游戏详情（带分层缓存）"""
+async def get_cached_game_details_many(app_id: str, ccs: list[str]) -> dict[str, dict]:
+    """批量读取多个国家的游戏详情 Redis 缓存（一次往返）
+
+    Returns:
+        {cc: 游戏详情}，只包含缓存命中的国家
+    """
+    cache_keys = {cc: f"steam:game:{app_id}:{cc}" for cc in ccs}
+    cached = await cache.cache_manager.load_many(
+        list(cache_keys.values()),
+        subdirectory="steam",
+        max_age_seconds=config.steam_redis_cache,
+    )
+
+    results = {}
+    for cc, cache_key in cache_keys.items():
+        cached_data, _ = cached.get(cache_key, (None, None))
+        if cached_data:
+            results[cc] = cached_data
+    if results:
+        logger.debug(f"✅ Steam Redis缓存命中: {app_id}, {len(results)}/{len(cache_keys)} 个国家")
+    return results
+
+
+def _cents(amount: float | None) -> int:
+    """MySQL 中的价格（主单位）转换回 Steam API 的分"""
+    return round(amount * 100) if amount else 0
+
+
+def _game_details_from_db(app_id: str, db_data: dict) -> dict | None:
+    """将 MySQL 持久化的价格数据还原为 Steam appdetails 接口的结构（旧记录缺少 package_groups 时返回 None）"""
+    if "package_groups" not in db_data:
+        return None
+    data = {
+        "steam_appid": int(app_id),
+        "name": db_data.get("item_name", ""),
+        "type": db_data.get("type", "game"),
+        "is_free": db_data.get("is_free", False),
+        "developers": db_data.get("developers", []),
+        "publishers": db_data.get("publishers", []),
+        "genres": [{"description": genre} for genre in db_data.get("genres", [])],
+        "categories": [
+            {"description": category} for category in db_data.get("categories", [])
+        ],
+        "short_description": db_data.get("short_description", ""),
+        "header_image": db_data.get("header_image", ""),
+        "release_date": {"date": db_data.get("release_date", "")},
+        "platforms": db_data.get("platforms", {}),
+        "package_groups": db_data["package_groups"],
+    }
+    if db_data.get("current_price") is not None:
+        data["price_overview"] = {
+            "currency": db_data.get("currency"),
+            "initial": _cents(db_data.get("original_price") or db_data.get("current_price")),
+            "final": _cents(db_data.get("current_price")),
+            "discount_percent": db_data.get("discount_percent") or 0,
+        }
+    return {"success": True, "data": data}
+
+
+def _bundle_details_from_db(db_data: dict) -> dict | None:
+    """将 MySQL 持久化的捆绑包数据还原为展示结构（旧记录缺少展示字段时返回 None）"""
+    price_info = db_data.get("price_info")
+    if not price_info or not db_data.get("url"):
+        return None
+    return {
+        "name": db_data.get("item_name", ""),
+        "url": db_data["url"],
+        "items": db_data.get("items", []),
+        "original_price": price_info.get("original_price", "未知"),
+        "discount_pct": price_info.get("discount_pct", "0"),
+        "final_price": price_info.get("final_price", "未知"),
+        "savings": price_info.get("savings", "0"),
+    }
+
+
+async def get_game_details_many_from_db(app_id: str, ccs: list[str]) -> dict[str, dict]:
+    """一次查询从 MySQL 读取多个国家的游戏详情，并批量回写 Redis 热缓存
+
+    Returns:
+        {cc: 游戏详情}，只包含有新鲜数据的国家
+    """
+    if not cache.smart_cache_manager or not ccs:
+        return {}
+
+    try:
+        db_prices = await cache.smart_cache_manager.db.get_latest_prices(
+            service="steam",
+            item_id=app_id,
+            country_codes=ccs,
+            freshness_threshold=config.steam_db_freshness,
+        )
+    except Exception as e:
+        logger.warning(f"Steam MySQL批量查询失败: {e}")
+        return {}
+
+    results = {}
+    for cc, db_data in db_prices.items():
+        game_details = _game_details_from_db(app_id, db_data)
+        if game_details:
+            results[cc] = game_details
+    if results:
+        logger.info(f"✅ Steam MySQL缓存命中: {app_id}, {len(results)}/{len(ccs)} 个国家")
+        await cache.cache_manager.save_many(
+            {f"steam:game:{app_id}:{cc}": details for cc, details in results.items()},
+            subdirectory="steam",
+            ttl=config.steam_redis_cache,
+        )
+    return results
+
+
+async def get_game_details(
+    app_id: str, cc: str, use_cache: bool = True, use_db: bool = True
+) -> dict:
+    """从 Steam API 获取游戏详情（带分层缓存）
+
+    Args:
+        use_cache: 是否查询 Redis 热缓存（缓存预热时传 False）
+        use_db: 是否查询 MySQL 持久化缓存（调用方已批量查询过时传 False）
+    """
 
     cache_key = f"steam:game:{app_id}:{cc}"
 
     # 第1层：Redis热缓存查询
-    cached_data = await cache.cache_manager.load_cache(
-        cache_key, max_age_seconds=config.steam_redis_cache, subdirectory="steam"
-    )
-    if cached_data:
-        logger.debug(f"✅ Steam Redis缓存命中: {app_id}/{cc}")
-        return cached_data
+    if use_cache:
+        cached_data = await cache.cache_manager.load_cache(
+            cache_key, max_age_seconds=config.steam_redis_cache, subdirectory="steam"
+        )
+        if cached_data:
+            logger.debug(f"✅ Steam Redis缓存命中: {app_id}/{cc}")
+            return cached_data
 
     # 第2层：MySQL持久化缓存查询
-    if smart_cache_manager:
+    if use_db and cache.smart_cache_manager:
         try:
-            db_data = await smart_cache_manager.db.get_latest_price(
+            db_data = await cache.smart_cache_manager.db.get_latest_price(
                 service="steam",
                 item_id=app_id,
                 country_code=cc,
                 freshness_threshold=config.steam_db_freshness,
             )
-            if db_data:
+            game_details = _game_details_from_db(app_id, db_data) if db_data else None
+            if game_details:
                 logger.info(f"✅ Steam MySQL缓存命中: {app_id}/{cc}")
                 # 回写Redis热缓存
                 await cache.cache_manager.save_cache(
                     cache_key,
-                    db_data,
+                    game_details,
                     subdirectory="steam",
                     ttl=config.steam_redis_cache,
                 )
-                return db_data
+                return game_details
         except Exception as e:
             logger.warning(f"Steam MySQL查询失败: {e}")
 
@@ -186,7 +304,7 @@ async def get_game_details(app_id: str, cc: str) -> dict:
             )
 
             # 异步保存到MySQL持久化（性能优化）
-            if smart_cache_manager:
+            if cache.smart_cache_manager:
                 game_data = result.get("data", {})
                 price_overview = game_data.get("price_overview", {})
                 task_manager.create_task(
@@ -372,23 +490,24 @@ async def get_bundle_details(bundle_id: str, cc: str) -> dict | None:
         return cached_data
 
     # 第2层：MySQL持久化缓存查询
-    if smart_cache_manager:
+    if cache.smart_cache_manager:
         try:
-            db_data = await smart_cache_manager.db.get_latest_price(
+            db_data = await cache.smart_cache_manager.db.get_latest_price(
                 service="steam",
                 item_id=f"bundle_{bundle_id}",
                 country_code=cc,
                 freshness_threshold=config.steam_db_freshness,
             )
-            if db_data:
+            bundle_data = _bundle_details_from_db(db_data) if db_data else None
+            if bundle_data:
                 logger.info(f"✅ Steam Bundle MySQL缓存命中: {bundle_id}/{cc}")
                 await cache.cache_manager.save_cache(
                     cache_key,
-                    db_data,
+                    bundle_data,
                     subdirectory="steam",
                     ttl=config.steam_redis_cache,
                 )
-                return db_data
+                return bundle_data
         except Exception as e:
             logger.warning(f"Steam Bundle MySQL查询失败: {e}")
 
@@ -481,7 +600,7 @@ async def get_bundle_details(bundle_id: str, cc: str) -> dict | None:
         )
 
         # 异步保存到MySQL
-        if smart_cache_manager:
+        if cache.smart_cache_manager:
             task_manager.create_task(
                 save_bundle_to_mysql(
                     bundle_id=bundle_id,
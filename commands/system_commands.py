@@ -1215,7 +1215,18 @@ async def cache_debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE
                             if pool.freesize < pool.minsize:
                                 result_text += " ⚠️"
                             result_text += f" (空闲: {pool.freesize})\n"
-                
+
+                    # 只读副本状态
+                    pool_manager = getattr(user_cache_manager, 'pool_manager', None)
+                    if pool_manager and pool_manager.replicas:
+                        pool_status = pool_manager.get_status()
+                        for replica in pool_status["replicas"]:
+                            state = "✅" if replica["healthy"] else "⚠️"
+                            lag = f"{replica['lag']:.0f}s" if replica["lag"] is not None else "未知"
+                            result_text += f"• *只读副本* {state} `{replica['name']}` 延迟: {lag}\n"
+                        reads = pool_status["reads"]
+                        result_text += f"• *只读查询*: 副本 {reads['replica']} / 回退主库 {reads['primary_fallback']}\n"
+
                 # 尝试获取缓存统计信息
                 if hasattr(user_cache_manager, 'get_cursor'):
                     try:
@@ -23,6 +23,7 @@ from utils.command_factory import command_factory
 from utils.permissions import Permission
 from utils.message_manager import send_message_with_auto_delete, send_error, delete_user_command
 from utils.formatter import foldable_text_v2
+from utils.redis_cache_manager import NEGATIVE_ERROR, NEGATIVE_NOT_FOUND
 
 logger = logging.getLogger(__name__)
 
@@ -218,6 +219,10 @@ class WhoisService:
             'source': None
         }
 
+        # 是否有查询因超时或网络错误失败（用于区分"未注册"和暂时性错误）
+        transient = False
+        attempted = False
+
         # .ng 域名特殊处理 - 使用 Web WHOIS
         if domain.endswith('.ng'):
             try:
@@ -232,6 +237,7 @@ class WhoisService:
 
         # 优先使用 whois21（快速且解析能力强）
         if self._whois21:
+            attempted = True
             try:
                 whois_obj = await asyncio.wait_for(
                     asyncio.to_thread(self._whois21.WHOIS, domain),
@@ -257,9 +263,11 @@ class WhoisService:
                         return result
             except Exception as e:
                 logger.debug(f"whois21查询失败: {e}")
+                transient = transient or isinstance(e, (asyncio.TimeoutError, OSError))
 
         # 备选方案1：使用 asyncwhois（支持更多TLD）
         if self._asyncwhois and not result['success']:
+            attempted = True
             try:
                 query_string, parsed_dict = await self._asyncwhois.aio_whois(
                     domain,
@@ -286,9 +294,11 @@ class WhoisService:
                     return result
             except Exception as e:
                 logger.debug(f"asyncwhois查询失败: {e}")
+                transient = transient or isinstance(e, (asyncio.TimeoutError, OSError))
 
         # 备选方案2：使用 python-whois
         if self._python_whois and not result['success']:
+            attempted = True
             try:
                 data = await asyncio.wait_for(
                     asyncio.to_thread(self._python_whois.whois, domain),
@@ -311,9 +321,12 @@ class WhoisService:
             except Exception as e:
                 logger.debug(f"python-whois查询失败: {e}")
                 result['error'] = str(e)
+                transient = transient or isinstance(e, (asyncio.TimeoutError, OSError))
 
         if not result['success']:
             result['error'] = "无法查询域名信息，请检查域名是否有效"
+            # 所有查询方式都正常返回但没有数据：域名未注册
+            result['not_found'] = attempted and not transient
         
         return result
     
@@ -1419,6 +1432,7 @@ class WhoisService:
                 except self._dns.resolver.NXDOMAIN:
                     # 域名不存在
                     result['error'] = f"域名 {domain} 不存在"
+                    result['not_found'] = True
                     return result
                 except Exception as e:
                     logger.debug(f"查询{record_type}记录失败: {e}")
@@ -1770,6 +1784,60 @@ def format_whois_result(result: Dict[str, Any]) -> str:
     
     return '\n'.join(lines)
 
+async def query_with_cache(query_type: str, query: str) -> Dict[str, Any]:
+    """
+    带缓存的 WHOIS/DNS 查询
+
+    成功结果按子目录 TTL 缓存；失败结果写入负缓存，短时间内相同查询直接返回失败：
+    确认不存在（未注册域名、NXDOMAIN）使用 CACHE_NEGATIVE_TTL，其余失败视为暂时性错误，
+    使用更短的 CACHE_NEGATIVE_ERROR_TTL
+    """
+    subdirectory = "dns" if query_type == 'dns' else "whois"
+    cache_key = f"dns_{query}" if query_type == 'dns' else f"whois_{query_type}_{query}"
+
+    if cache_manager:
+        try:
+            cached_result, negative = await cache_manager.load_cache_or_negative(cache_key, subdirectory=subdirectory)
+            if cached_result:
+                return cached_result
+            if negative:
+                return {
+                    'type': query_type,
+                    'query': query,
+                    'success': False,
+                    'data': {},
+                    'error': f"未找到 {query} 的记录" if negative == NEGATIVE_NOT_FOUND else "查询暂时失败，请稍后重试",
+                    'source': None
+                }
+        except Exception as e:
+            logger.debug(f"缓存读取失败: {e}")
+
+    service = WhoisService()
+    if query_type == 'domain':
+        result = await service.query_domain(query)
+    elif query_type == 'ip':
+        result = await service.query_ip(query)
+    elif query_type == 'asn':
+        result = await service.query_asn(query)
+    elif query_type == 'tld':
+        result = await service.query_tld(query)
+    elif query_type == 'dns':
+        result = await service.query_dns(query)
+    else:
+        return {'success': False, 'error': '未知的查询类型'}
+
+    if cache_manager:
+        try:
+            if result['success']:
+                await cache_manager.save_cache(cache_key, result, subdirectory=subdirectory)
+            else:
+                reason = NEGATIVE_NOT_FOUND if result.get('not_found') else NEGATIVE_ERROR
+                await cache_manager.save_negative(cache_key, subdirectory=subdirectory, reason=reason)
+        except Exception as e:
+            logger.debug(f"缓存保存失败: {e}")
+
+    return result
+
 async def whois_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """WHOIS查询命令 - 智能识别查询类型"""
     try:
@@ -1812,43 +1880,8 @@ async def whois_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         query = ' '.join(context.args)
         query_type = detect_query_type(query)
         
-        # 检查缓存
-        cache_key = f"whois_{query_type}_{query}"
-        cached_result = None
-        if cache_manager:
-            try:
-                cached_result = await cache_manager.load_cache(cache_key, subdirectory="whois")
-            except Exception as e:
-                logger.debug(f"缓存读取失败: {e}")
-        
-        if cached_result:
-            result = cached_result
-        else:
-            # 执行查询
-            service = WhoisService()
-            
-            if query_type == 'domain':
-                result = await service.query_domain(query)
-            elif query_type == 'ip':
-                result = await service.query_ip(query)
-            elif query_type == 'asn':
-                result = await service.query_asn(query)
-            elif query_type == 'tld':
-                result = await service.query_tld(query)
-            else:
-                result = {'success': False, 'error': '未知的查询类型'}
-            
-            # 缓存结果
-            if cache_manager and result['success']:
-                try:
-                    # 成功的查询结果缓存
-                    await cache_manager.save_cache(
-                        cache_key, 
-                        result, 
-                        subdirectory="whois"
-                    )
-                except Exception as e:
-                    logger.debug(f"缓存保存失败: {e}")
+        # 执行查询（带缓存）
+        result = await query_with_cache(query_type, query)
         
         # 格式化并发送结果
         try:
@@ -2083,32 +2116,8 @@ async def dns_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         
         domain = ' '.join(context.args)
         
-        # 检查缓存
-        cache_key = f"dns_{domain}"
-        cached_result = None
-        if cache_manager:
-            try:
-                cached_result = await cache_manager.load_cache(cache_key, subdirectory="dns")
-            except Exception as e:
-                logger.debug(f"缓存读取失败: {e}")
-        
-        if cached_result:
-            result = cached_result
-        else:
-            # 执行DNS查询
-            service = WhoisService()
-            result = await service.query_dns(domain)
-            
-            # 缓存结果
-            if cache_manager and result['success']:
-                try:
-                    await cache_manager.save_cache(
-                        cache_key, 
-                        result, 
-                        subdirectory="dns"
-                    )
-                except Exception as e:
-                    logger.debug(f"缓存保存失败: {e}")
+        # 执行DNS查询（带缓存）
+        result = await query_with_cache('dns', domain)
         
         # 格式化并发送结果
         try:
@@ -2306,18 +2315,7 @@ async def whois_inline_execute(args: str) -> dict:
         }
         type_name = type_names.get(query_type, '🔍 查询')
 
-        # 执行查询
-        service = WhoisService()
-
-        if query_type == 'domain':
-            result = await service.query_domain(query)
-        elif query_type == 'ip':
-            result = await service.query_ip(query)
-        elif query_type == 'asn':
-            result = await service.query_asn(query)
-        elif query_type == 'tld':
-            result = await service.query_tld(query)
-        else:
+        if query_type not in type_names:
             return {
                 "success": False,
                 "title": "❌ 未知查询类型",
@@ -2326,6 +2324,9 @@ async def whois_inline_execute(args: str) -> dict:
                 "error": "未知查询类型"
             }
 
+        # 执行查询（带缓存，Inline 输入过程中重复的失败查询直接命中负缓存）
+        result = await query_with_cache(query_type, query)
+
         if not result['success']:
             return {
                 "success": False,
@@ -223,8 +223,10 @@ CREATE TABLE IF NOT EXISTS social_parser_stats (
 -- ============================================================================
 
 -- 价格历史表（支持智能缓存系统）
+-- 按 recorded_at 月度范围分区，pmax 兜底；月分区 pYYYYMM 由程序提前创建，过期数据以 DROP PARTITION 清理
+-- 分区表的主键/唯一键必须包含分区列，因此主键为 (id, recorded_at)
 CREATE TABLE IF NOT EXISTS price_history (
-    id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '自增主键',
+    id BIGINT AUTO_INCREMENT COMMENT '自增主键',
     service VARCHAR(50) NOT NULL COMMENT '服务名称（steam/app_store/google_play等）',
     item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
     item_name VARCHAR(500) COMMENT '商品名称',
@@ -235,11 +237,67 @@ CREATE TABLE IF NOT EXISTS price_history (
     discount_percent INT DEFAULT 0 COMMENT '折扣百分比',
     price_cny DECIMAL(10, 2) COMMENT 'CNY等值价格',
     extra_data JSON COMMENT '额外数据（JSON格式）',
-    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '记录时间',
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '记录时间',
+    PRIMARY KEY (id, recorded_at),
     UNIQUE KEY unique_service_item_country_time (service, item_id, country_code, recorded_at),
     INDEX idx_service (service),
     INDEX idx_item_id (item_id),
     INDEX idx_country_code (country_code),
     INDEX idx_recorded_at (recorded_at),
     INDEX idx_service_item_country (service, item_id, country_code)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='价格历史表';
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='价格历史表'
+PARTITION BY RANGE (UNIX_TIMESTAMP(recorded_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 最新价格表（每个 service/item/country 一行，由写入 price_history 的同一事务维护）
+-- 价格未变化时不写 price_history，只更新 last_seen_at
+CREATE TABLE IF NOT EXISTS price_latest (
+    service VARCHAR(50) NOT NULL COMMENT '服务名称',
+    item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
+    country_code VARCHAR(10) NOT NULL COMMENT '国家代码',
+    item_name VARCHAR(500) COMMENT '商品名称',
+    currency VARCHAR(10) COMMENT '货币代码',
+    original_price DECIMAL(10, 2) COMMENT '原价',
+    current_price DECIMAL(10, 2) COMMENT '当前价格',
+    discount_percent INT DEFAULT 0 COMMENT '折扣百分比',
+    price_cny DECIMAL(10, 2) COMMENT 'CNY等值价格',
+    extra_data JSON COMMENT '额外数据（JSON格式）',
+    content_hash CHAR(32) COMMENT '价格字段哈希，用于变化检测',
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '价格变为当前值的时间',
+    last_seen_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '最近一次确认价格的时间',
+    PRIMARY KEY (service, item_id, country_code),
+    INDEX idx_service_last_seen_at (service, last_seen_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='最新价格表';
+
+-- 商品静态元数据表（描述、分类、图标等与国家无关的数据，每个商品一行）
+CREATE TABLE IF NOT EXISTS price_item_metadata (
+    service VARCHAR(50) NOT NULL COMMENT '服务名称',
+    item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
+    metadata JSON COMMENT '静态元数据（JSON格式）',
+    metadata_hash CHAR(32) COMMENT '元数据哈希',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+    PRIMARY KEY (service, item_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='商品静态元数据表';
+
+-- 每日价格汇总表（由定时任务增量维护，长时间范围的历史查询读取此表）
+CREATE TABLE IF NOT EXISTS price_daily_rollup (
+    service VARCHAR(50) NOT NULL COMMENT '服务名称',
+    item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
+    country_code VARCHAR(10) NOT NULL COMMENT '国家代码',
+    day DATE NOT NULL COMMENT '日期',
+    item_name VARCHAR(500) COMMENT '商品名称',
+    currency VARCHAR(10) COMMENT '货币代码',
+    min_price DECIMAL(10, 2) COMMENT '当天最低价',
+    max_price DECIMAL(10, 2) COMMENT '当天最高价',
+    avg_price DECIMAL(10, 2) COMMENT '当天平均价（按价格持续时间加权）',
+    last_price DECIMAL(10, 2) COMMENT '当天最后一次记录的价格',
+    last_original_price DECIMAL(10, 2) COMMENT '当天最后一次记录的原价',
+    last_discount_percent INT COMMENT '当天最后一次记录的折扣百分比',
+    last_price_cny DECIMAL(10, 2) COMMENT '当天最后一次记录的CNY等值价格',
+    sample_count INT NOT NULL DEFAULT 0 COMMENT '当天价格变化次数（0 表示沿用前一天的价格）',
+    first_recorded_at TIMESTAMP NULL COMMENT '当天价格覆盖区间的起点',
+    last_recorded_at TIMESTAMP NULL COMMENT '当天价格覆盖区间的终点',
+    PRIMARY KEY (service, item_id, country_code, day),
+    INDEX idx_day (day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='每日价格汇总表';
\ No newline at end of file
@@ -39,8 +39,9 @@ async def cache_user_info(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     logger.debug(f"[UserCache] 处理消息: 用户={user.id}(@{user.username}), 群组={chat_id}")
 
     # 修改：缓存所有用户，不仅仅是有用户名的用户
+    # 资料未变化的用户按时间粒度合并，批量写入数据库
     try:
-        await user_cache_manager.update_user_cache(
+        await user_cache_manager.record_user_seen(
             user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name
         )
         # 日志记录已移至 user_cache_manager 内部，此处不再重复记录
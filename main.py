@@ -94,6 +94,7 @@ from commands import (
     flight,
     fuel,
     google_play,
+    handler_stats_command,
     help_command,
     hotel,
     map as map_command,
@@ -105,6 +106,7 @@ from commands import (
     netflix,
     ytmusic,
     news,
+    price_export_command,
     scan_command,
     spotify,
     steam,
@@ -119,6 +121,7 @@ from handlers.user_cache_handler import setup_user_cache_handler  # 新增：导
 from utils.command_factory import command_factory
 from utils.unified_text_handler import unified_text_handler  # 导入统一文本处理器
 from utils.error_handling import with_error_handling
+from utils.handler_timing import handler_timing, install_timing_patches
 from utils.log_manager import schedule_log_maintenance
 from utils.mysql_user_manager import MySQLUserManager
 from utils.permissions import Permission
@@ -288,6 +291,15 @@ async def setup_application(application: Application, config) -> None:
         install_guest_bot_patches()
         logger.info("✅ Guest Bot patches installed")
 
+    # 命令处理耗时统计
+    handler_timing.configure(
+        enabled=config.handler_timing_enabled,
+        slow_threshold_ms=config.handler_slow_threshold_ms,
+        slow_log_size=config.handler_slow_log_size,
+    )
+    if config.handler_timing_enabled:
+        install_timing_patches()
+
     # ========================================
     # 第零步：检查并初始化数据库
     # ========================================
@@ -310,6 +322,12 @@ async def setup_application(application: Application, config) -> None:
     )
     await cache_manager.connect()
 
+    # 初始化 MySQL 共享连接池（所有 MySQL 管理器共用，只读查询可路由到副本）
+    from utils.mysql_pool import MySQLPoolManager
+
+    mysql_pool_manager = MySQLPoolManager.from_config(config)
+    await mysql_pool_manager.connect()
+
     # 初始化 MySQL 用户管理器
     user_cache_manager = MySQLUserManager(
         host=config.db_host,
@@ -317,8 +335,13 @@ async def setup_application(application: Application, config) -> None:
         database=config.db_name,
         user=config.db_user,
         password=config.db_password,
+        pool_manager=mysql_pool_manager,
     )
     await user_cache_manager.connect()
+    if config.permission_snapshot_enabled:
+        await user_cache_manager.start_permission_sync(
+            cache_manager.redis_client, config.permission_snapshot_refresh_interval
+        )
 
     # 初始化 Redis 统计管理器
     stats_manager = RedisStatsManager(cache_manager.redis_client)
@@ -335,6 +358,7 @@ async def setup_application(application: Application, config) -> None:
         database=config.db_name,
         user=config.db_user,
         password=config.db_password,
+        pool_manager=mysql_pool_manager,
     )
     await price_history_manager.connect()
     logger.info("✅ 价格历史管理器初始化完成")
@@ -345,6 +369,13 @@ async def setup_application(application: Application, config) -> None:
     smart_cache_manager = SmartCacheManager(
         redis_cache_manager=cache_manager,
         price_history_manager=price_history_manager,
+        lock_enabled=config.cache_fetch_lock_enabled,
+        lock_lease=config.cache_fetch_lock_lease,
+        lock_wait_timeout=config.cache_fetch_lock_wait,
+        fetch_concurrency=config.cache_fetch_concurrency,
+        write_batch_size=config.cache_db_write_batch_size,
+        write_flush_interval=config.cache_db_write_flush_interval,
+        write_max_pending=config.cache_db_write_max_pending,
     )
     logger.info("✅ 智能缓存管理器初始化完成")
 
@@ -384,7 +415,7 @@ async def setup_application(application: Application, config) -> None:
         from utils.anti_spam_detector import AntiSpamDetector
         from handlers.anti_spam_handler import AntiSpamHandler
 
-        anti_spam_manager = AntiSpamManager(user_cache_manager.pool)
+        anti_spam_manager = AntiSpamManager(user_cache_manager.pool, pool_manager=mysql_pool_manager)
         anti_spam_detector = AntiSpamDetector(
             api_key=config.openai_api_key,
             model=config.openai_model,
@@ -416,6 +447,7 @@ async def setup_application(application: Application, config) -> None:
     application.bot_data["cache_manager"] = cache_manager
     application.bot_data["rate_converter"] = rate_converter
     application.bot_data["httpx_client"] = httpx_client
+    application.bot_data["mysql_pool_manager"] = mysql_pool_manager
     application.bot_data["user_cache_manager"] = user_cache_manager
     application.bot_data["stats_manager"] = stats_manager
     application.bot_data["price_history_manager"] = price_history_manager
@@ -720,6 +752,8 @@ async def setup_application(application: Application, config) -> None:
     # 初始化 Redis 定时任务调度器
     task_scheduler = redis_init_task_scheduler(cache_manager, cache_manager.redis_client)
     task_scheduler.set_rate_converter(rate_converter)  # 设置汇率转换器
+    task_scheduler.set_smart_cache_manager(smart_cache_manager)  # 设置智能缓存管理器（价格历史分区维护）
+    task_scheduler.set_stats_manager(stats_manager)  # 设置统计管理器（活跃用户统计压缩）
     application.bot_data["task_scheduler"] = task_scheduler
 
     # 根据配置添加定时清理任务
@@ -1154,12 +1188,28 @@ async def cleanup_application(application: Application) -> None:
         # ========================================
         # 第五步：关闭数据库连接
         # ========================================
+        if "smart_cache_manager" in application.bot_data:
+            # 先写出待保存的价格记录，再关闭 Redis/MySQL
+            await application.bot_data["smart_cache_manager"].wait_for_background_tasks()
+            logger.info("✅ 智能缓存后台写入已完成")
+
+        if "stats_manager" in application.bot_data:
+            # 写出队列中剩余的命令统计
+            await application.bot_data["stats_manager"].close()
+
+        if "user_cache_manager" in application.bot_data:
+            # 先停止权限快照订阅，再关闭 Redis
+            await application.bot_data["user_cache_manager"].close()
+
         if "cache_manager" in application.bot_data:
             await application.bot_data["cache_manager"].close()
             logger.info("✅ Redis 连接已关闭")
 
-        if "user_cache_manager" in application.bot_data:
-            await application.bot_data["user_cache_manager"].close()
+        if "price_history_manager" in application.bot_data:
+            await application.bot_data["price_history_manager"].close()
+
+        if "mysql_pool_manager" in application.bot_data:
+            await application.bot_data["mysql_pool_manager"].close()
             logger.info("✅ MySQL 连接已关闭")
 
         logger.info(" 应用资源清理完成")
@@ -13,16 +13,24 @@ logger = logging.getLogger(__name__)
 class AntiSpamManager:
     """反垃圾数据库管理器"""
 
-    def __init__(self, db_pool: aiomysql.Pool):
+    def __init__(self, db_pool: aiomysql.Pool, pool_manager=None):
         """
         初始化反垃圾管理器
 
         Args:
             db_pool: MySQL连接池
+            pool_manager: 共享连接池管理器（可选，统计和日志查询会优先路由到只读副本）
         """
         self.pool = db_pool
+        self.pool_manager = pool_manager
         logger.info("AntiSpamManager initialized")
 
+    def _acquire_read(self):
+        """获取只读查询连接（配置了副本时优先使用副本）"""
+        if self.pool_manager:
+            return self.pool_manager.acquire(readonly=True)
+        return self.pool.acquire()
+
     # ==================== 配置管理 ====================
 
     async def is_group_enabled(self, group_id: int) -> bool:
@@ -227,7 +235,7 @@ class AntiSpamManager:
 
     async def get_recent_logs(self, group_id: int, limit: int = 50) -> List[Dict]:
         """获取最近的检测日志"""
-        async with self.pool.acquire() as conn:
+        async with self._acquire_read() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute(
                     """SELECT * FROM anti_spam_logs
@@ -266,7 +274,7 @@ class AntiSpamManager:
 
     async def get_group_stats(self, group_id: int, days: int = 7) -> List[Dict]:
         """获取群组统计数据"""
-        async with self.pool.acquire() as conn:
+        async with self._acquire_read() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 start_date = datetime.now().date() - timedelta(days=days)
                 await cursor.execute(
@@ -290,7 +298,7 @@ class AntiSpamManager:
         Returns:
             检测日志列表
         """
-        async with self.pool.acquire() as conn:
+        async with self._acquire_read() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 if spam_only:
                     await cursor.execute(
@@ -320,7 +328,7 @@ class AntiSpamManager:
         Returns:
             全局统计数据
         """
-        async with self.pool.acquire() as conn:
+        async with self._acquire_read() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 start_date = datetime.now().date() - timedelta(days=days)
                 await cursor.execute(
@@ -348,7 +356,7 @@ class AntiSpamManager:
         Returns:
             检测日志列表
         """
-        async with self.pool.acquire() as conn:
+        async with self._acquire_read() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 if spam_only:
                     await cursor.execute(
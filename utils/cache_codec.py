@@ -0,0 +1,158 @@
+"""
+缓存值编解码器
+Redis 中的缓存值以一个头字节开头，描述格式版本、序列化方式和压缩算法：
+
+    1 vvv ss cc
+    │  │   │  └─ 压缩算法: 0=无, 1=zlib, 2=zstd
+    │  │   └──── 序列化方式: 0=JSON, 1=msgpack
+    │  └──────── 格式版本（当前为 1）
+    └─────────── 最高位恒为 1，旧版 JSON 文本（以 "{" 开头）最高位为 0
+
+没有头字节的值按旧版 JSON 文本解析，已有缓存无需迁移
+"""
+
+import json
+import logging
+import zlib
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+
+FORMAT_VERSION = 1
+
+SERIALIZER_JSON = 0
+SERIALIZER_MSGPACK = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+SERIALIZERS = {"json": SERIALIZER_JSON, "msgpack": SERIALIZER_MSGPACK}
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD}
+
+
+class CacheCodecError(ValueError):
+    """缓存值无法解码"""
+
+
+def _make_header(serializer: int, compression: int) -> int:
+    return 0x80 | (FORMAT_VERSION << 4) | (serializer << 2) | compression
+
+
+class CacheCodec:
+    """带头字节的缓存值编解码器"""
+
+    def __init__(self, serializer: str = "json", compression: str = "zlib", compress_threshold: int = 1024):
+        """
+        Args:
+            serializer: 序列化方式 json / msgpack（msgpack 未安装时回退到 json）
+            compression: 压缩算法 none / zlib / zstd（zstandard 未安装时回退到 zlib）
+            compress_threshold: 序列化后超过该字节数才压缩
+        """
+        if serializer == "msgpack" and not MSGPACK_AVAILABLE:
+            logger.warning("msgpack 未安装，缓存序列化回退到 JSON")
+            serializer = "json"
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            logger.warning("zstandard 未安装，缓存压缩回退到 zlib")
+            compression = "zlib"
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"未知的缓存序列化方式: {serializer}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"未知的缓存压缩算法: {compression}")
+
+        self.serializer = SERIALIZERS[serializer]
+        self.compression = COMPRESSIONS[compression]
+        self.compress_threshold = compress_threshold
+        self._zstd_compressor = zstandard.ZstdCompressor(level=3) if self.compression == COMPRESSION_ZSTD else None
+
+    def _serialize(self, value: Any) -> bytes:
+        if self.serializer == SERIALIZER_MSGPACK:
+            return msgpack.packb(value, use_bin_type=True)
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def encode(self, value: Any) -> tuple[bytes, int]:
+        """
+        编码缓存值
+
+        Returns:
+            (编码后的字节, 压缩前的序列化字节数)
+        """
+        payload = self._serialize(value)
+        raw_size = len(payload)
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and raw_size >= self.compress_threshold:
+            if self.compression == COMPRESSION_ZSTD:
+                compressed = self._zstd_compressor.compress(payload)
+            else:
+                compressed = zlib.compress(payload, 6)
+            # 压缩无收益时保留原文
+            if len(compressed) < raw_size:
+                payload = compressed
+                compression = self.compression
+
+        return bytes((_make_header(self.serializer, compression),)) + payload, raw_size
+
+    @staticmethod
+    def is_legacy(raw: bytes | str) -> bool:
+        """是否为没有头字节的旧版 JSON 文本"""
+        if isinstance(raw, str):
+            return True
+        return not raw or not raw[0] & 0x80
+
+    @staticmethod
+    def decode(raw: bytes | str) -> Any:
+        """解码缓存值（兼容旧版 JSON 文本）"""
+        if CacheCodec.is_legacy(raw):
+            try:
+                return json.loads(raw)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise CacheCodecError(f"旧版 JSON 解析失败: {e}") from e
+
+        header = raw[0]
+        version = (header >> 4) & 0x07
+        serializer = (header >> 2) & 0x03
+        compression = header & 0x03
+        if version != FORMAT_VERSION:
+            raise CacheCodecError(f"不支持的缓存格式版本: {version}")
+
+        payload = raw[1:]
+        try:
+            if compression == COMPRESSION_ZLIB:
+                payload = zlib.decompress(payload)
+            elif compression == COMPRESSION_ZSTD:
+                if not ZSTD_AVAILABLE:
+                    raise CacheCodecError("缓存值使用 zstd 压缩，但 zstandard 未安装")
+                payload = zstandard.ZstdDecompressor().decompress(payload)
+            elif compression != COMPRESSION_NONE:
+                raise CacheCodecError(f"未知的压缩算法: {compression}")
+
+            if serializer == SERIALIZER_MSGPACK:
+                if not MSGPACK_AVAILABLE:
+                    raise CacheCodecError("缓存值使用 msgpack 序列化，但 msgpack 未安装")
+                return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+            if serializer == SERIALIZER_JSON:
+                return json.loads(payload)
+            raise CacheCodecError(f"未知的序列化方式: {serializer}")
+        except CacheCodecError:
+            raise
+        except Exception as e:
+            raise CacheCodecError(f"缓存值解码失败: {e}") from e
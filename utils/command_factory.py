@@ -4,6 +4,7 @@
 统一管理和注册命令，支持装饰器、权限检查、错误处理等功能
 """
 
+import functools
 import logging
 from collections.abc import Callable
 from typing import Any
@@ -11,12 +12,35 @@ from typing import Any
 from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, filters
 
 from utils.error_handling import RetryConfig, with_error_handling, with_rate_limit, with_retry
+from utils.handler_timing import with_timing
 from utils.permissions import Permission, require_permission
 
 
 logger = logging.getLogger(__name__)
 
 
+def with_usage_stats(command: str):
+    """
+    命令使用统计装饰器
+
+    只把记录放入统计管理器的有界队列，不等待 Redis 写入
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(update, context, *args, **kwargs):
+            stats_manager = context.bot_data.get("stats_manager")
+            if stats_manager and update.effective_user and update.effective_chat:
+                stats_manager.enqueue_command_usage(
+                    command, update.effective_user.id, update.effective_chat.id, update.effective_chat.type
+                )
+            return await func(update, context, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 class CommandFactory:
     """命令工厂类"""
 
@@ -56,6 +80,9 @@ class CommandFactory:
             if use_retry:
                 decorated_handler = with_retry(config=RetryConfig(max_retries=3))(decorated_handler)
 
+            # 应用使用统计装饰器（在重试之外，每次调用只记录一次）
+            decorated_handler = with_usage_stats(command)(decorated_handler)
+
             # 应用速率限制装饰器
             if use_rate_limit:
                 key = rate_limit_key or f"command_{command}"
@@ -64,6 +91,9 @@ class CommandFactory:
             # 应用权限检查装饰器
             decorated_handler = require_permission(permission)(decorated_handler)
 
+            # 应用耗时统计装饰器（最外层，覆盖权限检查）
+            decorated_handler = with_timing(command)(decorated_handler)
+
         self.commands[command] = {
             "handler": decorated_handler,
             "permission": permission,
@@ -88,6 +118,7 @@ class CommandFactory:
         # 应用装饰器
         decorated_handler = with_error_handling(handler)
         decorated_handler = require_permission(permission)(decorated_handler)
+        decorated_handler = with_timing(f"callback:{pattern}")(decorated_handler)
 
         self.callbacks[pattern] = {
             "handler": decorated_handler,
@@ -135,6 +166,9 @@ class CommandFactory:
             # 应用权限检查装饰器
             decorated_handler = require_permission(permission)(decorated_handler)
 
+            # 应用耗时统计装饰器
+            decorated_handler = with_timing(f"text:{description or handler.__name__}")(decorated_handler)
+
         self.text_handlers.append({
             "handler": decorated_handler,
             "permission": permission,
@@ -159,6 +159,10 @@ class BotConfig:
         self.max_concurrent_requests = 10
         self.request_timeout = 30
         self.max_retries = 3
+        # 命令处理耗时统计（/handlerstats）
+        self.handler_timing_enabled = True
+        self.handler_slow_threshold_ms = 3000  # 总耗时超过该毫秒数的处理记录慢日志，0 表示关闭
+        self.handler_slow_log_size = 50  # 内存中保留的最近慢日志条数
 
         # 速率限制配置
         self.rate_limit_enabled = True
@@ -194,6 +198,9 @@ class BotConfig:
         # 用户缓存配置
         self.enable_user_cache = False
         self.user_cache_group_ids = []
+        self.user_cache_seen_granularity = 300  # 资料未变化时，距上次写入超过该秒数才更新 last_seen
+        self.user_cache_flush_interval = 3  # 待写入的用户资料合并后批量写入的间隔（秒）
+        self.user_cache_max_tracked = 50000  # 内存中记录最近写入状态的用户数上限
 
         # Guest Bot 配置
         self.enable_guest_bot = False
@@ -223,6 +230,61 @@ class BotConfig:
         # Redis 连接池配置
         self.redis_max_connections = 50  # 最大连接数
         self.redis_health_check_interval = 30  # 健康检查间隔（秒）
+        # 进程内 L1 缓存配置（位于 Redis 之前，跨实例通过 pub/sub 失效）
+        self.cache_l1_enabled = True
+        self.cache_l1_ttl = 60  # L1 条目最长存活时间（秒）
+        self.cache_l1_subdirectories: dict[str, int] = {  # 启用 L1 的子目录及其最大条目数
+            "exchange_rates": 16,
+            "spotify": 256,
+            "netflix": 256,
+            "disney_plus": 256,
+            "nintendo": 256,
+            "xbox": 256,
+            "max": 256,
+            "apple_services": 256,
+            "cooking": 64,
+            "fuel": 64,
+            "electricity": 64,
+        }
+        # Stale-while-revalidate：条目过了软 TTL 后在宽限期内仍可返回，同时后台刷新
+        self.cache_swr_enabled = True
+        # 启用 SWR 的子目录及其宽限期（秒）；默认为空（按需开启），
+        # 只有通过 SmartCacheManager.get_or_fetch / get_or_fetch_batch 读取的数据才会返回过期条目
+        self.cache_swr_grace_periods: dict[str, int] = {}
+        # 缓存值编码：带头字节的 JSON/msgpack，超过阈值时压缩（旧版 JSON 缓存仍可读取）
+        self.cache_codec_enabled = True
+        self.cache_codec_serializer = "json"  # json / msgpack
+        self.cache_codec_compression = "zlib"  # none / zlib / zstd
+        self.cache_compress_threshold = 1024  # 序列化后超过该字节数才压缩
+        # 缓存防击穿：爬取前获取 Redis 分布式锁，多实例只有一个刷新同一条数据
+        self.cache_fetch_lock_enabled = True
+        self.cache_fetch_lock_lease = 30  # 锁租约（秒）
+        self.cache_fetch_lock_wait = 10  # 未抢到锁时等待其他实例刷新的最长时间（秒）
+        self.cache_fetch_concurrency = 4  # 批量查询时每个服务同时爬取的最大数量
+        # 爬取结果异步写入 MySQL 的写后缓冲
+        self.cache_db_write_batch_size = 100  # 每批最多写入的记录数
+        self.cache_db_write_flush_interval = 2  # 最多攒批的时间（秒）
+        self.cache_db_write_max_pending = 1000  # 缓冲容量，满时新的写入会等待
+        # 负缓存：短时间缓存上游查询失败的结果，避免重复请求注定失败的查询
+        self.cache_negative_ttl = 300  # 上游明确返回不存在时的缓存时长（秒），0 表示不缓存
+        self.cache_negative_error_ttl = 30  # 上游暂时性错误时的缓存时长（秒），0 表示不缓存
+        # 缓存预热：按采样的访问热度，在过期前通过注册的 fetcher 刷新每个子目录最热的键
+        self.cache_warm_enabled = True
+        self.cache_warm_top_n: dict[str, int] = {  # 参与预热的子目录及每次考虑的最热键数量
+            "steam": 50,
+            "app_store": 50,
+            "news": 20,
+            "netflix": 1,
+            "spotify": 1,
+            "disney_plus": 1,
+            "nintendo": 1,
+            "xbox": 1,
+            "max": 1,
+        }
+        self.cache_warm_interval = 300  # 预热任务执行间隔（秒）
+        self.cache_warm_lead_time = 900  # 剩余有效期少于该值（秒）的键会被刷新，应大于执行间隔
+        self.cache_warm_budget = 30  # 每次预热最多请求上游的次数
+        self.cache_popularity_sample_every = 10  # 访问计数采样率：平均每 N 次读取记录一次
 
         # MySQL 配置
         self.db_host = "localhost"
@@ -232,7 +294,24 @@ class BotConfig:
         self.db_password = ""
         # MySQL 连接池配置
         self.db_min_connections = 5  # 最小连接数
-        self.db_max_connections = 20  # 最大连接数
+        self.db_max_connections = 20  # 最大连接数（所有 MySQL 管理器共用一个连接池）
+        # MySQL 只读副本：权限检查、价格查询、统计报表等只读查询优先路由到副本
+        self.db_replica_hosts = ""  # 逗号分隔的 host[:port]，空表示不使用副本
+        self.db_replica_max_lag = 5  # 复制延迟超过该秒数的副本暂停接收读请求
+        self.db_replica_lag_check_interval = 10  # 副本延迟检查间隔（秒）
+        # 权限快照：管理员和白名单加载到内存，变更通过 Redis pub/sub 通知各实例刷新
+        self.permission_snapshot_enabled = True
+        self.permission_snapshot_refresh_interval = 300  # 定期全量刷新间隔（秒），兜底漏掉的通知
+        # price_history 按月分区：保留期清理改为删除整个分区
+        # 启动时将未分区的 price_history 迁移为按月分区（重建整表并阻塞写入，默认关闭，
+        # 建议用 python -m utils.database_init partition-price-history 单独迁移）
+        self.price_history_partitioning = False
+        self.price_history_partition_months_ahead = 3  # 提前创建未来几个月的分区
+        self.price_history_retention_days = 0  # 价格历史保留天数（按整月删除分区），0 表示永久保留
+        self.price_rollup_interval = 3600  # 每日价格汇总的增量更新间隔（秒），0 表示关闭
+        # 价格历史导出（/exportprices）
+        self.price_export_dir = "data/exports"  # 超过上传上限的导出文件保存目录
+        self.price_export_chunk_size = 5000  # 服务端游标每批读取的行数
 
         # 社交媒体解析配置 (ParseHub)
         self.inline_parse_temp_channel = None  # Inline Parse 临时存储频道 ID
@@ -368,6 +447,22 @@ class ConfigManager:
         def get_int_env(key: str, default: str) -> int:
             return int(os.getenv(key, default))
 
+        # 辅助方法：读取 "name:number,name:number" 格式的映射环境变量
+        def get_int_mapping_env(key: str, default: dict[str, int]) -> dict[str, int]:
+            raw = os.getenv(key)
+            if raw is None:
+                return dict(default)
+            mapping = {}
+            for part in raw.split(","):
+                name, _, value = part.strip().partition(":")
+                if not name:
+                    continue
+                try:
+                    mapping[name.strip()] = int(value)
+                except ValueError:
+                    logger.warning(f"⚠️ {key} 中的无效配置项: {part}")
+            return mapping
+
         # 辅助方法：解析超级管理员ID列表
         def parse_super_admin_ids() -> list[int]:
             """
@@ -477,6 +572,9 @@ class ConfigManager:
         self.config.max_concurrent_requests = get_int_env("MAX_CONCURRENT_REQUESTS", "10")
         self.config.request_timeout = get_int_env("REQUEST_TIMEOUT", "30")
         self.config.max_retries = get_int_env("MAX_RETRIES", "3")
+        self.config.handler_timing_enabled = get_bool_env("HANDLER_TIMING_ENABLED", "True")
+        self.config.handler_slow_threshold_ms = get_int_env("HANDLER_SLOW_THRESHOLD_MS", "3000")
+        self.config.handler_slow_log_size = get_int_env("HANDLER_SLOW_LOG_SIZE", "50")
 
         # 速率限制配置
         self.config.rate_limit_enabled = get_bool_env("RATE_LIMIT_ENABLED", "True")
@@ -511,6 +609,9 @@ class ConfigManager:
             self.config.user_cache_group_ids = [
                 int(gid.strip()) for gid in cache_group_ids_str.split(",") if gid.strip()
             ]
+        self.config.user_cache_seen_granularity = get_int_env("USER_CACHE_SEEN_GRANULARITY", "300")
+        self.config.user_cache_flush_interval = get_int_env("USER_CACHE_FLUSH_INTERVAL", "3")
+        self.config.user_cache_max_tracked = get_int_env("USER_CACHE_MAX_TRACKED", "50000")
 
         # Guest Bot 配置
         self.config.enable_guest_bot = get_bool_env("ENABLE_GUEST_BOT")
@@ -535,6 +636,40 @@ class ConfigManager:
         # Redis 连接池配置
         self.config.redis_max_connections = get_int_env("REDIS_MAX_CONNECTIONS", "50")
         self.config.redis_health_check_interval = get_int_env("REDIS_HEALTH_CHECK_INTERVAL", "30")
+        # 进程内 L1 缓存配置
+        self.config.cache_l1_enabled = get_bool_env("CACHE_L1_ENABLED", "True")
+        self.config.cache_l1_ttl = get_int_env("CACHE_L1_TTL", "60")
+        self.config.cache_l1_subdirectories = get_int_mapping_env(
+            "CACHE_L1_SUBDIRECTORIES", self.config.cache_l1_subdirectories
+        )
+        # Stale-while-revalidate 配置
+        self.config.cache_swr_enabled = get_bool_env("CACHE_SWR_ENABLED", "True")
+        self.config.cache_swr_grace_periods = get_int_mapping_env(
+            "CACHE_SWR_GRACE_PERIODS", self.config.cache_swr_grace_periods
+        )
+        # 缓存值编码配置
+        self.config.cache_codec_enabled = get_bool_env("CACHE_CODEC_ENABLED", "True")
+        self.config.cache_codec_serializer = os.getenv("CACHE_CODEC_SERIALIZER", "json").lower()
+        self.config.cache_codec_compression = os.getenv("CACHE_CODEC_COMPRESSION", "zlib").lower()
+        self.config.cache_compress_threshold = get_int_env("CACHE_COMPRESS_THRESHOLD", "1024")
+        # 缓存防击穿配置
+        self.config.cache_fetch_lock_enabled = get_bool_env("CACHE_FETCH_LOCK_ENABLED", "True")
+        self.config.cache_fetch_lock_lease = get_int_env("CACHE_FETCH_LOCK_LEASE", "30")
+        self.config.cache_fetch_lock_wait = get_int_env("CACHE_FETCH_LOCK_WAIT", "10")
+        self.config.cache_fetch_concurrency = get_int_env("CACHE_FETCH_CONCURRENCY", "4")
+        self.config.cache_db_write_batch_size = get_int_env("CACHE_DB_WRITE_BATCH_SIZE", "100")
+        self.config.cache_db_write_flush_interval = get_int_env("CACHE_DB_WRITE_FLUSH_INTERVAL", "2")
+        self.config.cache_db_write_max_pending = get_int_env("CACHE_DB_WRITE_MAX_PENDING", "1000")
+        # 负缓存配置
+        self.config.cache_negative_ttl = get_int_env("CACHE_NEGATIVE_TTL", "300")
+        self.config.cache_negative_error_ttl = get_int_env("CACHE_NEGATIVE_ERROR_TTL", "30")
+        # 缓存预热配置
+        self.config.cache_warm_enabled = get_bool_env("CACHE_WARM_ENABLED", "True")
+        self.config.cache_warm_top_n = get_int_mapping_env("CACHE_WARM_TOP_N", self.config.cache_warm_top_n)
+        self.config.cache_warm_interval = get_int_env("CACHE_WARM_INTERVAL", "300")
+        self.config.cache_warm_lead_time = get_int_env("CACHE_WARM_LEAD_TIME", "900")
+        self.config.cache_warm_budget = get_int_env("CACHE_WARM_BUDGET", "30")
+        self.config.cache_popularity_sample_every = get_int_env("CACHE_POPULARITY_SAMPLE_EVERY", "10")
 
         # 天气 API 配置
         self.config.qweather_api_key = os.getenv("QWEATHER_API_KEY", "")
@@ -583,6 +718,17 @@ class ConfigManager:
         # MySQL 连接池配置
         self.config.db_min_connections = get_int_env("DB_MIN_CONNECTIONS", "5")
         self.config.db_max_connections = get_int_env("DB_MAX_CONNECTIONS", "20")
+        self.config.db_replica_hosts = os.getenv("DB_REPLICA_HOSTS", "")
+        self.config.db_replica_max_lag = get_int_env("DB_REPLICA_MAX_LAG", "5")
+        self.config.db_replica_lag_check_interval = get_int_env("DB_REPLICA_LAG_CHECK_INTERVAL", "10")
+        self.config.permission_snapshot_enabled = get_bool_env("PERMISSION_SNAPSHOT_ENABLED", "True")
+        self.config.permission_snapshot_refresh_interval = get_int_env("PERMISSION_SNAPSHOT_REFRESH_INTERVAL", "300")
+        self.config.price_history_partitioning = get_bool_env("PRICE_HISTORY_PARTITIONING", "False")
+        self.config.price_history_partition_months_ahead = get_int_env("PRICE_HISTORY_PARTITION_MONTHS_AHEAD", "3")
+        self.config.price_history_retention_days = get_int_env("PRICE_HISTORY_RETENTION_DAYS", "0")
+        self.config.price_rollup_interval = get_int_env("PRICE_ROLLUP_INTERVAL", "3600")
+        self.config.price_export_dir = os.getenv("PRICE_EXPORT_DIR", "data/exports")
+        self.config.price_export_chunk_size = get_int_env("PRICE_EXPORT_CHUNK_SIZE", "5000")
 
         # 社交媒体解析配置 (ParseHub)
         self.config.inline_parse_temp_channel = get_int_env("INLINE_PARSE_TEMP_CHANNEL", "0") or None
@@ -94,6 +94,17 @@ async def check_and_init_database(config) -> bool:
             else:
                 logger.info("✅ 数据库已初始化")
 
+            # 增量迁移（已有数据库也需要执行）
+            await ensure_price_latest_table(cursor, config.db_name)
+            await ensure_price_rollup_table(cursor)
+            # 分区迁移会重建整张表并阻塞写入，默认不在启动时执行（见 migrate_price_history_partitioning）
+            if config.price_history_partitioning:
+                try:
+                    await ensure_price_history_partitioning(cursor, config)
+                except Exception as e:
+                    logger.error(f"❌ price_history 分区迁移失败，继续使用未分区表: {e}")
+            await conn.commit()
+
         conn.close()
         return True
 
@@ -102,6 +113,219 @@ async def check_and_init_database(config) -> bool:
         return False
 
 
+async def ensure_price_latest_table(cursor, db_name: str):
+    """
+    确保最新价格表 price_latest 和商品静态元数据表 price_item_metadata 存在
+
+    price_latest 首次创建时从 price_history 回填每个 (service, item_id, country_code) 的最新记录
+    """
+    await cursor.execute(
+        "SELECT TABLE_NAME FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ('price_history', 'price_latest', 'price_item_metadata')",
+        (db_name,),
+    )
+    existing = {row[0] for row in await cursor.fetchall()}
+
+    if "price_item_metadata" not in existing:
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS price_item_metadata (
+                service VARCHAR(50) NOT NULL COMMENT '服务名称',
+                item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
+                metadata JSON COMMENT '静态元数据（JSON格式）',
+                metadata_hash CHAR(32) COMMENT '元数据哈希',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+                PRIMARY KEY (service, item_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='商品静态元数据表'
+        """)
+        logger.info("✅ price_item_metadata 创建完成")
+
+    if "price_latest" in existing:
+        await ensure_price_latest_change_columns(cursor, db_name)
+        return
+
+    logger.info("正在创建最新价格表 price_latest...")
+    await cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_latest (
+            service VARCHAR(50) NOT NULL COMMENT '服务名称',
+            item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
+            country_code VARCHAR(10) NOT NULL COMMENT '国家代码',
+            item_name VARCHAR(500) COMMENT '商品名称',
+            currency VARCHAR(10) COMMENT '货币代码',
+            original_price DECIMAL(10, 2) COMMENT '原价',
+            current_price DECIMAL(10, 2) COMMENT '当前价格',
+            discount_percent INT DEFAULT 0 COMMENT '折扣百分比',
+            price_cny DECIMAL(10, 2) COMMENT 'CNY等值价格',
+            extra_data JSON COMMENT '额外数据（JSON格式）',
+            content_hash CHAR(32) COMMENT '价格字段哈希，用于变化检测',
+            recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '价格变为当前值的时间',
+            last_seen_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '最近一次确认价格的时间',
+            PRIMARY KEY (service, item_id, country_code),
+            INDEX idx_service_last_seen_at (service, last_seen_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='最新价格表'
+    """)
+
+    if "price_history" in existing:
+        await cursor.execute("""
+            INSERT IGNORE INTO price_latest (
+                service, item_id, country_code, item_name,
+                currency, original_price, current_price,
+                discount_percent, price_cny, extra_data, recorded_at, last_seen_at
+            )
+            SELECT
+                ph.service, ph.item_id, ph.country_code, ph.item_name,
+                ph.currency, ph.original_price, ph.current_price,
+                ph.discount_percent, ph.price_cny, ph.extra_data, ph.recorded_at, ph.recorded_at
+            FROM price_history ph
+            INNER JOIN (
+                SELECT service, item_id, country_code, MAX(recorded_at) as max_at
+                FROM price_history
+                GROUP BY service, item_id, country_code
+            ) latest ON ph.service = latest.service
+                AND ph.item_id = latest.item_id
+                AND ph.country_code = latest.country_code
+                AND ph.recorded_at = latest.max_at
+        """)
+        logger.info(f"✅ price_latest 已从 price_history 回填 {cursor.rowcount} 条记录")
+    else:
+        logger.info("✅ price_latest 创建完成")
+
+
+async def ensure_price_rollup_table(cursor):
+    """确保每日价格汇总表 price_daily_rollup 存在（数据由定时任务回填）"""
+    await cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_daily_rollup (
+            service VARCHAR(50) NOT NULL COMMENT '服务名称',
+            item_id VARCHAR(255) NOT NULL COMMENT '商品ID',
+            country_code VARCHAR(10) NOT NULL COMMENT '国家代码',
+            day DATE NOT NULL COMMENT '日期',
+            item_name VARCHAR(500) COMMENT '商品名称',
+            currency VARCHAR(10) COMMENT '货币代码',
+            min_price DECIMAL(10, 2) COMMENT '当天最低价',
+            max_price DECIMAL(10, 2) COMMENT '当天最高价',
+            avg_price DECIMAL(10, 2) COMMENT '当天平均价（按价格持续时间加权）',
+            last_price DECIMAL(10, 2) COMMENT '当天最后一次记录的价格',
+            last_original_price DECIMAL(10, 2) COMMENT '当天最后一次记录的原价',
+            last_discount_percent INT COMMENT '当天最后一次记录的折扣百分比',
+            last_price_cny DECIMAL(10, 2) COMMENT '当天最后一次记录的CNY等值价格',
+            sample_count INT NOT NULL DEFAULT 0 COMMENT '当天价格变化次数（0 表示沿用前一天的价格）',
+            first_recorded_at TIMESTAMP NULL COMMENT '当天价格覆盖区间的起点',
+            last_recorded_at TIMESTAMP NULL COMMENT '当天价格覆盖区间的终点',
+            PRIMARY KEY (service, item_id, country_code, day),
+            INDEX idx_day (day)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='每日价格汇总表'
+    """)
+
+
+async def ensure_price_latest_change_columns(cursor, db_name: str):
+    """为早期创建的 price_latest 补充变化检测列（content_hash / last_seen_at）"""
+    await cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'price_latest'",
+        (db_name,),
+    )
+    columns = {row[0] for row in await cursor.fetchall()}
+    if "last_seen_at" in columns:
+        return
+
+    logger.info("正在为 price_latest 添加变化检测列...")
+    await cursor.execute(
+        "ALTER TABLE price_latest "
+        "ADD COLUMN content_hash CHAR(32) COMMENT '价格字段哈希，用于变化检测' AFTER extra_data, "
+        "ADD COLUMN last_seen_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP "
+        "COMMENT '最近一次确认价格的时间' AFTER recorded_at, "
+        "DROP INDEX idx_service_recorded_at, "
+        "ADD INDEX idx_service_last_seen_at (service, last_seen_at)"
+    )
+    await cursor.execute("UPDATE price_latest SET last_seen_at = recorded_at")
+    logger.info("✅ price_latest 变化检测列添加完成")
+
+
+async def ensure_price_history_partitioning(cursor, config):
+    """
+    将未分区的 price_history 迁移为按月范围分区
+
+    分区覆盖最早记录所在月到未来 price_history_partition_months_ahead 个月，
+    迁移会重建整张表（期间阻塞写入），只在检测到未分区时执行
+
+    Returns:
+        是否执行了迁移
+    """
+    from utils.price_history_manager import (
+        MAXVALUE_PARTITION,
+        add_months,
+        month_partition_definition,
+        month_start,
+    )
+
+    await cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'price_history'",
+        (config.db_name,),
+    )
+    if not (await cursor.fetchone())[0]:
+        return False  # 表不存在
+
+    await cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'price_history' AND PARTITION_NAME IS NOT NULL",
+        (config.db_name,),
+    )
+    if (await cursor.fetchone())[0]:
+        return False  # 已分区
+
+    await cursor.execute("SELECT MIN(recorded_at), NOW() FROM price_history")
+    earliest, now = await cursor.fetchone()
+    current = month_start(now)
+    month = month_start(earliest) if earliest else current
+    target = add_months(current, config.price_history_partition_months_ahead)
+
+    definitions = []
+    while month <= target:
+        definitions.append(month_partition_definition(month))
+        month = add_months(month, 1)
+    definitions.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE")
+
+    logger.info(f"正在将 price_history 迁移为按月分区（{len(definitions) - 1} 个月分区），大表可能需要较长时间...")
+    # 分区列必须包含在主键中，主键调整与分区在同一条语句中完成，只重建一次表
+    await cursor.execute(
+        "ALTER TABLE price_history "
+        "MODIFY recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '记录时间', "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, recorded_at) "
+        f"PARTITION BY RANGE (UNIX_TIMESTAMP(recorded_at)) ({', '.join(definitions)})"
+    )
+    logger.info("✅ price_history 分区迁移完成")
+    return True
+
+
+async def migrate_price_history_partitioning(config) -> bool:
+    """
+    一次性执行 price_history 分区迁移（在机器人之外运行）
+
+        python -m utils.database_init partition-price-history
+
+    Returns:
+        是否执行了迁移
+    """
+    conn = await aiomysql.connect(
+        host=config.db_host,
+        port=config.db_port,
+        user=config.db_user,
+        password=config.db_password,
+        db=config.db_name,
+        charset="utf8mb4",
+    )
+    try:
+        async with conn.cursor() as cursor:
+            migrated = await ensure_price_history_partitioning(cursor, config)
+        await conn.commit()
+    finally:
+        conn.close()
+
+    if not migrated:
+        logger.info("price_history 已分区或不存在，无需迁移")
+    return migrated
+
+
 async def create_basic_tables(cursor):
     """创建基本的数据库表"""
     # 用户表
@@ -161,3 +385,16 @@ async def create_basic_tables(cursor):
     """)
 
     logger.info("✅ 基本数据库表创建完成")
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    from utils.config_manager import get_config
+
+    if sys.argv[1:] != ["partition-price-history"]:
+        sys.exit("用法: python -m utils.database_init partition-price-history")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    asyncio.run(migrate_price_history_partitioning(get_config()))
@@ -0,0 +1,228 @@
+"""
+命令处理耗时统计
+- 每次处理开始时在 contextvar 中建立一条追踪，权限检查、缓存读写、上游 HTTP、Telegram 发送
+  各自把耗时累加到当前追踪；嵌套的阶段只计最外层（如 Telegram 请求内部的 httpx 调用）
+- 按处理器记录总耗时和各阶段耗时的直方图（p50/p95/p99）
+- 总耗时超过阈值时输出一条带分解的结构化慢日志，并保留最近若干条供 /handlerstats 查看
+"""
+
+import functools
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from utils.metrics import MetricsRegistry
+
+
+logger = logging.getLogger(__name__)
+
+# 单独计时的阶段，未覆盖的部分（解析、格式化、数据库等）计入 other
+PHASES = ("permission", "cache", "http", "telegram")
+
+
+class HandlerTrace:
+    """一次处理过程中各阶段的累计耗时"""
+
+    __slots__ = ("name", "started", "phases", "calls", "finished")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)  # 毫秒；并发的请求会叠加
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.finished = False
+
+
+_current_trace: ContextVar[HandlerTrace | None] = ContextVar("handler_trace", default=None)
+_active_phase: ContextVar[str | None] = ContextVar("handler_active_phase", default=None)
+
+
+def add_phase_time(phase: str, elapsed_ms: float):
+    """把耗时累加到当前处理的追踪（不在处理过程中时忽略）"""
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        return
+    trace.phases[phase] += elapsed_ms
+    trace.calls[phase] += 1
+
+
+@contextmanager
+def measure_phase(phase: str):
+    """统计代码块耗时并计入当前处理的指定阶段"""
+    trace = _current_trace.get()
+    if trace is None or trace.finished or _active_phase.get() is not None:
+        yield
+        return
+
+    token = _active_phase.set(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _active_phase.reset(token)
+        add_phase_time(phase, (time.perf_counter() - started) * 1000)
+
+
+def timed_phase(phase: str):
+    """异步函数装饰器版本的 measure_phase"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with measure_phase(phase):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class HandlerTimingStats:
+    """按处理器聚合的耗时直方图与慢日志"""
+
+    def __init__(self, enabled: bool = True, slow_threshold_ms: int = 3000, slow_log_size: int = 50):
+        self.enabled = enabled
+        self.slow_threshold_ms = slow_threshold_ms
+        self.metrics = MetricsRegistry()
+        self.slow_log: deque[dict] = deque(maxlen=max(1, slow_log_size))
+
+    def configure(self, enabled: bool, slow_threshold_ms: int, slow_log_size: int):
+        self.enabled = enabled
+        self.slow_threshold_ms = slow_threshold_ms
+        if self.slow_log.maxlen != max(1, slow_log_size):
+            self.slow_log = deque(self.slow_log, maxlen=max(1, slow_log_size))
+
+    def record(self, trace: HandlerTrace, total_ms: float, error: bool = False, chat_id=None, user_id=None):
+        """
+        记录一次处理
+
+        阶段直方图只统计实际发生过该阶段的处理，调用次数见 <阶段>_calls 计数
+        """
+        group = trace.name
+        self.metrics.incr(group, "calls")
+        if error:
+            self.metrics.incr(group, "errors")
+        self.metrics.observe(group, "total_ms", total_ms)
+
+        for phase in PHASES:
+            if trace.calls[phase]:
+                self.metrics.incr(group, f"{phase}_calls", trace.calls[phase])
+                self.metrics.observe(group, f"{phase}_ms", trace.phases[phase])
+        other_ms = max(total_ms - sum(trace.phases.values()), 0.0)
+        self.metrics.observe(group, "other_ms", other_ms)
+
+        if self.slow_threshold_ms and total_ms >= self.slow_threshold_ms:
+            self.metrics.incr(group, "slow")
+            entry = {
+                "handler": group,
+                "at": time.time(),
+                "total_ms": round(total_ms, 1),
+                "breakdown_ms": {phase: round(trace.phases[phase], 1) for phase in PHASES},
+                "other_ms": round(other_ms, 1),
+                "calls": {phase: count for phase, count in trace.calls.items() if count},
+                "error": error,
+                "chat_id": chat_id,
+                "user_id": user_id,
+            }
+            self.slow_log.append(entry)
+            logger.warning(f"🐢 慢处理 {group}: {json.dumps(entry, ensure_ascii=False)}")
+
+    def snapshot(self) -> dict:
+        snapshot = self.metrics.snapshot()
+        snapshot["slow_threshold_ms"] = self.slow_threshold_ms
+        snapshot["slow_log"] = list(self.slow_log)
+        return snapshot
+
+    def reset(self):
+        self.metrics.reset()
+        self.slow_log.clear()
+
+
+# 全局统计实例
+handler_timing = HandlerTimingStats()
+
+
+def with_timing(name: str):
+    """
+    处理耗时统计装饰器（应作为最外层装饰器，覆盖权限检查）
+
+    Args:
+        name: 统计分组名，如命令名
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(update, context, *args, **kwargs):
+            # 嵌套调用（如处理器内部转调其他命令）计入外层
+            if not handler_timing.enabled or _current_trace.get() is not None:
+                return await func(update, context, *args, **kwargs)
+
+            trace = HandlerTrace(name)
+            token = _current_trace.set(trace)
+            error = False
+            try:
+                return await func(update, context, *args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                # 处理器派生的后台任务继承了追踪，结束后不再计入
+                trace.finished = True
+                _current_trace.reset(token)
+                handler_timing.record(
+                    trace,
+                    (time.perf_counter() - trace.started) * 1000,
+                    error,
+                    chat_id=update.effective_chat.id if getattr(update, "effective_chat", None) else None,
+                    user_id=update.effective_user.id if getattr(update, "effective_user", None) else None,
+                )
+
+        return wrapper
+
+    return decorator
+
+
+_patches_installed = False
+
+
+def install_timing_patches():
+    """
+    为上游 HTTP 和 Telegram 请求安装计时补丁
+
+    所有 httpx.AsyncClient 请求计入 http 阶段；Bot API 调用在 telegram.request.BaseRequest
+    层计入 telegram 阶段（其内部的 httpx 请求属于嵌套阶段，不重复计入 http）
+    """
+    global _patches_installed
+    if _patches_installed:
+        return
+
+    import httpx
+    from telegram.request import BaseRequest
+
+    original_send = httpx.AsyncClient.send
+    original_post = BaseRequest.post
+    original_retrieve = BaseRequest.retrieve
+
+    @functools.wraps(original_send)
+    async def timed_send(self, request, **kwargs):
+        with measure_phase("http"):
+            return await original_send(self, request, **kwargs)
+
+    @functools.wraps(original_post)
+    async def timed_post(self, *args, **kwargs):
+        with measure_phase("telegram"):
+            return await original_post(self, *args, **kwargs)
+
+    @functools.wraps(original_retrieve)
+    async def timed_retrieve(self, *args, **kwargs):
+        with measure_phase("telegram"):
+            return await original_retrieve(self, *args, **kwargs)
+
+    httpx.AsyncClient.send = timed_send
+    BaseRequest.post = timed_post
+    BaseRequest.retrieve = timed_retrieve
+    _patches_installed = True
+    logger.info("✅ 处理耗时统计补丁已安装（HTTP / Telegram）")
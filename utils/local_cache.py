@@ -0,0 +1,165 @@
+"""
+进程内 L1 缓存
+位于 RedisCacheManager 之前，保存热点对象的 marshal 序列化结果，省去 Redis 往返和解压；
+每次读取还原出独立的对象，调用方修改返回值不会影响其他读取方
+"""
+
+import logging
+import marshal
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+# 未配置子目录时使用的键名
+ROOT_SUBDIRECTORY = "_root"
+
+
+class LocalCache:
+    """按子目录分桶的 LRU + TTL 缓存（仅用于只读的热点数据）"""
+
+    def __init__(self, subdirectory_limits: dict[str, int], default_ttl: int = 60):
+        """
+        初始化 L1 缓存
+
+        Args:
+            subdirectory_limits: {子目录: 最大条目数}，只有列出的子目录会进入 L1
+            default_ttl: 条目在 L1 中的最长存活时间（秒）
+        """
+        self.subdirectory_limits = dict(subdirectory_limits)
+        self.default_ttl = default_ttl
+        self._buckets: dict[str, OrderedDict] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def _bucket_name(subdirectory: str | None) -> str:
+        return subdirectory or ROOT_SUBDIRECTORY
+
+    def is_enabled_for(self, subdirectory: str | None) -> bool:
+        """检查子目录是否启用了 L1"""
+        return self._bucket_name(subdirectory) in self.subdirectory_limits
+
+    def _get_stats(self, bucket_name: str) -> dict[str, int]:
+        stats = self._stats.get(bucket_name)
+        if stats is None:
+            stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+            self._stats[bucket_name] = stats
+        return stats
+
+    def get(self, key: str, subdirectory: str | None = None) -> tuple[float, Any] | None:
+        """
+        读取条目，每次返回新还原的对象
+
+        Returns:
+            (缓存时间戳, 数据) 或 None
+        """
+        bucket_name = self._bucket_name(subdirectory)
+        if bucket_name not in self.subdirectory_limits:
+            return None
+
+        stats = self._get_stats(bucket_name)
+        bucket = self._buckets.get(bucket_name)
+        entry = bucket.get(key) if bucket else None
+        if entry is None:
+            stats["misses"] += 1
+            return None
+
+        expires_at, timestamp, data = entry
+        if expires_at <= time.monotonic():
+            del bucket[key]
+            stats["misses"] += 1
+            return None
+
+        bucket.move_to_end(key)
+        stats["hits"] += 1
+        return timestamp, marshal.loads(data)
+
+    def set(self, key: str, data: Any, timestamp: float, subdirectory: str | None = None, ttl: int | None = None):
+        """写入条目，超过子目录上限时淘汰最久未使用的条目；无法 marshal 的数据不进入 L1"""
+        bucket_name = self._bucket_name(subdirectory)
+        limit = self.subdirectory_limits.get(bucket_name)
+        if not limit:
+            return
+
+        l1_ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if l1_ttl <= 0:
+            return
+
+        try:
+            encoded = marshal.dumps(data)
+        except ValueError:
+            logger.debug(f"L1 跳过无法序列化的条目: {bucket_name}/{key}")
+            self._buckets.get(bucket_name, {}).pop(key, None)
+            return
+
+        bucket = self._buckets.setdefault(bucket_name, OrderedDict())
+        bucket[key] = (time.monotonic() + l1_ttl, timestamp, encoded)
+        bucket.move_to_end(key)
+
+        while len(bucket) > limit:
+            bucket.popitem(last=False)
+            self._get_stats(bucket_name)["evictions"] += 1
+
+    def invalidate(self, key: str | None = None, key_prefix: str | None = None, subdirectory: str | None = None) -> int:
+        """
+        失效条目，语义与 RedisCacheManager.clear_cache 一致
+
+        Returns:
+            被移除的条目数
+        """
+        removed = 0
+
+        if key is not None:
+            bucket_name = self._bucket_name(subdirectory)
+            bucket = self._buckets.get(bucket_name)
+            if bucket and bucket.pop(key, None) is not None:
+                removed = 1
+            if removed:
+                self._get_stats(bucket_name)["invalidations"] += removed
+            return removed
+
+        if subdirectory is None and key_prefix is None:
+            # 清除全部
+            for bucket_name, bucket in self._buckets.items():
+                if bucket:
+                    self._get_stats(bucket_name)["invalidations"] += len(bucket)
+                    removed += len(bucket)
+                    bucket.clear()
+            return removed
+
+        bucket_name = self._bucket_name(subdirectory)
+        bucket = self._buckets.get(bucket_name)
+        if not bucket:
+            return 0
+
+        if key_prefix is None:
+            removed = len(bucket)
+            bucket.clear()
+        else:
+            for cached_key in [k for k in bucket if k.startswith(key_prefix)]:
+                del bucket[cached_key]
+                removed += 1
+
+        if removed:
+            self._get_stats(bucket_name)["invalidations"] += removed
+        return removed
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """获取每个子目录的命中统计"""
+        result = {}
+        for bucket_name, limit in self.subdirectory_limits.items():
+            stats = self._get_stats(bucket_name)
+            lookups = stats["hits"] + stats["misses"]
+            result[bucket_name] = {
+                **stats,
+                "size": len(self._buckets.get(bucket_name, ())),
+                "limit": limit,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+        return result
+
+    def reset_stats(self):
+        """重置统计计数"""
+        self._stats.clear()
@@ -0,0 +1,112 @@
+"""
+进程内指标
+- Histogram: 固定分桶直方图，记录次数/总和/最大值，按桶估算分位数
+- MetricsRegistry: 按分组（如缓存子目录）聚合计数器和直方图，可导出为 JSON 快照
+"""
+
+import bisect
+import time
+from typing import Any
+
+
+# 延迟分桶（毫秒）
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# 大小分桶（字节）
+SIZE_BUCKETS_BYTES = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """固定分桶直方图"""
+
+    __slots__ = ("bounds", "buckets", "count", "total", "max")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # 最后一个桶收集超过上限的值
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> float:
+        """按桶上界估算分位数（p 取 0-100）"""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                # 桶上界可能超过实际最大值
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": round(self.max, 3),
+        }
+
+
+class MetricsRegistry:
+    """按分组聚合的计数器与直方图"""
+
+    def __init__(self):
+        self._counters: dict[str, dict[str, int]] = {}
+        self._histograms: dict[str, dict[str, Histogram]] = {}
+        self.started_at = time.time()
+
+    def incr(self, group: str, name: str, amount: int = 1):
+        counters = self._counters.get(group)
+        if counters is None:
+            counters = self._counters[group] = {}
+        counters[name] = counters.get(name, 0) + amount
+
+    def observe(self, group: str, name: str, value: float, bounds: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        histograms = self._histograms.get(group)
+        if histograms is None:
+            histograms = self._histograms[group] = {}
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(bounds)
+        histogram.observe(value)
+
+    def get_counters(self, group: str) -> dict[str, int]:
+        return dict(self._counters.get(group, {}))
+
+    def get_histogram(self, group: str, name: str) -> Histogram | None:
+        return self._histograms.get(group, {}).get(name)
+
+    def groups(self) -> list[str]:
+        return sorted(set(self._counters) | set(self._histograms))
+
+    def snapshot(self) -> dict[str, Any]:
+        """导出 JSON 可序列化的快照"""
+        return {
+            "started_at": self.started_at,
+            "generated_at": time.time(),
+            "groups": {
+                group: {
+                    "counters": self.get_counters(group),
+                    "histograms": {
+                        name: histogram.snapshot() for name, histogram in self._histograms.get(group, {}).items()
+                    },
+                }
+                for group in self.groups()
+            },
+        }
+
+    def reset(self):
+        self._counters.clear()
+        self._histograms.clear()
+        self.started_at = time.time()
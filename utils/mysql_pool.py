@@ -0,0 +1,291 @@
+"""
+共享 MySQL 连接池
+- 所有 MySQL 管理器共用一个主库连接池，连接数不再随管理器数量成倍增加
+- 可配置一个或多个只读副本，只读查询按轮询分发到复制延迟在阈值内的副本，
+  副本不可用或延迟过大时回退到主库
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from aiomysql import DictCursor, create_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_replica_hosts(value: str, default_port: int = 3306) -> list[tuple[str, int]]:
+    """
+    解析副本地址列表
+
+    Args:
+        value: 逗号分隔的 host[:port]，如 "replica1,replica2:3307"
+        default_port: 未写端口时使用的端口
+
+    Returns:
+        [(host, port)]
+    """
+    hosts = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":") if ":" in item else (item, "", "")
+        try:
+            hosts.append((host, int(port) if port else default_port))
+        except ValueError:
+            logger.warning(f"忽略无效的副本地址: {item}")
+    return hosts
+
+
+class _Replica:
+    """只读副本及其健康状态"""
+
+    __slots__ = ("host", "port", "pool", "lag", "healthy", "last_error")
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.pool = None
+        self.lag: float | None = None  # 最近一次测得的复制延迟（秒）
+        self.healthy = False  # 首次检查通过前不接收读请求
+        self.last_error: str | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class MySQLPoolManager:
+    """主库连接池 + 只读副本路由"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        minsize: int = 5,
+        maxsize: int = 20,
+        replica_hosts: list[tuple[str, int]] | None = None,
+        max_replica_lag: int = 5,
+        lag_check_interval: int = 10,
+    ):
+        """
+        Args:
+            host/port/database/user/password: 主库连接参数（副本使用相同的库名和账号）
+            minsize/maxsize: 每个连接池的连接数范围
+            replica_hosts: 只读副本 [(host, port)]
+            max_replica_lag: 复制延迟超过该秒数的副本不再接收读请求
+            lag_check_interval: 副本延迟检查间隔（秒）
+        """
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.max_replica_lag = max_replica_lag
+        self.lag_check_interval = max(1, lag_check_interval)
+        self.replicas = [_Replica(h, p) for h, p in replica_hosts or []]
+        self.pool = None
+        self._connected = False
+        self._next_replica = 0
+        self._lag_task: asyncio.Task | None = None
+        self._read_stats = {"replica": 0, "primary_fallback": 0}
+
+    @classmethod
+    def from_config(cls, config) -> "MySQLPoolManager":
+        """按 BotConfig 创建"""
+        return cls(
+            host=config.db_host,
+            port=config.db_port,
+            database=config.db_name,
+            user=config.db_user,
+            password=config.db_password,
+            minsize=config.db_min_connections,
+            maxsize=config.db_max_connections,
+            replica_hosts=parse_replica_hosts(config.db_replica_hosts, config.db_port),
+            max_replica_lag=config.db_replica_max_lag,
+            lag_check_interval=config.db_replica_lag_check_interval,
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    async def _create_pool(self, host: str, port: int, minsize: int):
+        return await create_pool(
+            host=host,
+            port=port,
+            user=self.user,
+            password=self.password,
+            db=self.database,
+            charset="utf8mb4",
+            autocommit=True,
+            minsize=minsize,
+            maxsize=self.maxsize,
+            echo=False,
+            cursorclass=DictCursor,
+        )
+
+    async def connect(self):
+        """创建主库和副本连接池（副本连接失败只记录日志，读请求回退到主库）"""
+        if self._connected:
+            return
+
+        self.pool = await self._create_pool(self.host, self.port, self.minsize)
+        self._connected = True
+        logger.info("✅ MySQL 共享连接池创建成功")
+
+        for replica in self.replicas:
+            try:
+                # 副本池按需建立连接，避免空闲时占满副本的连接数
+                replica.pool = await self._create_pool(replica.host, replica.port, 0)
+                logger.info(f"✅ MySQL 只读副本已连接: {replica.name}")
+            except Exception as e:
+                replica.last_error = str(e)
+                logger.error(f"❌ MySQL 只读副本连接失败 {replica.name}: {e}")
+
+        if any(replica.pool for replica in self.replicas):
+            await self.check_replicas()
+            self._lag_task = asyncio.create_task(self._lag_check_loop())
+
+    async def close(self):
+        """关闭所有连接池"""
+        if self._lag_task:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+        for replica in self.replicas:
+            if replica.pool:
+                replica.pool.close()
+                await replica.pool.wait_closed()
+                replica.pool = None
+                replica.healthy = False
+
+        if self.pool:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self._connected = False
+            logger.info("MySQL 共享连接池已关闭")
+
+    async def _measure_lag(self, replica: _Replica) -> float | None:
+        """查询副本复制延迟（秒），复制线程未运行时返回 None"""
+        async with replica.pool.acquire() as conn, conn.cursor(DictCursor) as cursor:
+            try:
+                await cursor.execute("SHOW REPLICA STATUS")
+            except Exception:
+                # MySQL 8.0.22 之前的版本
+                await cursor.execute("SHOW SLAVE STATUS")
+            status = await cursor.fetchone()
+
+        if not status:
+            # 未配置复制（例如云数据库的只读代理端点），视为无延迟
+            return 0.0
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    async def check_replicas(self):
+        """检查所有副本的复制延迟并更新可用状态"""
+        for replica in self.replicas:
+            if not replica.pool:
+                continue
+            was_healthy = replica.healthy
+            try:
+                replica.lag = await self._measure_lag(replica)
+                replica.last_error = None if replica.lag is not None else "复制线程未运行"
+                replica.healthy = replica.lag is not None and replica.lag <= self.max_replica_lag
+            except Exception as e:
+                replica.lag = None
+                replica.last_error = str(e)
+                replica.healthy = False
+
+            if was_healthy and not replica.healthy:
+                logger.warning(
+                    f"⚠️ MySQL 副本 {replica.name} 暂停接收读请求: "
+                    f"延迟={replica.lag}, 错误={replica.last_error}"
+                )
+            elif replica.healthy and not was_healthy:
+                logger.info(f"✅ MySQL 副本 {replica.name} 恢复接收读请求，延迟={replica.lag}s")
+
+    async def _lag_check_loop(self):
+        while True:
+            await asyncio.sleep(self.lag_check_interval)
+            try:
+                await self.check_replicas()
+            except Exception as e:
+                logger.error(f"检查 MySQL 副本延迟失败: {e}")
+
+    def _pick_replica(self) -> _Replica | None:
+        """轮询选择一个可用副本"""
+        count = len(self.replicas)
+        for offset in range(count):
+            replica = self.replicas[(self._next_replica + offset) % count]
+            if replica.healthy and replica.pool:
+                self._next_replica = (self._next_replica + offset + 1) % count
+                return replica
+        return None
+
+    @asynccontextmanager
+    async def acquire(self, readonly: bool = False):
+        """
+        获取连接
+
+        Args:
+            readonly: 只读查询，可路由到副本（可容忍不超过 max_replica_lag 秒的延迟）
+        """
+        replica = self._pick_replica() if readonly and self.replicas else None
+        if replica:
+            try:
+                conn = await replica.pool.acquire()
+            except Exception as e:
+                replica.healthy = False
+                replica.last_error = str(e)
+                logger.warning(f"⚠️ MySQL 副本 {replica.name} 获取连接失败，回退到主库: {e}")
+            else:
+                self._read_stats["replica"] += 1
+                try:
+                    yield conn
+                finally:
+                    replica.pool.release(conn)
+                return
+
+        if readonly and self.replicas:
+            self._read_stats["primary_fallback"] += 1
+        async with self.pool.acquire() as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def read_cursor(self):
+        """只读查询游标（优先使用副本）"""
+        async with self.acquire(readonly=True) as conn, conn.cursor(DictCursor) as cursor:
+            yield cursor
+
+    def get_status(self) -> dict:
+        """连接池与副本状态（用于诊断）"""
+        return {
+            "primary": {
+                "size": self.pool.size if self.pool else 0,
+                "freesize": self.pool.freesize if self.pool else 0,
+                "maxsize": self.maxsize,
+            },
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag": replica.lag,
+                    "size": replica.pool.size if replica.pool else 0,
+                    "error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+            "reads": dict(self._read_stats),
+        }
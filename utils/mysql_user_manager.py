@@ -3,51 +3,110 @@ MySQL 用户管理器
 保持与现有 UserCacheManager 相同的接口，底层改用 MySQL
 """
 
+import asyncio
+import json
 import logging
+import time
+import uuid
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 
-from aiomysql import DictCursor, create_pool
+from aiomysql import DictCursor
+
+from utils.mysql_pool import MySQLPoolManager
+from utils.permission_snapshot import PermissionSnapshot
+from utils.write_behind import WriteBehindBuffer
 
 
 logger = logging.getLogger(__name__)
 
+# 权限变更通知频道，收到后各实例重新加载权限快照
+PERMISSION_INVALIDATION_CHANNEL = "pubsub:permissions:invalidate"
+
+# 用户资料批量写入：每条语句最多包含的用户数
+USER_UPSERT_BATCH_SIZE = 500
+
+# 一次查询加载全部权限集合
+_LOAD_PERMISSIONS_SQL = """
+    SELECT 'admin' AS kind, user_id AS id FROM admin_permissions
+    UNION ALL SELECT 'super_admin', user_id FROM super_admins
+    UNION ALL SELECT 'user', user_id FROM user_whitelist
+    UNION ALL SELECT 'group', group_id FROM group_whitelist
+"""
+
 
 class MySQLUserManager:
     """MySQL 用户管理器"""
 
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
-        """初始化 MySQL 连接参数"""
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        pool_manager: MySQLPoolManager | None = None,
+    ):
+        """
+        初始化 MySQL 连接参数
+
+        Args:
+            pool_manager: 共享连接池（未提供时按连接参数自行创建）
+        """
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
+        self.pool_manager = pool_manager
+        self._owns_pool = pool_manager is None
         self.pool = None
         self._connected = False
+        # 权限快照（启用同步后权限检查只查内存）
+        self.permissions = PermissionSnapshot()
+        self._permission_lock = asyncio.Lock()
+        self._permission_tasks: list[asyncio.Task] = []
+        self._redis_client = None
+        self._instance_id = uuid.uuid4().hex
+        # 群消息用户资料合并写入：{user_id: ((username, first_name, last_name), 上次写入的 monotonic 时间)}
+        self._user_seen: OrderedDict[int, tuple[tuple, float]] = OrderedDict()
+        self._user_write_buffer: WriteBehindBuffer | None = None
+        self._user_seen_granularity = 300
+        self._user_max_tracked = 50000
 
     async def connect(self):
-        """创建连接池"""
+        """连接共享连接池"""
         try:
-            # 获取连接池配置
+            if self._owns_pool:
+                from utils.config_manager import get_config
+
+                config = get_config()
+                self.pool_manager = MySQLPoolManager(
+                    host=self.host,
+                    port=self.port,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password,
+                    minsize=config.db_min_connections,
+                    maxsize=config.db_max_connections,
+                )
+            await self.pool_manager.connect()
+            self.pool = self.pool_manager.pool
+            self._connected = True
+            logger.info("✅ MySQL 连接池创建成功")
+
             from utils.config_manager import get_config
 
             config = get_config()
-
-            self.pool = await create_pool(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                db=self.database,
-                charset="utf8mb4",
-                autocommit=True,
-                minsize=config.db_min_connections,
-                maxsize=config.db_max_connections,
-                echo=False,
-                cursorclass=DictCursor,
+            self._user_seen_granularity = config.user_cache_seen_granularity
+            self._user_max_tracked = config.user_cache_max_tracked
+            self._user_write_buffer = WriteBehindBuffer(
+                self._flush_user_upserts,
+                name="user-cache",
+                batch_size=USER_UPSERT_BATCH_SIZE,
+                flush_interval=config.user_cache_flush_interval,
+                max_pending=USER_UPSERT_BATCH_SIZE * 10,
             )
-            self._connected = True
-            logger.info("✅ MySQL 连接池创建成功")
 
             # 初始化超级管理员（如果配置了）
             await self._init_super_admin()
@@ -57,10 +116,13 @@ class MySQLUserManager:
             raise
 
     async def close(self):
-        """关闭连接池"""
-        if self.pool:
-            self.pool.close()
-            await self.pool.wait_closed()
+        """关闭连接池（共享连接池由创建方关闭）"""
+        await self.stop_permission_sync()
+        if self._user_write_buffer:
+            await self._user_write_buffer.close(timeout=10)
+        if self.pool_manager and self._owns_pool:
+            await self.pool_manager.close()
+        if self._connected:
             self._connected = False
             logger.info("MySQL 连接池已关闭")
 
@@ -70,6 +132,112 @@ class MySQLUserManager:
         async with self.pool.acquire() as conn, conn.cursor(DictCursor) as cursor:
             yield cursor
 
+    @asynccontextmanager
+    async def get_read_cursor(self):
+        """获取只读游标（配置了副本时优先路由到副本）"""
+        async with self.pool_manager.read_cursor() as cursor:
+            yield cursor
+
+    # 权限快照相关方法
+    async def load_permission_snapshot(self) -> bool:
+        """从主库重新加载权限快照（读主库，避免副本延迟导致刚写入的权限不可见）"""
+        if not self._connected:
+            return False
+
+        async with self._permission_lock:
+            try:
+                async with self.get_cursor() as cursor:
+                    await cursor.execute(_LOAD_PERMISSIONS_SQL)
+                    rows = await cursor.fetchall()
+            except Exception as e:
+                # 加载失败时回退到逐次查询数据库，避免使用过期快照
+                self.permissions.clear()
+                logger.error(f"加载权限快照失败，权限检查回退到数据库: {e}")
+                return False
+
+            self.permissions.replace(rows)
+            logger.debug(f"权限快照已加载: {self.permissions.get_stats()}")
+            return True
+
+    async def start_permission_sync(self, redis_client, refresh_interval: int = 300):
+        """
+        加载权限快照并订阅跨实例变更通知
+
+        Args:
+            redis_client: redis.asyncio 客户端，用于发布/订阅权限变更
+            refresh_interval: 定期全量刷新的间隔（秒），兜底漏掉的通知，0 表示不刷新
+        """
+        self._redis_client = redis_client
+        if await self.load_permission_snapshot():
+            logger.info(f"✅ 权限快照已加载: {self.permissions.get_stats()}")
+
+        self._permission_tasks.append(asyncio.create_task(self._permission_listener()))
+        if refresh_interval > 0:
+            self._permission_tasks.append(asyncio.create_task(self._permission_refresh_loop(refresh_interval)))
+
+    async def stop_permission_sync(self):
+        """停止权限同步任务"""
+        for task in self._permission_tasks:
+            task.cancel()
+        for task in self._permission_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._permission_tasks.clear()
+
+    async def _permissions_changed(self):
+        """权限写入后：重新加载本实例快照，并通知其他实例"""
+        if not self._redis_client:
+            return
+
+        await self.load_permission_snapshot()
+        try:
+            await self._redis_client.publish(
+                PERMISSION_INVALIDATION_CHANNEL, json.dumps({"origin": self._instance_id})
+            )
+        except Exception as e:
+            logger.warning(f"发布权限变更通知失败: {e}")
+
+    async def _permission_listener(self):
+        """订阅权限变更通知（断线后自动重连）"""
+        while True:
+            pubsub = self._redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(PERMISSION_INVALIDATION_CHANNEL)
+                # 订阅（重新）建立前可能错过通知，重新加载一次
+                await self.load_permission_snapshot()
+
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        payload = json.loads(message["data"])
+                    except (json.JSONDecodeError, TypeError):
+                        payload = {}
+                    if payload.get("origin") == self._instance_id:
+                        continue
+                    await self.load_permission_snapshot()
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                # 通知中断期间可能漏掉变更，回退到数据库查询直到重新订阅
+                self.permissions.clear()
+                logger.warning(f"权限变更订阅中断，5秒后重连: {e}")
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception as e:
+                    logger.debug(f"关闭 pubsub 连接失败: {e}")
+
+    async def _permission_refresh_loop(self, interval: int):
+        """定期全量刷新权限快照"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.load_permission_snapshot()
+
     async def _init_super_admin(self):
         """初始化超级管理员"""
         from utils.config_manager import get_config
@@ -122,13 +290,67 @@ class MySQLUserManager:
         except Exception as e:
             logger.error(f"更新用户缓存失败: {e}")
 
+    async def record_user_seen(
+        self, user_id: int, username: str | None = None, first_name: str | None = None, last_name: str | None = None
+    ):
+        """
+        记录群消息发送者（合并写入）
+
+        资料与上次写入相同、且距上次写入不足 user_cache_seen_granularity 秒时直接跳过；
+        否则放入写缓冲，由后台任务合并为一条多行 upsert
+        """
+        if not self._connected or not self._user_write_buffer:
+            return
+
+        profile = (username, first_name, last_name)
+        now = time.monotonic()
+        previous = self._user_seen.get(user_id)
+        if previous and previous[0] == profile and now - previous[1] < self._user_seen_granularity:
+            self._user_seen.move_to_end(user_id)
+            return
+
+        self._user_seen[user_id] = (profile, now)
+        self._user_seen.move_to_end(user_id)
+        while len(self._user_seen) > self._user_max_tracked:
+            self._user_seen.popitem(last=False)
+
+        await self._user_write_buffer.put((user_id, *profile))
+
+    async def _flush_user_upserts(self, records: list[tuple]):
+        """将缓冲中的用户资料合并为一条多行 upsert（同一用户只保留最后一次）"""
+        latest = {record[0]: record for record in records}
+        # 按主键顺序写入，多实例并发写入时加锁顺序一致，避免死锁
+        rows = [latest[user_id] for user_id in sorted(latest)]
+        placeholders = ", ".join(["(%s, %s, %s, %s, NOW(), NOW())"] * len(rows))
+        try:
+            async with self.get_cursor() as cursor:
+                await cursor.execute(
+                    f"""
+                    INSERT INTO users (user_id, username, first_name, last_name, last_seen, created_at)
+                    VALUES {placeholders} AS new_user
+                    ON DUPLICATE KEY UPDATE
+                        username = new_user.username,
+                        first_name = new_user.first_name,
+                        last_name = new_user.last_name,
+                        last_seen = NOW()
+                    """,
+                    [value for row in rows for value in row],
+                )
+        except Exception:
+            # 写入失败的用户下次出现时重新写入
+            for user_id in latest:
+                self._user_seen.pop(user_id, None)
+            raise
+
+        logger.debug(f"用户缓存已批量更新: {len(rows)} 个用户（合并前 {len(records)} 条）")
+
     async def get_user_from_cache(self, user_id: int) -> dict | None:
         """从缓存获取用户信息"""
         if not self._connected:
             return None
 
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute(
                     "SELECT user_id, username, first_name, last_name FROM users WHERE user_id = %s", (user_id,)
                 )
@@ -145,7 +367,7 @@ class MySQLUserManager:
             return None
 
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute(
                     "SELECT user_id, username, first_name, last_name FROM users WHERE username = %s", (username,)
                 )
@@ -162,8 +384,11 @@ class MySQLUserManager:
         if not self._connected:
             return False
 
+        if self.permissions.loaded:
+            return self.permissions.is_admin(user_id)
+
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 # 检查是否为超级管理员
                 await cursor.execute("SELECT 1 FROM super_admins WHERE user_id = %s", (user_id,))
                 if await cursor.fetchone():
@@ -182,8 +407,11 @@ class MySQLUserManager:
         if not self._connected:
             return False
 
+        if self.permissions.loaded:
+            return self.permissions.is_super_admin(user_id)
+
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute("SELECT 1 FROM super_admins WHERE user_id = %s", (user_id,))
                 return await cursor.fetchone() is not None
 
@@ -196,8 +424,11 @@ class MySQLUserManager:
         if not self._connected:
             return []
 
+        if self.permissions.loaded:
+            return list(self.permissions.admins | self.permissions.super_admins)
+
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 # 获取所有管理员（包括超级管理员）
                 await cursor.execute("""
                     SELECT user_id FROM admin_permissions
@@ -227,6 +458,7 @@ class MySQLUserManager:
                 )
 
             logger.info(f"管理员已添加: {user_id}")
+            await self._permissions_changed()
             return True
 
         except Exception as e:
@@ -243,6 +475,7 @@ class MySQLUserManager:
                 await cursor.execute("DELETE FROM admin_permissions WHERE user_id = %s", (user_id,))
 
             logger.info(f"管理员已移除: {user_id}")
+            await self._permissions_changed()
             return True
 
         except Exception as e:
@@ -255,8 +488,11 @@ class MySQLUserManager:
         if not self._connected:
             return False
 
+        if self.permissions.loaded:
+            return self.permissions.is_whitelisted(user_id)
+
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute("SELECT 1 FROM user_whitelist WHERE user_id = %s", (user_id,))
                 return await cursor.fetchone() is not None
 
@@ -269,8 +505,11 @@ class MySQLUserManager:
         if not self._connected:
             return False
 
+        if self.permissions.loaded:
+            return self.permissions.is_group_whitelisted(group_id)
+
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute("SELECT 1 FROM group_whitelist WHERE group_id = %s", (group_id,))
                 return await cursor.fetchone() is not None
 
@@ -294,6 +533,7 @@ class MySQLUserManager:
                 )
 
             logger.info(f"用户已添加到白名单: {user_id}")
+            await self._permissions_changed()
             return True
 
         except Exception as e:
@@ -310,6 +550,7 @@ class MySQLUserManager:
                 await cursor.execute("DELETE FROM user_whitelist WHERE user_id = %s", (user_id,))
 
             logger.info(f"用户已从白名单移除: {user_id}")
+            await self._permissions_changed()
             return True
 
         except Exception as e:
@@ -330,6 +571,7 @@ class MySQLUserManager:
                 )
 
             logger.info(f"群组已添加到白名单: {group_id}")
+            await self._permissions_changed()
             return True
 
         except Exception as e:
@@ -346,6 +588,7 @@ class MySQLUserManager:
                 await cursor.execute("DELETE FROM group_whitelist WHERE group_id = %s", (group_id,))
 
             logger.info(f"群组已从白名单移除: {group_id}")
+            await self._permissions_changed()
             return True
 
         except Exception as e:
@@ -357,8 +600,11 @@ class MySQLUserManager:
         if not self._connected:
             return []
 
+        if self.permissions.loaded:
+            return list(self.permissions.whitelisted_users)
+
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute("SELECT user_id FROM user_whitelist")
                 results = await cursor.fetchall()
                 return [row["user_id"] for row in results]
@@ -373,7 +619,7 @@ class MySQLUserManager:
             return []
 
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute("SELECT group_id, group_name FROM group_whitelist")
                 results = await cursor.fetchall()
                 return results
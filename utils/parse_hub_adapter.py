@@ -12,10 +12,11 @@ import re
 import tempfile
 import time
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Any
 
 # Apply monkey patch to fix Facebook/YouTube parsing (ParseHub 1.5.10 format bug)
 from utils.parsehub_patch import patch_parsehub_yt_dlp
+from utils.singleflight import SingleFlight
 patch_parsehub_yt_dlp()
 
 from parsehub import ParseHub
@@ -25,8 +26,8 @@ from parsehub.utils.helpers import UA
 logger = logging.getLogger(__name__)
 
 # Singleflight: 同一 URL 只会有一条解析任务在执行，后续请求等待完成
-_inflight: Dict[str, asyncio.Event] = {}
-_inflight_results: Dict[str, Any] = {}
+# 结果保留5秒，合并紧随其后的重复请求
+_singleflight = SingleFlight("Singleflight", result_ttl=5)
 
 
 class ParseHubAdapter:
@@ -122,43 +123,8 @@ class ParseHubAdapter:
             # 如果没有URL或禁用Singleflight，直接调用实现
             return await self._parse_url_impl(text, user_id, group_id, proxy)
 
-        # Singleflight 机制：检查是否已有相同 URL 正在解析
-        if url in _inflight:
-            logger.info(f"[Singleflight] 等待已有解析任务: {url[:50]}...")
-            # 等待已有任务完成
-            await _inflight[url].wait()
-            # 从结果缓存中获取
-            result = _inflight_results.get(url)
-            if result:
-                logger.info(f"[Singleflight] 获取到缓存结果: {url[:50]}...")
-                return result
-            else:
-                # 缓存已被清理，重新解析
-                logger.warning(f"[Singleflight] 缓存已清理，重新解析: {url[:50]}...")
-                return await self._parse_url_impl(text, user_id, group_id, proxy)
-
-        # 创建 Event 标记正在解析
-        event = asyncio.Event()
-        _inflight[url] = event
-
-        try:
-            # 执行实际解析
-            result = await self._parse_url_impl(text, user_id, group_id, proxy)
-            # 缓存结果（5秒内有效，避免内存泄漏）
-            _inflight_results[url] = result
-            # 5秒后清理结果缓存
-            asyncio.create_task(self._cleanup_singleflight_result(url, 5))
-            return result
-        finally:
-            # 完成后释放等待者
-            event.set()
-            _inflight.pop(url, None)
-
-    async def _cleanup_singleflight_result(self, url: str, delay: int):
-        """清理 Singleflight 结果缓存"""
-        await asyncio.sleep(delay)
-        _inflight_results.pop(url, None)
-        logger.debug(f"[Singleflight] 清理结果缓存: {url[:50]}...")
+        # Singleflight 机制：相同 URL 正在解析时等待其结果
+        return await _singleflight.do(url, self._parse_url_impl, text, user_id, group_id, proxy)
 
     async def _parse_url_impl(
         self,
@@ -0,0 +1,69 @@
+"""
+权限快照
+将管理员、超级管理员、用户白名单和群组白名单整体加载到内存，权限检查变为集合查找；
+快照只整体替换、不原地修改，读取方无需加锁
+"""
+
+import time
+
+
+class PermissionSnapshot:
+    """内存中的权限集合"""
+
+    __slots__ = ("admins", "super_admins", "whitelisted_users", "whitelisted_groups", "loaded_at")
+
+    def __init__(self):
+        self.admins: frozenset[int] = frozenset()
+        self.super_admins: frozenset[int] = frozenset()
+        self.whitelisted_users: frozenset[int] = frozenset()
+        self.whitelisted_groups: frozenset[int] = frozenset()
+        self.loaded_at: float | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def replace(self, rows: list[dict]):
+        """
+        用查询结果整体替换快照
+
+        Args:
+            rows: [{"kind": "admin" | "super_admin" | "user" | "group", "id": int}]
+        """
+        sets: dict[str, set[int]] = {"admin": set(), "super_admin": set(), "user": set(), "group": set()}
+        for row in rows:
+            bucket = sets.get(row["kind"])
+            if bucket is not None:
+                bucket.add(int(row["id"]))
+
+        self.admins = frozenset(sets["admin"])
+        self.super_admins = frozenset(sets["super_admin"])
+        self.whitelisted_users = frozenset(sets["user"])
+        self.whitelisted_groups = frozenset(sets["group"])
+        self.loaded_at = time.time()
+
+    def clear(self):
+        """标记快照失效，权限检查回退到数据库"""
+        self.loaded_at = None
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.super_admins or user_id in self.admins
+
+    def is_super_admin(self, user_id: int) -> bool:
+        return user_id in self.super_admins
+
+    def is_whitelisted(self, user_id: int) -> bool:
+        return user_id in self.whitelisted_users
+
+    def is_group_whitelisted(self, group_id: int) -> bool:
+        return group_id in self.whitelisted_groups
+
+    def get_stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "loaded_at": self.loaded_at,
+            "admins": len(self.admins),
+            "super_admins": len(self.super_admins),
+            "whitelisted_users": len(self.whitelisted_users),
+            "whitelisted_groups": len(self.whitelisted_groups),
+        }
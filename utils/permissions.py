@@ -10,6 +10,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from utils.config_manager import get_config
+from utils.handler_timing import measure_phase
 
 
 logger = logging.getLogger(__name__)
@@ -76,19 +77,20 @@ def require_permission(permission: Permission):
             has_permission = False
 
             try:
-                if permission == Permission.SUPER_ADMIN:
-                    has_permission = user_id in config.super_admin_ids
-                elif permission == Permission.ADMIN:
-                    # 检查是否为超级管理员或普通管理员
-                    has_permission = user_id in config.super_admin_ids or await user_manager.is_admin(user_id)
-                # 管理员在任何地方都有权限
-                elif user_id in config.super_admin_ids or await user_manager.is_admin(user_id):
-                    has_permission = True
-                elif chat_type in ["group", "supergroup"]:
-                    chat_id = update.effective_chat.id
-                    has_permission = await user_manager.is_group_whitelisted(chat_id)
-                elif chat_type == "private":
-                    has_permission = await user_manager.is_whitelisted(user_id)
+                with measure_phase("permission"):
+                    if permission == Permission.SUPER_ADMIN:
+                        has_permission = user_id in config.super_admin_ids
+                    elif permission == Permission.ADMIN:
+                        # 检查是否为超级管理员或普通管理员
+                        has_permission = user_id in config.super_admin_ids or await user_manager.is_admin(user_id)
+                    # 管理员在任何地方都有权限
+                    elif user_id in config.super_admin_ids or await user_manager.is_admin(user_id):
+                        has_permission = True
+                    elif chat_type in ["group", "supergroup"]:
+                        chat_id = update.effective_chat.id
+                        has_permission = await user_manager.is_group_whitelisted(chat_id)
+                    elif chat_type == "private":
+                        has_permission = await user_manager.is_whitelisted(user_id)
 
 
                 if not has_permission:
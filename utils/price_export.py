@@ -0,0 +1,144 @@
+"""
+价格历史流式导出
+从服务端游标逐批读取 price_history，边读边写入 CSV 或 Parquet，
+内存占用只与批大小有关，与导出的总行数无关
+"""
+
+import asyncio
+import csv
+import io
+import logging
+from typing import BinaryIO
+
+from utils.price_history_manager import EXPORT_COLUMNS, PriceHistoryManager
+
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# Parquet 每个行组至少包含的行数（行组过小会降低压缩率和读取效率）
+PARQUET_ROW_GROUP_SIZE = 50000
+
+
+def _parquet_schema():
+    return pa.schema(
+        [
+            ("service", pa.string()),
+            ("item_id", pa.string()),
+            ("item_name", pa.string()),
+            ("country_code", pa.string()),
+            ("currency", pa.string()),
+            ("original_price", pa.decimal128(10, 2)),
+            ("current_price", pa.decimal128(10, 2)),
+            ("discount_percent", pa.int32()),
+            ("price_cny", pa.decimal128(10, 2)),
+            ("extra_data", pa.string()),
+            ("recorded_at", pa.timestamp("s")),
+        ]
+    )
+
+
+async def _export_csv(chunks, fileobj: BinaryIO) -> int:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    total = 0
+    try:
+        # 格式化和写文件放到线程中执行，不阻塞事件循环
+        await asyncio.to_thread(writer.writerow, EXPORT_COLUMNS)
+        async for rows in chunks:
+            await asyncio.to_thread(writer.writerows, rows)
+            total += len(rows)
+        await asyncio.to_thread(text.flush)
+    finally:
+        # 不关闭调用方的文件对象
+        text.detach()
+    return total
+
+
+async def _export_parquet(chunks, fileobj: BinaryIO) -> int:
+    schema = _parquet_schema()
+    writer = pq.ParquetWriter(fileobj, schema, compression="zstd")
+    pending: list[tuple] = []
+    total = 0
+
+    def write_rows(rows: list[tuple]):
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema,
+        )
+        writer.write_table(table)
+
+    try:
+        async for rows in chunks:
+            pending.extend(rows)
+            total += len(rows)
+            if len(pending) >= PARQUET_ROW_GROUP_SIZE:
+                # 列式编码和压缩放到线程中执行，不阻塞事件循环
+                await asyncio.to_thread(write_rows, pending)
+                pending = []
+        if pending:
+            await asyncio.to_thread(write_rows, pending)
+    finally:
+        writer.close()
+    return total
+
+
+async def export_price_history(
+    manager: PriceHistoryManager,
+    fileobj: BinaryIO,
+    fmt: str = "csv",
+    service: str = "",
+    item_id: str | None = None,
+    country_code: str | None = None,
+    days: int | None = None,
+    chunk_size: int = 5000,
+) -> int:
+    """
+    导出价格历史到二进制文件对象
+
+    Args:
+        manager: 价格历史管理器
+        fileobj: 以二进制方式打开的可写文件
+        fmt: csv / parquet（需要安装 pyarrow）
+        service/item_id/country_code/days: 过滤条件，含义同 iter_price_history_rows
+        chunk_size: 每批从数据库读取的行数
+
+    Returns:
+        导出的行数
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if fmt == "parquet" and not PYARROW_AVAILABLE:
+        raise ValueError("导出 Parquet 需要安装 pyarrow")
+
+    chunks = manager.iter_price_history_rows(
+        service,
+        item_id=item_id,
+        country_code=country_code,
+        days=days,
+        chunk_size=chunk_size,
+    )
+    try:
+        if fmt == "parquet":
+            total = await _export_parquet(chunks, fileobj)
+        else:
+            total = await _export_csv(chunks, fileobj)
+    finally:
+        # 提前退出时关闭生成器，释放服务端游标和连接
+        await chunks.aclose()
+
+    logger.info(f"📤 价格历史导出完成: {service} ({fmt}), {total} 行")
+    return total
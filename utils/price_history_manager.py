@@ -2,53 +2,410 @@
 价格历史管理器
 管理 price_history 表的增删改查操作
 支持分层缓存策略（方案C）
+
+price_latest 表保存每个 (service, item_id, country_code) 的最新一条记录，
+与 price_history 在同一事务中写入，最新价格查询直接走主键
+
+只在价格内容变化时写入 price_history：price_latest.content_hash 记录当前价格字段的哈希，
+未变化的快照只更新 price_latest.last_seen_at（新鲜度按 last_seen_at 计算）；
+描述、分类、图标等与国家无关的静态元数据按商品存一份在 price_item_metadata 中
+
+price_history 按 recorded_at 月度范围分区（分区名 pYYYYMM，pmax 兜底），
+保留期清理通过 DROP PARTITION 完成，不再逐行 DELETE
+
+price_daily_rollup 按 (service, item_id, country_code, day) 保存每日最低/最高/平均（按时间加权）/最后价格，
+价格未变化的日期沿用前一天的价格，由定时任务增量维护，超过 ROLLUP_MIN_DAYS 天的历史查询直接读取日汇总
 """
 
+import hashlib
 import json
 import logging
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+
+from aiomysql import DictCursor, SSCursor
 
-from aiomysql import DictCursor, create_pool
+from utils.mysql_pool import MySQLPoolManager
 
 logger = logging.getLogger(__name__)
 
+# 不写入 extra_data 的标准字段
+STANDARD_FIELDS = frozenset(
+    {
+        "currency",
+        "original_price",
+        "current_price",
+        "discount_percent",
+        "price_cny",
+        "item_id",
+        "item_name",
+        "country_code",
+        "recorded_at",
+        "changed_at",
+        "age_seconds",
+        "age_hours",
+    }
+)
+
+# 与国家无关的静态元数据字段，按商品存入 price_item_metadata，而不是每行 extra_data
+# （评分、评论数、安装量等随商店地区变化的字段保留在各国的 extra_data 中）
+STATIC_METADATA_FIELDS = frozenset(
+    {
+        # Steam
+        "developers",
+        "publishers",
+        "genres",
+        "categories",
+        "short_description",
+        "header_image",
+        "release_date",
+        "platforms",
+        "metacritic_score",
+        "recommendations_total",
+        # Google Play
+        "developer",
+        "genre",
+        "icon",
+        # App Store
+        "developer_name",
+        "developer_url",
+        "developer_id",
+        "app_category",
+        "operating_system",
+        "supported_devices",
+        "icon_url",
+    }
+)
+
+_INSERT_HISTORY_SQL = """
+    INSERT IGNORE INTO price_history (
+        service, item_id, item_name, country_code,
+        currency, original_price, current_price,
+        discount_percent, price_cny, extra_data, recorded_at
+    ) VALUES (
+        %s, %s, %s, %s,
+        %s, %s, %s,
+        %s, %s, %s, %s
+    )
+"""
+
+# 价格变化时整行覆盖，仅当新记录不早于已有记录；last_seen_at 必须最后更新，
+# 因为 MySQL 按从左到右的顺序求值，前面的 IF 需要读取旧的 last_seen_at
+_UPSERT_LATEST_SQL = """
+    INSERT INTO price_latest (
+        service, item_id, item_name, country_code,
+        currency, original_price, current_price,
+        discount_percent, price_cny, extra_data,
+        content_hash, recorded_at, last_seen_at
+    ) VALUES (
+        %s, %s, %s, %s,
+        %s, %s, %s,
+        %s, %s, %s,
+        %s, %s, %s
+    )
+    ON DUPLICATE KEY UPDATE
+        item_name = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(item_name), item_name),
+        currency = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(currency), currency),
+        original_price = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(original_price), original_price),
+        current_price = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(current_price), current_price),
+        discount_percent = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(discount_percent), discount_percent),
+        price_cny = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(price_cny), price_cny),
+        extra_data = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(extra_data), extra_data),
+        content_hash = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(content_hash), content_hash),
+        recorded_at = IF(VALUES(last_seen_at) >= last_seen_at, VALUES(recorded_at), recorded_at),
+        last_seen_at = GREATEST(VALUES(last_seen_at), last_seen_at)
+"""
+
+# 价格未变化：只刷新最近确认时间（以及随汇率变化的 CNY 价格）
+_TOUCH_LATEST_SQL = """
+    UPDATE price_latest
+    SET item_name = %s, price_cny = %s, last_seen_at = %s
+    WHERE service = %s AND item_id = %s AND country_code = %s AND last_seen_at <= %s
+"""
+
+# 元数据哈希相同时保持原值，MySQL 不会实际改写该行
+_UPSERT_METADATA_SQL = """
+    INSERT INTO price_item_metadata (service, item_id, metadata, metadata_hash)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        metadata = IF(metadata_hash = VALUES(metadata_hash), metadata, VALUES(metadata)),
+        metadata_hash = VALUES(metadata_hash)
+"""
+
+# 超过该天数的历史查询读取日汇总表
+ROLLUP_MIN_DAYS = 7
+
+_UPSERT_ROLLUP_SQL = """
+    INSERT INTO price_daily_rollup (
+        service, item_id, country_code, day, item_name, currency,
+        min_price, max_price, avg_price,
+        last_price, last_original_price, last_discount_percent, last_price_cny,
+        sample_count, first_recorded_at, last_recorded_at
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s,
+        %s, %s, %s,
+        %s, %s, %s, %s,
+        %s, %s, %s
+    )
+    ON DUPLICATE KEY UPDATE
+        item_name = VALUES(item_name),
+        currency = VALUES(currency),
+        min_price = VALUES(min_price),
+        max_price = VALUES(max_price),
+        avg_price = VALUES(avg_price),
+        last_price = VALUES(last_price),
+        last_original_price = VALUES(last_original_price),
+        last_discount_percent = VALUES(last_discount_percent),
+        last_price_cny = VALUES(last_price_cny),
+        sample_count = VALUES(sample_count),
+        first_recorded_at = VALUES(first_recorded_at),
+        last_recorded_at = VALUES(last_recorded_at)
+"""
+
+# 汇总时读取的价格变化字段（顺序与 _PriceEvent 一致）
+_ROLLUP_EVENT_COLUMNS = "recorded_at, item_name, currency, current_price, original_price, discount_percent, price_cny"
+
+# 每批写入的日汇总行数
+ROLLUP_WRITE_BATCH = 1000
+
+# get_price_history 原始记录查询的列
+_HISTORY_COLUMNS = """
+    id, service, item_id, item_name, country_code, currency,
+    original_price, current_price, discount_percent, price_cny, extra_data, recorded_at
+"""
+
+# price_latest 按 _HISTORY_COLUMNS 的列顺序输出（没有历史 id，recorded_at 为价格变为当前值的时间）
+_LATEST_AS_HISTORY_COLUMNS = """
+    NULL as id, service, item_id, item_name, country_code, currency,
+    original_price, current_price, discount_percent, price_cny, extra_data, recorded_at
+"""
+
+# 兜底分区名（VALUES LESS THAN MAXVALUE）
+MAXVALUE_PARTITION = "pmax"
+
+# 导出 price_history 时的列顺序
+EXPORT_COLUMNS = (
+    "service",
+    "item_id",
+    "item_name",
+    "country_code",
+    "currency",
+    "original_price",
+    "current_price",
+    "discount_percent",
+    "price_cny",
+    "extra_data",
+    "recorded_at",
+)
+
+
+def month_start(value: datetime) -> datetime:
+    """返回所在月份第一天零点"""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """月份加减（month 必须是某月第一天）"""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def month_partition_definition(month: datetime) -> str:
+    """生成月分区定义：分区 pYYYYMM 保存早于下个月第一天的记录"""
+    upper = add_months(month, 1)
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN (UNIX_TIMESTAMP('{upper:%Y-%m-%d %H:%M:%S}'))"
+
+
+class _PriceEvent(NamedTuple):
+    """汇总用的价格点：一次价格变化，或从汇总起点之前延续下来的价格（is_change=False）"""
+
+    at: datetime
+    item_name: Optional[str]
+    currency: Optional[str]
+    current_price: Optional[Decimal]
+    original_price: Optional[Decimal]
+    discount_percent: Optional[int]
+    price_cny: Optional[Decimal]
+    is_change: bool = True
+
+
+def build_daily_rollups(key: tuple, events: List[_PriceEvent], series_end: datetime) -> List[tuple]:
+    """
+    把一个 (service, item_id, country_code) 的价格点展开为每日汇总行
+
+    price_history 只记录变化，每天的价格从前一天最后的价格延续：没有变化的日期同样生成一行，
+    最低/最高价包含当天开始时延续下来的价格，平均价按每个价格在当天持续的时间加权。
+    覆盖区间从第一个价格点开始，到 series_end（最近一次确认价格的时间）为止
+
+    Args:
+        key: (service, item_id, country_code)
+        events: 按时间排序的价格点
+        series_end: 序列最后确认时间
+
+    Returns:
+        _UPSERT_ROLLUP_SQL 的参数列表
+    """
+    rows = []
+    if not events:
+        return rows
+
+    series_end = max(series_end, events[-1].at)
+    day = events[0].at.date()
+    last_day = series_end.date()
+    index = 0
+    current: Optional[_PriceEvent] = None
+    while day <= last_day:
+        day_start = datetime.combine(day, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        window_end = max(min(day_end, series_end), day_start)
+
+        # (生效时间, 价格点)，同一时刻只保留最后一个
+        segments: List[tuple[datetime, _PriceEvent]] = [(day_start, current)] if current else []
+        sample_count = 0
+        while index < len(events) and events[index].at < day_end:
+            current = events[index]
+            index += 1
+            sample_count += current.is_change
+            start = max(current.at, day_start)
+            if segments and segments[-1][0] >= start:
+                segments[-1] = (segments[-1][0], current)
+            else:
+                segments.append((start, current))
+
+        prices = []
+        weighted_total = 0.0
+        weight = 0.0
+        for i, (start, event) in enumerate(segments):
+            if event.current_price is None:
+                continue
+            prices.append(event.current_price)
+            end = segments[i + 1][0] if i + 1 < len(segments) else window_end
+            duration = max(0.0, (end - start).total_seconds())
+            weighted_total += float(event.current_price) * duration
+            weight += duration
+
+        if weight:
+            avg_price = round(weighted_total / weight, 2)
+        elif prices:
+            avg_price = round(sum(float(price) for price in prices) / len(prices), 2)
+        else:
+            avg_price = None
+
+        rows.append(
+            (
+                *key,
+                day,
+                current.item_name,
+                current.currency,
+                min(prices) if prices else None,
+                max(prices) if prices else None,
+                avg_price,
+                current.current_price,
+                current.original_price,
+                current.discount_percent,
+                current.price_cny,
+                sample_count,
+                segments[0][0],
+                window_end,
+            )
+        )
+        day += timedelta(days=1)
+    return rows
+
+
+# 最新价格查询：recorded_at 返回最近确认时间，changed_at 为价格变为当前值的时间
+_SELECT_LATEST_SQL = """
+    SELECT
+        pl.service,
+        pl.item_id,
+        pl.item_name,
+        pl.country_code,
+        pl.currency,
+        pl.original_price,
+        pl.current_price,
+        pl.discount_percent,
+        pl.price_cny,
+        pl.extra_data,
+        m.metadata,
+        pl.recorded_at as changed_at,
+        pl.last_seen_at as recorded_at,
+        TIMESTAMPDIFF(SECOND, pl.last_seen_at, NOW()) as age_seconds
+    FROM price_latest pl
+    LEFT JOIN price_item_metadata m ON m.service = pl.service AND m.item_id = pl.item_id
+"""
+
+
+def _normalize_price(value) -> Optional[str]:
+    """按 DECIMAL(10, 2) 的精度规范化价格，避免 9.9 与 9.90 得到不同哈希"""
+    if value is None:
+        return None
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _parse_json(value) -> Dict:
+    """解析 JSON 列（aiomysql 返回字符串）"""
+    if not value:
+        return {}
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _parse_metadata(value) -> Dict:
+    """解析 price_item_metadata.metadata，只保留静态字段（忽略早期误存入的按国家变化的字段）"""
+    return {k: v for k, v in _parse_json(value).items() if k in STATIC_METADATA_FIELDS}
+
 
 class PriceHistoryManager:
     """价格历史管理器 - MySQL持久化层"""
 
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
-        """初始化 MySQL 连接参数"""
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        pool_manager: Optional[MySQLPoolManager] = None,
+    ):
+        """
+        初始化 MySQL 连接参数
+
+        Args:
+            pool_manager: 共享连接池（未提供时按连接参数自行创建）
+        """
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
+        self.pool_manager = pool_manager
+        self._owns_pool = pool_manager is None
         self.pool = None
         self._connected = False
 
     async def connect(self):
-        """创建连接池"""
+        """连接共享连接池"""
         try:
-            # 获取连接池配置
-            from utils.config_manager import get_config
-
-            config = get_config()
-
-            self.pool = await create_pool(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                db=self.database,
-                charset="utf8mb4",
-                autocommit=True,
-                minsize=config.db_min_connections,
-                maxsize=config.db_max_connections,
-                echo=False,
-                cursorclass=DictCursor,
-            )
+            if self._owns_pool:
+                from utils.config_manager import get_config
+
+                config = get_config()
+                self.pool_manager = MySQLPoolManager(
+                    host=self.host,
+                    port=self.port,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password,
+                    minsize=config.db_min_connections,
+                    maxsize=config.db_max_connections,
+                )
+            await self.pool_manager.connect()
+            self.pool = self.pool_manager.pool
             self._connected = True
             logger.info("✅ PriceHistoryManager 连接池创建成功")
 
@@ -57,10 +414,10 @@ class PriceHistoryManager:
             raise
 
     async def close(self):
-        """关闭连接池"""
-        if self.pool:
-            self.pool.close()
-            await self.pool.wait_closed()
+        """关闭连接池（共享连接池由创建方关闭）"""
+        if self.pool_manager and self._owns_pool:
+            await self.pool_manager.close()
+        if self._connected:
             self._connected = False
             logger.info("PriceHistoryManager 连接池已关闭")
 
@@ -70,6 +427,140 @@ class PriceHistoryManager:
         async with self.pool.acquire() as conn, conn.cursor(DictCursor) as cursor:
             yield cursor
 
+    @asynccontextmanager
+    async def get_read_cursor(self):
+        """获取只读游标（配置了副本时优先路由到副本）"""
+        async with self.pool_manager.read_cursor() as cursor:
+            yield cursor
+
+    @asynccontextmanager
+    async def transaction(self):
+        """获取事务游标的上下文管理器，正常退出时提交，异常时回滚"""
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor(DictCursor) as cursor:
+                    yield cursor
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    @staticmethod
+    def _prepare_record(service: str, item_id: str, item_name: str, country_code: str, price_data: Dict) -> Dict:
+        """
+        拆分价格数据字典
+
+        Returns:
+            {"key", "row", "content_hash", "metadata"}，row 为 price_history 插入参数（不含 recorded_at），
+            content_hash 覆盖价格字段和按国家变化的额外数据（不含随汇率波动的 price_cny）
+        """
+        extra_data = {}
+        metadata = {}
+        for k, v in price_data.items():
+            if k in STANDARD_FIELDS:
+                continue
+            if k in STATIC_METADATA_FIELDS:
+                metadata[k] = v
+            else:
+                extra_data[k] = v
+
+        extra_data_json = json.dumps(extra_data, ensure_ascii=False, sort_keys=True) if extra_data else None
+        currency = price_data.get("currency")
+        original_price = price_data.get("original_price")
+        current_price = price_data.get("current_price")
+        discount_percent = price_data.get("discount_percent", 0)
+
+        fingerprint = json.dumps(
+            [
+                currency,
+                _normalize_price(original_price),
+                _normalize_price(current_price),
+                discount_percent,
+                extra_data_json,
+            ],
+            ensure_ascii=False,
+            default=str,
+        )
+        return {
+            "key": (service, item_id, country_code),
+            "row": (
+                service,
+                item_id,
+                item_name,
+                country_code,
+                currency,
+                original_price,
+                current_price,
+                discount_percent,
+                price_data.get("price_cny"),
+                extra_data_json,
+            ),
+            "content_hash": hashlib.md5(fingerprint.encode("utf-8")).hexdigest(),
+            "metadata": metadata,
+        }
+
+    async def _save_records(self, records: List[Dict]) -> tuple[int, int]:
+        """
+        在一个事务中写入价格记录（变化检测 + 最新价格 + 静态元数据）
+
+        Args:
+            records: _prepare_record() 的结果，同一 key 只保留最后一条
+
+        Returns:
+            (写入历史的条数, 未变化只更新确认时间的条数)
+        """
+        records = list({record["key"]: record for record in records}.values())
+        metadata_by_item = {}
+        for record in records:
+            if record["metadata"]:
+                service, item_id, _ = record["key"]
+                metadata_by_item.setdefault((service, item_id), {}).update(record["metadata"])
+
+        async with self.transaction() as cursor:
+            # price_history 与 price_latest 共用同一个记录时间
+            await cursor.execute("SELECT NOW() as now")
+            now = (await cursor.fetchone())["now"]
+
+            placeholders = ", ".join(["(%s, %s, %s)"] * len(records))
+            await cursor.execute(
+                f"""
+                SELECT service, item_id, country_code, content_hash
+                FROM price_latest
+                WHERE (service, item_id, country_code) IN ({placeholders})
+                """,
+                [part for record in records for part in record["key"]],
+            )
+            existing = {
+                (row["service"], row["item_id"], row["country_code"]): row["content_hash"]
+                for row in await cursor.fetchall()
+            }
+
+            changed = [r for r in records if existing.get(r["key"]) != r["content_hash"]]
+            unchanged = [r for r in records if existing.get(r["key"]) == r["content_hash"]]
+
+            if changed:
+                await cursor.executemany(_INSERT_HISTORY_SQL, [(*r["row"], now) for r in changed])
+                await cursor.executemany(
+                    _UPSERT_LATEST_SQL,
+                    [(*r["row"], r["content_hash"], now, now) for r in changed],
+                )
+            if unchanged:
+                # row: (service, item_id, item_name, country_code, ..., price_cny, extra_data)
+                await cursor.executemany(
+                    _TOUCH_LATEST_SQL,
+                    [(r["row"][2], r["row"][8], now, *r["key"], now) for r in unchanged],
+                )
+            if metadata_by_item:
+                values = []
+                for (service, item_id), metadata in metadata_by_item.items():
+                    metadata_json = json.dumps(metadata, ensure_ascii=False, sort_keys=True, default=str)
+                    metadata_hash = hashlib.md5(metadata_json.encode("utf-8")).hexdigest()
+                    values.append((service, item_id, metadata_json, metadata_hash))
+                await cursor.executemany(_UPSERT_METADATA_SQL, values)
+
+        return len(changed), len(unchanged)
+
     async def get_latest_price(
         self,
         service: str,
@@ -95,29 +586,11 @@ class PriceHistoryManager:
             return None
 
         try:
-            async with self.get_cursor() as cursor:
-                # 查询最新记录
+            async with self.get_read_cursor() as cursor:
+                # 主键查询最新记录
                 await cursor.execute(
-                    """
-                    SELECT
-                        id,
-                        service,
-                        item_id,
-                        item_name,
-                        country_code,
-                        currency,
-                        original_price,
-                        current_price,
-                        discount_percent,
-                        price_cny,
-                        extra_data,
-                        recorded_at,
-                        TIMESTAMPDIFF(SECOND, recorded_at, NOW()) as age_seconds
-                    FROM price_history
-                    WHERE service = %s AND item_id = %s AND country_code = %s
-                    ORDER BY recorded_at DESC
-                    LIMIT 1
-                    """,
+                    _SELECT_LATEST_SQL
+                    + "WHERE pl.service = %s AND pl.item_id = %s AND pl.country_code = %s",
                     (service, item_id, country_code),
                 )
 
@@ -142,51 +615,121 @@ class PriceHistoryManager:
                 )
 
                 # 构造返回数据
-                price_data = {
-                    "item_id": result["item_id"],
-                    "item_name": result["item_name"],
-                    "country_code": result["country_code"],
-                    "currency": result["currency"],
-                    "original_price": (
-                        float(result["original_price"])
-                        if result["original_price"]
-                        else None
-                    ),
-                    "current_price": (
-                        float(result["current_price"])
-                        if result["current_price"]
-                        else None
-                    ),
-                    "discount_percent": result["discount_percent"],
-                    "price_cny": (
-                        float(result["price_cny"]) if result["price_cny"] else None
-                    ),
-                    "recorded_at": (
-                        result["recorded_at"].isoformat()
-                        if result["recorded_at"]
-                        else None
-                    ),
-                    "age_seconds": age_seconds,
-                    "age_hours": round(age_seconds / 3600, 2),
-                }
+                return self._build_price_data(result)
 
-                # 合并 extra_data（如果有）
-                if result["extra_data"]:
+        except Exception as e:
+            logger.error(f"查询最新价格失败: {e}")
+            return None
+
+    @classmethod
+    def _build_price_data_many(cls, rows: List[Dict]) -> List[Dict]:
+        """
+        批量转换查询结果行
+
+        同一商品的各国行共享同一份静态元数据，相同的 JSON 文本只解析一次
+        """
+        parsed_metadata: Dict[str, Dict] = {}
+        records = []
+        for row in rows:
+            raw = row.get("metadata")
+            if isinstance(raw, str):
+                metadata = parsed_metadata.get(raw)
+                if metadata is None:
                     try:
-                        extra_data = (
-                            json.loads(result["extra_data"])
-                            if isinstance(result["extra_data"], str)
-                            else result["extra_data"]
-                        )
-                        price_data.update(extra_data)
+                        metadata = parsed_metadata[raw] = _parse_metadata(raw)
                     except Exception as e:
-                        logger.warning(f"解析extra_data失败: {e}")
+                        logger.warning(f"解析metadata失败: {e}")
+                        metadata = parsed_metadata[raw] = {}
+                row = {**row, "metadata": metadata}
+            records.append(cls._build_price_data(row))
+        return records
+
+    @staticmethod
+    def _build_price_data(row: Dict) -> Dict:
+        """将查询结果行转换为价格数据字典（合并静态元数据和 extra_data）"""
+        age_seconds = row["age_seconds"]
+        price_data = {
+            "item_id": row["item_id"],
+            "item_name": row["item_name"],
+            "country_code": row["country_code"],
+            "currency": row["currency"],
+            "original_price": (
+                float(row["original_price"]) if row["original_price"] else None
+            ),
+            "current_price": (
+                float(row["current_price"]) if row["current_price"] else None
+            ),
+            "discount_percent": row["discount_percent"],
+            "price_cny": float(row["price_cny"]) if row["price_cny"] else None,
+            "recorded_at": (
+                row["recorded_at"].isoformat() if row["recorded_at"] else None
+            ),
+            "age_seconds": age_seconds,
+            "age_hours": round(age_seconds / 3600, 2),
+        }
+        if row.get("changed_at"):
+            price_data["changed_at"] = row["changed_at"].isoformat()
+
+        # 合并元数据和 extra_data（如果有），按国家的 extra_data 优先
+        for column, parse in (("metadata", _parse_metadata), ("extra_data", _parse_json)):
+            try:
+                price_data.update(parse(row.get(column)))
+            except Exception as e:
+                logger.warning(f"解析{column}失败: {e}")
+
+        return price_data
+
+    async def get_latest_prices(
+        self,
+        service: str,
+        item_id: str,
+        country_codes: List[str],
+        freshness_threshold: int = 86400,
+    ) -> Dict[str, Dict]:
+        """
+        一次查询获取同一商品多个国家的最新价格（带新鲜度检查）
+
+        Args:
+            service: 服务名称
+            item_id: 商品ID
+            country_codes: 国家代码列表
+            freshness_threshold: 新鲜度阈值（秒），默认24小时
+
+        Returns:
+            {country_code: price_data}，只包含有新鲜数据的国家，格式同 get_latest_price()
+        """
+        if not self._connected:
+            logger.warning("PriceHistoryManager 未连接")
+            return {}
+        if not country_codes:
+            return {}
 
-                return price_data
+        placeholders = ", ".join(["%s"] * len(country_codes))
+        try:
+            async with self.get_read_cursor() as cursor:
+                await cursor.execute(
+                    _SELECT_LATEST_SQL
+                    + f"""
+                    WHERE pl.service = %s AND pl.item_id = %s AND pl.country_code IN ({placeholders})
+                        AND pl.last_seen_at >= NOW() - INTERVAL %s SECOND
+                    """,
+                    (service, item_id, *country_codes, freshness_threshold),
+                )
+
+                results = await cursor.fetchall()
+
+                prices = {
+                    price_data["country_code"]: price_data
+                    for price_data in self._build_price_data_many(results)
+                }
+                logger.debug(
+                    f"MySQL批量查询: {service}/{item_id}, 命中 {len(prices)}/{len(country_codes)} 个国家"
+                )
+                return prices
 
         except Exception as e:
-            logger.error(f"查询最新价格失败: {e}")
-            return None
+            logger.error(f"批量查询最新价格失败: {e}")
+            return {}
 
     async def save_price(
         self,
@@ -221,62 +764,13 @@ class PriceHistoryManager:
             return False
 
         try:
-            # 提取必需字段
-            currency = price_data.get("currency")
-            original_price = price_data.get("original_price")
-            current_price = price_data.get("current_price")
-            discount_percent = price_data.get("discount_percent", 0)
-            price_cny = price_data.get("price_cny")
-
-            # 提取额外数据（排除已使用的标准字段）
-            standard_fields = {
-                "currency",
-                "original_price",
-                "current_price",
-                "discount_percent",
-                "price_cny",
-                "item_id",
-                "item_name",
-                "country_code",
-                "recorded_at",
-                "age_seconds",
-                "age_hours",
-            }
-            extra_data = {
-                k: v for k, v in price_data.items() if k not in standard_fields
-            }
-            extra_data_json = (
-                json.dumps(extra_data, ensure_ascii=False) if extra_data else None
+            changed, _ = await self._save_records(
+                [self._prepare_record(service, item_id, item_name, country_code, price_data)]
             )
-
-            async with self.get_cursor() as cursor:
-                await cursor.execute(
-                    """
-                    INSERT IGNORE INTO price_history (
-                        service, item_id, item_name, country_code,
-                        currency, original_price, current_price,
-                        discount_percent, price_cny, extra_data
-                    ) VALUES (
-                        %s, %s, %s, %s,
-                        %s, %s, %s,
-                        %s, %s, %s
-                    )
-                    """,
-                    (
-                        service,
-                        item_id,
-                        item_name,
-                        country_code,
-                        currency,
-                        original_price,
-                        current_price,
-                        discount_percent,
-                        price_cny,
-                        extra_data_json,
-                    ),
-                )
-
-            logger.debug(f"价格记录已保存: {service}/{item_id}/{country_code}")
+            if changed:
+                logger.debug(f"价格记录已保存: {service}/{item_id}/{country_code}")
+            else:
+                logger.debug(f"价格未变化，仅更新确认时间: {service}/{item_id}/{country_code}")
             return True
 
         except Exception as e:
@@ -287,6 +781,8 @@ class PriceHistoryManager:
         """
         批量保存价格记录（性能优化）
 
+        价格未变化的记录只更新 price_latest 的确认时间，不写入 price_history
+
         Args:
             prices_list: 价格记录列表，每条记录包含：
                 - service: 服务名称
@@ -296,7 +792,7 @@ class PriceHistoryManager:
                 - price_data: 价格数据字典
 
         Returns:
-            成功保存的记录数
+            成功保存的记录数（含未变化的记录）
         """
         if not self._connected:
             logger.warning("PriceHistoryManager 未连接")
@@ -306,76 +802,20 @@ class PriceHistoryManager:
             return 0
 
         try:
-            values = []
-            for item in prices_list:
-                service = item["service"]
-                item_id = item["item_id"]
-                item_name = item["item_name"]
-                country_code = item["country_code"]
-                price_data = item["price_data"]
-
-                # 提取字段
-                currency = price_data.get("currency")
-                original_price = price_data.get("original_price")
-                current_price = price_data.get("current_price")
-                discount_percent = price_data.get("discount_percent", 0)
-                price_cny = price_data.get("price_cny")
-
-                # 提取额外数据
-                standard_fields = {
-                    "currency",
-                    "original_price",
-                    "current_price",
-                    "discount_percent",
-                    "price_cny",
-                    "item_id",
-                    "item_name",
-                    "country_code",
-                    "recorded_at",
-                    "age_seconds",
-                    "age_hours",
-                }
-                extra_data = {
-                    k: v for k, v in price_data.items() if k not in standard_fields
-                }
-                extra_data_json = (
-                    json.dumps(extra_data, ensure_ascii=False) if extra_data else None
-                )
-
-                values.append(
-                    (
-                        service,
-                        item_id,
-                        item_name,
-                        country_code,
-                        currency,
-                        original_price,
-                        current_price,
-                        discount_percent,
-                        price_cny,
-                        extra_data_json,
-                    )
+            records = [
+                self._prepare_record(
+                    item["service"],
+                    item["item_id"],
+                    item["item_name"],
+                    item["country_code"],
+                    item["price_data"],
                 )
+                for item in prices_list
+            ]
+            changed, unchanged = await self._save_records(records)
 
-            # 批量插入
-            async with self.get_cursor() as cursor:
-                await cursor.executemany(
-                    """
-                    INSERT IGNORE INTO price_history (
-                        service, item_id, item_name, country_code,
-                        currency, original_price, current_price,
-                        discount_percent, price_cny, extra_data
-                    ) VALUES (
-                        %s, %s, %s, %s,
-                        %s, %s, %s,
-                        %s, %s, %s
-                    )
-                    """,
-                    values,
-                )
-
-            logger.info(f"✅ 批量保存成功: {len(values)} 条价格记录")
-            return len(values)
+            logger.info(f"✅ 批量保存成功: {changed} 条价格变化，{unchanged} 条未变化")
+            return changed + unchanged
 
         except Exception as e:
             logger.error(f"批量保存价格记录失败: {e}")
@@ -395,10 +835,10 @@ class PriceHistoryManager:
             service: 服务名称
             item_id: 商品ID
             country_code: 国家代码（可选，不指定则查询所有国家）
-            days: 查询天数
+            days: 查询天数（超过 ROLLUP_MIN_DAYS 时读取日汇总，每个国家每天一条）
 
         Returns:
-            价格历史记录列表
+            价格历史记录列表；读取原始记录时，每个国家的第一条为窗口开始前的最后一次价格（如有）
         """
         if not self._connected:
             logger.warning("PriceHistoryManager 未连接")
@@ -407,58 +847,64 @@ class PriceHistoryManager:
         try:
             start_date = datetime.now() - timedelta(days=days)
 
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
+                if days > ROLLUP_MIN_DAYS:
+                    # 长时间范围读取日汇总，汇总尚未生成时回退到原始记录
+                    history = await self._get_rollup_history(cursor, service, item_id, country_code, start_date)
+                    if history:
+                        logger.debug(
+                            f"查询日汇总历史: {service}/{item_id}/{country_code or 'all'}, 共 {len(history)} 天"
+                        )
+                        return history
+
+                conditions = "service = %s AND item_id = %s"
+                params = [service, item_id]
                 if country_code:
-                    # 查询特定国家
-                    await cursor.execute(
-                        """
-                        SELECT
-                            id,
-                            service,
-                            item_id,
-                            item_name,
-                            country_code,
-                            currency,
-                            original_price,
-                            current_price,
-                            discount_percent,
-                            price_cny,
-                            extra_data,
-                            recorded_at
-                        FROM price_history
-                        WHERE service = %s AND item_id = %s AND country_code = %s
-                          AND recorded_at >= %s
-                        ORDER BY recorded_at ASC
-                        """,
-                        (service, item_id, country_code, start_date),
-                    )
-                else:
-                    # 查询所有国家
-                    await cursor.execute(
-                        """
+                    conditions += " AND country_code = %s"
+                    params.append(country_code)
+
+                # 只在价格变化时写入历史，窗口内价格稳定的国家可能没有记录：
+                # 每个国家附带窗口开始前的最后一条记录，作为序列起点；
+                # 该记录已随保留期清理删除时，用 price_latest（窗口内未变化的当前价格）代替
+                await cursor.execute(
+                    f"""
+                    SELECT {_HISTORY_COLUMNS}
+                    FROM price_history
+                    WHERE {conditions} AND recorded_at >= %s
+                    UNION ALL
+                    SELECT {_HISTORY_COLUMNS}
+                    FROM (
                         SELECT
-                            id,
-                            service,
-                            item_id,
-                            item_name,
-                            country_code,
-                            currency,
-                            original_price,
-                            current_price,
-                            discount_percent,
-                            price_cny,
-                            extra_data,
-                            recorded_at
+                            {_HISTORY_COLUMNS},
+                            ROW_NUMBER() OVER (PARTITION BY country_code ORDER BY recorded_at DESC) as rn
                         FROM price_history
-                        WHERE service = %s AND item_id = %s
-                          AND recorded_at >= %s
-                        ORDER BY country_code, recorded_at ASC
-                        """,
-                        (service, item_id, start_date),
-                    )
+                        WHERE {conditions} AND recorded_at < %s
+                    ) previous
+                    WHERE rn = 1
+                    UNION ALL
+                    SELECT {_LATEST_AS_HISTORY_COLUMNS}
+                    FROM price_latest pl
+                    WHERE {conditions} AND recorded_at < %s
+                      AND NOT EXISTS (
+                          SELECT 1 FROM price_history ph
+                          WHERE ph.service = pl.service AND ph.item_id = pl.item_id
+                            AND ph.country_code = pl.country_code AND ph.recorded_at < %s
+                      )
+                    ORDER BY country_code, recorded_at ASC
+                    """,
+                    (*params, start_date, *params, start_date, *params, start_date, start_date),
+                )
 
                 results = await cursor.fetchall()
 
+                # 静态元数据按商品只存一份，合并到每条记录的 extra_data 中
+                await cursor.execute(
+                    "SELECT metadata FROM price_item_metadata WHERE service = %s AND item_id = %s",
+                    (service, item_id),
+                )
+                metadata_row = await cursor.fetchone()
+                metadata = _parse_metadata(metadata_row["metadata"]) if metadata_row else {}
+
                 # 转换数据类型
                 history = []
                 for row in results:
@@ -491,14 +937,9 @@ class PriceHistoryManager:
                     }
 
                     # 合并 extra_data
-                    if row["extra_data"]:
+                    if row["extra_data"] or metadata:
                         try:
-                            extra_data = (
-                                json.loads(row["extra_data"])
-                                if isinstance(row["extra_data"], str)
-                                else row["extra_data"]
-                            )
-                            record["extra_data"] = extra_data
+                            record["extra_data"] = {**metadata, **_parse_json(row["extra_data"])}
                         except Exception as e:
                             logger.warning(f"解析extra_data失败: {e}")
 
@@ -513,6 +954,301 @@ class PriceHistoryManager:
             logger.error(f"查询价格历史失败: {e}")
             return []
 
+    async def _get_rollup_history(
+        self,
+        cursor,
+        service: str,
+        item_id: str,
+        country_code: Optional[str],
+        start_date: datetime,
+    ) -> List[Dict]:
+        """
+        从 price_daily_rollup 读取每日汇总
+
+        每条记录的价格字段取当天最后一次记录，并附带 day/min_price/max_price/avg_price/sample_count
+        """
+        conditions = "service = %s AND item_id = %s AND day >= %s"
+        params = [service, item_id, start_date.date()]
+        if country_code:
+            conditions += " AND country_code = %s"
+            params.append(country_code)
+
+        await cursor.execute(
+            f"""
+            SELECT
+                service,
+                item_id,
+                item_name,
+                country_code,
+                day,
+                currency,
+                min_price,
+                max_price,
+                avg_price,
+                last_price,
+                last_original_price,
+                last_discount_percent,
+                last_price_cny,
+                sample_count,
+                last_recorded_at
+            FROM price_daily_rollup
+            WHERE {conditions}
+            ORDER BY country_code, day ASC
+            """,
+            params,
+        )
+        results = await cursor.fetchall()
+        if not results:
+            return []
+
+        await cursor.execute(
+            "SELECT metadata FROM price_item_metadata WHERE service = %s AND item_id = %s",
+            (service, item_id),
+        )
+        metadata_row = await cursor.fetchone()
+        metadata = _parse_metadata(metadata_row["metadata"]) if metadata_row else {}
+
+        def to_float(value):
+            return float(value) if value is not None else None
+
+        history = []
+        for row in results:
+            record = {
+                "service": row["service"],
+                "item_id": row["item_id"],
+                "item_name": row["item_name"],
+                "country_code": row["country_code"],
+                "currency": row["currency"],
+                "original_price": to_float(row["last_original_price"]),
+                "current_price": to_float(row["last_price"]),
+                "discount_percent": row["last_discount_percent"],
+                "price_cny": to_float(row["last_price_cny"]),
+                "recorded_at": row["last_recorded_at"].isoformat() if row["last_recorded_at"] else None,
+                "day": row["day"].isoformat(),
+                "min_price": to_float(row["min_price"]),
+                "max_price": to_float(row["max_price"]),
+                "avg_price": to_float(row["avg_price"]),
+                "sample_count": row["sample_count"],
+            }
+            if metadata:
+                record["extra_data"] = metadata
+            history.append(record)
+        return history
+
+    async def rollup_daily(self) -> int:
+        """
+        增量维护每日价格汇总
+
+        从已汇总的最后一天（含）开始重算，首次运行回填全部历史。price_history 只保存价格变化
+        （见 save_prices_batch），因此每个序列从汇总起点时仍生效的价格开始延续，
+        一直展开到 price_latest.last_seen_at，价格没有变化的日期同样有汇总行（见 build_daily_rollups）
+
+        Returns:
+            写入的汇总行数
+        """
+        if not self._connected:
+            logger.warning("PriceHistoryManager 未连接")
+            return 0
+
+        try:
+            async with self.get_cursor() as cursor:
+                await cursor.execute("SELECT MAX(day) as last_day FROM price_daily_rollup")
+                last_day = (await cursor.fetchone())["last_day"]
+                since = datetime.combine(last_day, datetime.min.time()) if last_day else None
+                if since is None:
+                    logger.info("price_daily_rollup 为空，开始回填全部历史...")
+                series = await self._load_rollup_series(cursor, since)
+
+            written = 0
+            pending: List[tuple] = []
+            done = set()
+
+            async def emit(key: tuple, events: List[_PriceEvent]):
+                nonlocal written, pending
+                latest = series.get(key)
+                if latest:
+                    if latest["opening"]:
+                        events.insert(0, latest["opening"])
+                    series_end = latest["last_seen_at"]
+                else:
+                    series_end = events[-1].at
+                done.add(key)
+                pending.extend(build_daily_rollups(key, events, series_end))
+                if len(pending) >= ROLLUP_WRITE_BATCH:
+                    written += await self._write_rollups(pending)
+                    pending = []
+
+            # 按序列顺序流式读取起点之后的价格变化
+            where, params = ("WHERE recorded_at >= %s", (since,)) if since else ("", ())
+            async with self.pool_manager.acquire() as conn, conn.cursor(SSCursor) as stream:
+                await stream.execute(
+                    f"""
+                    SELECT service, item_id, country_code, {_ROLLUP_EVENT_COLUMNS}
+                    FROM price_history
+                    {where}
+                    ORDER BY service, item_id, country_code, recorded_at
+                    """,
+                    params,
+                )
+                key, events = None, []
+                while rows := await stream.fetchmany(ROLLUP_WRITE_BATCH):
+                    for row in rows:
+                        if tuple(row[:3]) != key:
+                            if events:
+                                await emit(key, events)
+                            key, events = tuple(row[:3]), []
+                        events.append(_PriceEvent(*row[3:]))
+                if events:
+                    await emit(key, events)
+
+            # 起点之后没有变化、但仍在确认价格的序列：延续起点时的价格
+            for key, latest in series.items():
+                if key not in done and latest["opening"]:
+                    await emit(key, [])
+
+            if pending:
+                written += await self._write_rollups(pending)
+
+            logger.info(f"✅ 每日价格汇总完成: 起始 {last_day or '全部历史'}，写入 {written} 行")
+            return written
+
+        except Exception as e:
+            logger.error(f"每日价格汇总失败: {e}")
+            return 0
+
+    async def _load_rollup_series(self, cursor, since: Optional[datetime]) -> Dict[tuple, Dict]:
+        """
+        读取需要汇总的序列（起点之后仍确认过价格的 price_latest 行）
+
+        Returns:
+            {(service, item_id, country_code): {"last_seen_at", "opening"}}，
+            opening 为汇总起点时仍生效的价格点（回填全部历史时为 None）
+        """
+        where, params = ("WHERE pl.last_seen_at >= %s", [since]) if since else ("", [])
+        await cursor.execute(
+            f"""
+            SELECT
+                pl.service, pl.item_id, pl.country_code, pl.item_name, pl.currency,
+                pl.current_price, pl.original_price, pl.discount_percent, pl.price_cny,
+                pl.recorded_at, pl.last_seen_at
+            FROM price_latest pl
+            {where}
+            """,
+            params,
+        )
+        series = {}
+        changed_since = []
+        for row in await cursor.fetchall():
+            key = (row["service"], row["item_id"], row["country_code"])
+            opening = None
+            if since and row["recorded_at"] < since:
+                # 起点之后没有变化，当前价格即起点时的价格
+                opening = _PriceEvent(
+                    since,
+                    row["item_name"],
+                    row["currency"],
+                    row["current_price"],
+                    row["original_price"],
+                    row["discount_percent"],
+                    row["price_cny"],
+                    is_change=False,
+                )
+            elif since:
+                changed_since.append(key)
+            series[key] = {"last_seen_at": row["last_seen_at"], "opening": opening}
+
+        # 起点之后有变化的序列：起点时的价格取自此前最后一天的汇总
+        for offset in range(0, len(changed_since), ROLLUP_WRITE_BATCH):
+            keys = changed_since[offset : offset + ROLLUP_WRITE_BATCH]
+            placeholders = ", ".join(["(%s, %s, %s)"] * len(keys))
+            await cursor.execute(
+                f"""
+                SELECT
+                    r.service, r.item_id, r.country_code, r.item_name, r.currency,
+                    r.last_price, r.last_original_price, r.last_discount_percent, r.last_price_cny
+                FROM price_daily_rollup r
+                WHERE (r.service, r.item_id, r.country_code) IN ({placeholders})
+                  AND r.day = (
+                      SELECT MAX(p.day) FROM price_daily_rollup p
+                      WHERE p.service = r.service AND p.item_id = r.item_id
+                        AND p.country_code = r.country_code AND p.day < %s
+                  )
+                """,
+                [*(part for key in keys for part in key), since.date()],
+            )
+            for row in await cursor.fetchall():
+                key = (row["service"], row["item_id"], row["country_code"])
+                series[key]["opening"] = _PriceEvent(
+                    since,
+                    row["item_name"],
+                    row["currency"],
+                    row["last_price"],
+                    row["last_original_price"],
+                    row["last_discount_percent"],
+                    row["last_price_cny"],
+                    is_change=False,
+                )
+        return series
+
+    async def _write_rollups(self, rows: List[tuple]) -> int:
+        """写入一批日汇总行"""
+        async with self.get_cursor() as cursor:
+            await cursor.executemany(_UPSERT_ROLLUP_SQL, rows)
+        return len(rows)
+
+    async def iter_price_history_rows(
+        self,
+        service: str,
+        item_id: Optional[str] = None,
+        country_code: Optional[str] = None,
+        days: Optional[int] = None,
+        chunk_size: int = 5000,
+    ) -> AsyncIterator[List[tuple]]:
+        """
+        流式读取 price_history 原始行（用于导出）
+
+        使用服务端游标逐批取回，不在内存中构造完整结果集；列值保持驱动返回的原始类型
+        （Decimal/datetime/JSON 文本），列顺序见 EXPORT_COLUMNS。导出期间占用一个连接，
+        配置了只读副本时优先使用副本
+
+        Args:
+            service: 服务名称
+            item_id: 商品ID（可选）
+            country_code: 国家代码（可选）
+            days: 只导出最近多少天（可选，按分区裁剪）
+            chunk_size: 每批行数
+
+        Yields:
+            每批最多 chunk_size 行的元组列表
+        """
+        conditions = ["service = %s"]
+        params: List = [service]
+        if item_id:
+            conditions.append("item_id = %s")
+            params.append(item_id)
+        if country_code:
+            conditions.append("country_code = %s")
+            params.append(country_code)
+        if days:
+            conditions.append("recorded_at >= %s")
+            params.append(datetime.now() - timedelta(days=days))
+
+        # 按唯一索引顺序读取，避免服务器端排序
+        sql = f"""
+            SELECT {", ".join(EXPORT_COLUMNS)}
+            FROM price_history
+            WHERE {" AND ".join(conditions)}
+            ORDER BY item_id, country_code, recorded_at
+        """
+
+        async with self.pool_manager.acquire(readonly=True) as conn, conn.cursor(SSCursor) as cursor:
+            await cursor.execute(sql, params)
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
     async def get_latest_prices_by_service(
         self,
         service: str,
@@ -521,8 +1257,8 @@ class PriceHistoryManager:
         """
         批量查询某服务所有最新价格记录
 
-        通过子查询找到每个 (item_id, country_code) 的最新记录，
-        再过滤掉超过新鲜度阈值的数据。
+        直接读取 price_latest（每个 (item_id, country_code) 一行），
+        按 (service, last_seen_at) 索引过滤掉超过新鲜度阈值的数据。
 
         Args:
             service: 服务名称 (如 "icloud")
@@ -536,82 +1272,19 @@ class PriceHistoryManager:
             return []
 
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 await cursor.execute(
-                    """
-                    SELECT
-                        ph.id,
-                        ph.service,
-                        ph.item_id,
-                        ph.item_name,
-                        ph.country_code,
-                        ph.currency,
-                        ph.original_price,
-                        ph.current_price,
-                        ph.discount_percent,
-                        ph.price_cny,
-                        ph.extra_data,
-                        ph.recorded_at,
-                        TIMESTAMPDIFF(SECOND, ph.recorded_at, NOW()) as age_seconds
-                    FROM price_history ph
-                    INNER JOIN (
-                        SELECT item_id, country_code, MAX(recorded_at) as max_at
-                        FROM price_history
-                        WHERE service = %s
-                        GROUP BY item_id, country_code
-                    ) latest ON ph.item_id = latest.item_id
-                        AND ph.country_code = latest.country_code
-                        AND ph.recorded_at = latest.max_at
-                    WHERE ph.service = %s
-                        AND TIMESTAMPDIFF(SECOND, ph.recorded_at, NOW()) < %s
+                    _SELECT_LATEST_SQL
+                    + """
+                    WHERE pl.service = %s
+                        AND pl.last_seen_at > NOW() - INTERVAL %s SECOND
                     """,
-                    (service, service, freshness_threshold),
+                    (service, freshness_threshold),
                 )
 
                 results = await cursor.fetchall()
 
-                records = []
-                for row in results:
-                    price_data = {
-                        "item_id": row["item_id"],
-                        "item_name": row["item_name"],
-                        "country_code": row["country_code"],
-                        "currency": row["currency"],
-                        "original_price": (
-                            float(row["original_price"])
-                            if row["original_price"]
-                            else None
-                        ),
-                        "current_price": (
-                            float(row["current_price"])
-                            if row["current_price"]
-                            else None
-                        ),
-                        "discount_percent": row["discount_percent"],
-                        "price_cny": (
-                            float(row["price_cny"]) if row["price_cny"] else None
-                        ),
-                        "recorded_at": (
-                            row["recorded_at"].isoformat()
-                            if row["recorded_at"]
-                            else None
-                        ),
-                        "age_seconds": row["age_seconds"],
-                    }
-
-                    # 合并 extra_data
-                    if row["extra_data"]:
-                        try:
-                            extra = (
-                                json.loads(row["extra_data"])
-                                if isinstance(row["extra_data"], str)
-                                else row["extra_data"]
-                            )
-                            price_data.update(extra)
-                        except Exception as e:
-                            logger.warning(f"解析extra_data失败: {e}")
-
-                    records.append(price_data)
+                records = self._build_price_data_many(results)
 
                 logger.info(
                     f"批量查询 {service} 最新价格: {len(records)} 条记录"
@@ -622,24 +1295,136 @@ class PriceHistoryManager:
             logger.error(f"批量查询最新价格失败: {e}", exc_info=True)
             return []
 
+    async def get_partitions(self) -> List[Dict]:
+        """
+        获取 price_history 的分区列表（按顺序）
+
+        Returns:
+            [{"name", "bound", "table_rows"}]，bound 为分区上界（UNIX 时间戳字符串或 MAXVALUE）；
+            表未分区时返回空列表
+        """
+        async with self.get_cursor() as cursor:
+            await cursor.execute(
+                """
+                SELECT
+                    PARTITION_NAME as name,
+                    PARTITION_DESCRIPTION as bound,
+                    TABLE_ROWS as table_rows
+                FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'price_history'
+                  AND PARTITION_NAME IS NOT NULL
+                ORDER BY PARTITION_ORDINAL_POSITION
+                """,
+                (self.database,),
+            )
+            return list(await cursor.fetchall())
+
+    async def is_partitioned(self) -> bool:
+        """price_history 是否已按月分区"""
+        return bool(await self.get_partitions())
+
+    async def ensure_partitions(self, months_ahead: int = 3) -> int:
+        """
+        提前创建月分区，保证当前月及未来 months_ahead 个月都有独立分区
+
+        新分区从 pmax 中拆分（REORGANIZE），pmax 通常为空，操作只涉及元数据
+
+        Returns:
+            新建的分区数
+        """
+        if not self._connected:
+            logger.warning("PriceHistoryManager 未连接")
+            return 0
+
+        try:
+            partitions = await self.get_partitions()
+            if not partitions:
+                logger.debug("price_history 未分区，跳过分区维护")
+                return 0
+
+            current = month_start(datetime.now())
+            next_month = current
+            monthly = [p for p in partitions if p["bound"] != "MAXVALUE"]
+            if monthly:
+                try:
+                    last_month = datetime.strptime(monthly[-1]["name"][1:], "%Y%m")
+                    next_month = max(add_months(last_month, 1), current)
+                except ValueError:
+                    logger.warning(f"无法识别的分区名: {monthly[-1]['name']}")
+
+            target = add_months(current, months_ahead)
+            definitions = []
+            while next_month <= target:
+                definitions.append(month_partition_definition(next_month))
+                next_month = add_months(next_month, 1)
+            if not definitions:
+                return 0
+
+            maxvalue = next((p["name"] for p in partitions if p["bound"] == "MAXVALUE"), None)
+            async with self.get_cursor() as cursor:
+                if maxvalue:
+                    await cursor.execute(
+                        f"ALTER TABLE price_history REORGANIZE PARTITION {maxvalue} INTO ("
+                        + ", ".join([*definitions, f"PARTITION {maxvalue} VALUES LESS THAN MAXVALUE"])
+                        + ")"
+                    )
+                else:
+                    await cursor.execute(f"ALTER TABLE price_history ADD PARTITION ({', '.join(definitions)})")
+
+            logger.info(f"✅ price_history 已创建 {len(definitions)} 个月分区")
+            return len(definitions)
+
+        except Exception as e:
+            logger.error(f"创建 price_history 分区失败: {e}")
+            return 0
+
     async def cleanup_old_data(self, days_to_keep: int = 90) -> int:
         """
         清理旧数据（性能优化）
 
+        表已分区时删除上界早于保留期的整月分区（按月粒度，实际保留时间略长于 days_to_keep），
+        未分区时回退到逐行 DELETE。删除前把每个序列在保留期起点仍生效的价格写到起点时刻
+        （见 _carry_forward_prices），长期未变化的价格不会因清理而失去历史记录
+
         Args:
             days_to_keep: 保留天数，默认90天
 
         Returns:
-            删除的记录数
+            删除的记录数（分区删除时为 information_schema 中的估算行数）
         """
         if not self._connected:
             logger.warning("PriceHistoryManager 未连接")
             return 0
 
         try:
+            partitions = await self.get_partitions()
+            if partitions:
+                cutoff = time.time() - days_to_keep * 86400
+                expired = [p for p in partitions if p["bound"] != "MAXVALUE" and int(p["bound"]) <= cutoff]
+                if not expired:
+                    logger.info(f"price_history 没有超过保留期（{days_to_keep} 天）的分区")
+                    return 0
+
+                async with self.get_cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT FROM_UNIXTIME(%s) as boundary", (max(int(p["bound"]) for p in expired),)
+                    )
+                    boundary = (await cursor.fetchone())["boundary"]
+                    await self._carry_forward_prices(cursor, boundary)
+                    await cursor.execute(
+                        f"ALTER TABLE price_history DROP PARTITION {', '.join(p['name'] for p in expired)}"
+                    )
+                deleted_count = sum(p["table_rows"] or 0 for p in expired)
+                logger.info(
+                    f"✅ 清理旧数据完成: 删除分区 {', '.join(p['name'] for p in expired)}，"
+                    f"约 {deleted_count} 条记录（保留 {days_to_keep} 天）"
+                )
+                return deleted_count
+
             cutoff_date = datetime.now() - timedelta(days=days_to_keep)
 
             async with self.get_cursor() as cursor:
+                await self._carry_forward_prices(cursor, cutoff_date)
                 await cursor.execute(
                     "DELETE FROM price_history WHERE recorded_at < %s",
                     (cutoff_date,),
@@ -655,6 +1440,46 @@ class PriceHistoryManager:
             logger.error(f"清理旧数据失败: {e}")
             return 0
 
+    async def _carry_forward_prices(self, cursor, boundary: datetime) -> int:
+        """
+        把每个序列早于 boundary 的最后一条记录复制到 boundary 时刻
+
+        price_history 只保存价格变化，清理 boundary 之前的数据后，这一行就是保留期起点时的价格；
+        boundary 时刻已有记录的序列保持不变（INSERT IGNORE）
+
+        Returns:
+            写入的记录数
+        """
+        await cursor.execute(
+            """
+            INSERT IGNORE INTO price_history (
+                service, item_id, item_name, country_code,
+                currency, original_price, current_price,
+                discount_percent, price_cny, extra_data, recorded_at
+            )
+            SELECT
+                service, item_id, item_name, country_code,
+                currency, original_price, current_price,
+                discount_percent, price_cny, extra_data, %s
+            FROM (
+                SELECT
+                    service, item_id, item_name, country_code,
+                    currency, original_price, current_price,
+                    discount_percent, price_cny, extra_data,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY service, item_id, country_code ORDER BY recorded_at DESC
+                    ) as rn
+                FROM price_history
+                WHERE recorded_at < %s
+            ) previous
+            WHERE rn = 1
+            """,
+            (boundary, boundary),
+        )
+        carried = cursor.rowcount or 0
+        logger.info(f"保留期起点 {boundary} 之前的最后价格已写入 {carried} 条")
+        return carried
+
     async def get_statistics(self, service: Optional[str] = None) -> Dict:
         """
         获取价格历史统计信息（可选功能）
@@ -670,7 +1495,7 @@ class PriceHistoryManager:
             return {}
 
         try:
-            async with self.get_cursor() as cursor:
+            async with self.get_read_cursor() as cursor:
                 if service:
                     # 特定服务统计
                     await cursor.execute(
@@ -748,16 +1573,38 @@ class PriceHistoryManager:
             return 0
 
         try:
-            async with self.get_cursor() as cursor:
+            async with self.transaction() as cursor:
                 if country_code:
+                    params = (service, item_id, country_code.upper())
+                    await cursor.execute(
+                        "DELETE FROM price_daily_rollup WHERE service=%s AND item_id=%s AND country_code=%s",
+                        params,
+                    )
+                    await cursor.execute(
+                        "DELETE FROM price_latest WHERE service=%s AND item_id=%s AND country_code=%s",
+                        params,
+                    )
                     await cursor.execute(
                         "DELETE FROM price_history WHERE service=%s AND item_id=%s AND country_code=%s",
-                        (service, item_id, country_code.upper()),
+                        params,
                     )
                 else:
+                    params = (service, item_id)
+                    await cursor.execute(
+                        "DELETE FROM price_item_metadata WHERE service=%s AND item_id=%s",
+                        params,
+                    )
+                    await cursor.execute(
+                        "DELETE FROM price_daily_rollup WHERE service=%s AND item_id=%s",
+                        params,
+                    )
+                    await cursor.execute(
+                        "DELETE FROM price_latest WHERE service=%s AND item_id=%s",
+                        params,
+                    )
                     await cursor.execute(
                         "DELETE FROM price_history WHERE service=%s AND item_id=%s",
-                        (service, item_id),
+                        params,
                     )
                 deleted = cursor.rowcount or 0
                 logger.info(
@@ -42,6 +42,12 @@ class PriceQueryService(ABC):
         self.cache_timestamp: int = 0
         self.country_mapping: dict[str, Any] = {}
 
+        # Cache warming: refresh the price table shortly before it expires
+        if subdirectory:
+            cache_manager.register_warm_fetcher(
+                subdirectory, self._warm_cache, key_prefix=self.cache_key, max_age_seconds=cache_duration_seconds
+            )
+
     @abstractmethod
     async def _fetch_data(self, context: ContextTypes.DEFAULT_TYPE) -> Any:
         """
@@ -124,6 +130,16 @@ class PriceQueryService(ABC):
         if self.data:
             self.country_mapping = self._init_country_mapping()
 
+    async def _warm_cache(self, cache_key: str) -> bool:
+        """
+        Re-fetches the price data and refreshes the cache. Used by the cache warming task.
+        """
+        fetched_data = await self._fetch_data(None)
+        if not fetched_data:
+            return False
+        await self.cache_manager.save_cache(self.cache_key, fetched_data, subdirectory=self.subdirectory)
+        return True
+
     async def query_prices(self, query_list: list[str]) -> str:
         """
         Queries prices for a list of specified countries.
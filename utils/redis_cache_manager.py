@@ -3,19 +3,55 @@ Redis 缓存管理器
 保持与现有 CacheManager 相同的接口，底层改用 Redis
 """
 
+import asyncio
 import json
 import logging
+import random
 import time
+import uuid
+from collections.abc import Awaitable, Callable
 
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
-from redis.exceptions import RedisError
+from redis.client import NEVER_DECODE
+from redis.exceptions import RedisError, ResponseError
 
+from utils.cache_codec import CacheCodec, CacheCodecError
 from utils.config_manager import get_config
+from utils.handler_timing import timed_phase
+from utils.local_cache import ROOT_SUBDIRECTORY, LocalCache
+from utils.metrics import SIZE_BUCKETS_BYTES, MetricsRegistry
 
 
 logger = logging.getLogger(__name__)
 
+# L1 缓存跨实例失效通知频道
+CACHE_INVALIDATION_CHANNEL = "pubsub:cache:invalidate"
+
+# 缓存值可能是二进制编码，读取时跳过客户端的 UTF-8 解码
+RAW_RESPONSE = {NEVER_DECODE: True}
+
+# 键索引：每个子目录一个 Set，记录其下的缓存键，清除时无需 SCAN 整个键空间
+CACHE_INDEX_PREFIX = "cacheidx:"
+CACHE_INDEX_REGISTRY = "cacheidx:_registry"  # 所有索引名
+CACHE_INDEX_BACKFILL_MARKER = "cacheidx:_backfilled"  # 已为旧缓存建立过索引
+UNLINK_BATCH_SIZE = 500
+# 没有默认 TTL 配置、但会写入缓存的子目录（补建索引时用于识别键所属的子目录）
+EXTRA_CACHE_SUBDIRECTORIES = frozenset(
+    {"abuseipdb", "bin", "dns", "electricity", "file_id", "ipdata", "kugou", "music", "timezone", "ytmusic"}
+)
+INDEX_PRUNE_EVERY = 1000  # 每个子目录写入多少次后清理一次索引中已过期的键
+
+# 访问热度：每个子目录一个 Sorted Set，分数为采样估算的访问次数
+CACHE_POPULARITY_PREFIX = "cachepop:"
+POPULARITY_FLUSH_INTERVAL = 30  # 本地采样计数写入 Redis 的间隔（秒）
+POPULARITY_TTL = 7 * 86400  # 长期没有访问的子目录热度自动过期
+POPULARITY_DECAY = 0.5  # 每次预热后热度衰减系数，使排名反映近期访问
+
+# 负缓存原因：上游明确返回不存在 / 暂时性错误（超时、5xx 等）
+NEGATIVE_NOT_FOUND = "not_found"
+NEGATIVE_ERROR = "error"
+
 
 class RedisCacheManager:
     """Redis 缓存管理器，保持与文件缓存相同的接口"""
@@ -43,6 +79,33 @@ class RedisCacheManager:
         self.redis_client = redis.Redis(connection_pool=self.pool)
         self._connected = False
 
+        # 进程内 L1 缓存（可选）
+        self.l1: LocalCache | None = None
+        if self.config.cache_l1_enabled and self.config.cache_l1_subdirectories:
+            self.l1 = LocalCache(self.config.cache_l1_subdirectories, default_ttl=self.config.cache_l1_ttl)
+        self._instance_id = uuid.uuid4().hex
+        self._invalidation_task: asyncio.Task | None = None
+
+        # 缓存值编解码器（关闭时写入旧版 JSON 文本，读取始终兼容两种格式）
+        self.codec: CacheCodec | None = None
+        if self.config.cache_codec_enabled:
+            self.codec = CacheCodec(
+                serializer=self.config.cache_codec_serializer,
+                compression=self.config.cache_codec_compression,
+                compress_threshold=self.config.cache_compress_threshold,
+            )
+        # 按子目录统计的缓存指标（命中、延迟、解码耗时、值大小等，SmartCacheManager 也写入其中）
+        self.metrics = MetricsRegistry()
+
+        # 键索引维护
+        self._index_writes: dict[str, int] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+
+        # 缓存预热：采样的访问计数（定期写入 Redis）与按子目录注册的 fetcher
+        self._popularity_counts: dict[str, dict[str, int]] = {}
+        self._popularity_task: asyncio.Task | None = None
+        self._warm_fetchers: dict[str, list[tuple[str, Callable[[str], Awaitable[bool]], int | None]]] = {}
+
     async def connect(self):
         """建立 Redis 连接"""
         try:
@@ -53,8 +116,28 @@ class RedisCacheManager:
             logger.error(f"❌ Redis 连接失败: {e}")
             raise
 
+        if self.l1 and self._invalidation_task is None:
+            self._invalidation_task = asyncio.create_task(self._invalidation_listener())
+            logger.info(f"✅ L1 缓存已启用: {', '.join(self.l1.subdirectory_limits)}")
+
+        # 为启用键索引前写入的缓存补建索引（全局只执行一次）
+        self._spawn(self._backfill_indexes())
+
+        if self.config.cache_warm_enabled and self._popularity_task is None:
+            self._popularity_task = asyncio.create_task(self._popularity_flusher())
+
     async def close(self):
         """关闭 Redis 连接"""
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            self._invalidation_task = None
+        if self._popularity_task:
+            self._popularity_task.cancel()
+            self._popularity_task = None
+            await self._flush_popularity()
+        for task in list(self._background_tasks):
+            task.cancel()
+
         if self.redis_client:
             await self.redis_client.close()
             await self.pool.disconnect()
@@ -67,9 +150,9 @@ class RedisCacheManager:
             return f"cache:{subdirectory}:{key}"
         return f"cache:{key}"
 
-    def _get_ttl_for_subdirectory(self, subdirectory: str | None, key: str | None = None) -> int:
-        """根据子目录获取对应的 TTL"""
-        ttl_mapping = {
+    def _get_ttl_mapping(self) -> dict[str, int]:
+        """各子目录的默认 TTL"""
+        return {
             "exchange_rates": self.config.rate_cache_duration,
             "app_store": self.config.app_store_cache_duration,
             "apple_services": self.config.apple_services_cache_duration,
@@ -82,6 +165,7 @@ class RedisCacheManager:
             "disney_plus": self.config.disney_cache_duration,  # 8天，配合周日清理
             "nintendo": self.config.nintendo_cache_duration,  # 8天，配合周日清理
             "max": self.config.max_cache_duration,  # 8天，配合周日清理
+            "xbox": self.config.xbox_cache_duration,  # 8天，配合周日清理
             "movie": self.config.movie_cache_duration,  # 2小时，电影和电视剧缓存
             "news": self.config.news_cache_duration,  # 5分钟，新闻缓存
             "whois": self.config.whois_cache_duration,  # 6小时，WHOIS查询缓存
@@ -99,6 +183,10 @@ class RedisCacheManager:
             "system": self.config.gstat_cache_duration,  # 系统命令缓存（/gstat等）
         }
 
+    def _get_ttl_for_subdirectory(self, subdirectory: str | None, key: str | None = None) -> int:
+        """根据子目录获取对应的 TTL"""
+        ttl_mapping = self._get_ttl_mapping()
+
         # 对于搜索结果特殊处理
         if subdirectory == "google_play" and key and "search_" in key:
             return self.config.google_play_search_cache_duration
@@ -141,6 +229,17 @@ class RedisCacheManager:
 
         return ttl_mapping.get(subdirectory, self.config.default_cache_duration)
 
+    def _get_stale_ttl_for_subdirectory(self, subdirectory: str | None) -> int:
+        """
+        获取子目录的 SWR 宽限期（秒）
+
+        条目在软 TTL（_get_ttl_for_subdirectory）后进入宽限期，期间仍保留在 Redis 中，
+        可由 load_cache_swr 作为过期数据返回；软 TTL + 宽限期即硬 TTL。返回 0 表示不启用 SWR
+        """
+        if not self.config.cache_swr_enabled:
+            return 0
+        return self.config.cache_swr_grace_periods.get(subdirectory or "", 0)
+
     async def load_cache(
         self, key: str, max_age_seconds: int | None = None, subdirectory: str | None = None
     ) -> dict | None:
@@ -153,45 +252,272 @@ class RedisCacheManager:
             subdirectory: 子目录
 
         Returns:
-            缓存的数据或 None
+            缓存的数据或 None（已过软 TTL 的 SWR 条目视为未命中）
+        """
+        entry = await self._load_entry(key, max_age_seconds, subdirectory, allow_stale=False)
+        return entry[0] if entry else None
+
+    async def load_cache_swr(
+        self, key: str, max_age_seconds: int | None = None, subdirectory: str | None = None
+    ) -> tuple[dict, bool] | None:
+        """
+        加载缓存数据（stale-while-revalidate 模式）
+
+        过了软 TTL（或 max_age_seconds）但仍在硬 TTL 内的条目会作为过期数据返回，
+        调用方应立即使用该数据并在后台刷新，完成后调用 record_swr_refresh
+
+        Returns:
+            (数据, 是否过期) 或 None
+        """
+        entry = await self._load_entry(key, max_age_seconds, subdirectory, allow_stale=True)
+        if not entry:
+            return None
+
+        value, _, is_stale = entry
+        if is_stale:
+            logger.debug(f"返回过期缓存 {self._get_cache_key(key, subdirectory)}")
+        return value, is_stale
+
+    async def load_cache_swr_many(
+        self,
+        keys: list[str],
+        max_age_seconds: int | None = None,
+        subdirectory: str | None = None,
+        negatives: dict[str, str] | None = None,
+    ) -> dict[str, tuple[dict, bool]]:
+        """
+        批量加载缓存（stale-while-revalidate 模式，一次 Redis 往返）
+
+        Args:
+            negatives: 传入字典时收集命中的负缓存 {缓存键: 原因}
+
+        Returns:
+            {缓存键: (数据, 是否过期)}，未命中的键不出现在结果中
+        """
+        entries = await self._load_entries(keys, max_age_seconds, subdirectory, allow_stale=True, negatives=negatives)
+        return {key: (value, is_stale) for key, (value, _, is_stale) in entries.items()}
+
+    async def load_cache_or_negative(
+        self, key: str, max_age_seconds: int | None = None, subdirectory: str | None = None
+    ) -> tuple[dict | None, str | None]:
+        """
+        加载缓存数据，同时识别负缓存
+
+        Returns:
+            (数据, None) 命中；(None, 负缓存原因) 负缓存命中，调用方不应再请求上游；
+            (None, None) 未命中
+        """
+        negatives: dict[str, str] = {}
+        entries = await self._load_entries([key], max_age_seconds, subdirectory, allow_stale=False, negatives=negatives)
+        if key in entries:
+            return entries[key][0], None
+        return None, negatives.get(key)
+
+    async def _load_entry(
+        self, key: str, max_age_seconds: int | None, subdirectory: str | None, allow_stale: bool
+    ) -> tuple[dict, float | None, bool] | None:
+        """
+        读取单个缓存条目
+
+        Returns:
+            (数据, 缓存时间戳, 是否过期) 或 None
+        """
+        entries = await self._load_entries([key], max_age_seconds, subdirectory, allow_stale)
+        return entries.get(key)
+
+    @timed_phase("cache")
+    async def _load_entries(
+        self,
+        keys: list[str],
+        max_age_seconds: int | None,
+        subdirectory: str | None,
+        allow_stale: bool,
+        negatives: dict[str, str] | None = None,
+    ) -> dict[str, tuple[dict, float | None, bool]]:
+        """
+        批量读取缓存条目，L1 未命中的键通过一个 pipeline 从 Redis 取回
+
+        负缓存条目不会出现在结果中；传入 negatives 时记录为 {缓存键: 原因}
+
+        Returns:
+            {缓存键: (数据, 缓存时间戳, 是否过期)}，未命中的键不出现在结果中
         """
         if not self._connected:
             logger.warning("Redis 未连接，返回 None")
-            return None
+            return {}
 
-        cache_key = self._get_cache_key(key, subdirectory)
+        results = {}
+        current_time = time.time()
+        self._record_access(keys, subdirectory)
+
+        # 第0层：进程内 L1 缓存（只保存未过期的条目）
+        use_l1 = self.l1 is not None and self.l1.is_enabled_for(subdirectory)
+        pending = []
+        for key in dict.fromkeys(keys):
+            if use_l1:
+                entry = self.l1.get(key, subdirectory)
+                if entry is not None:
+                    cache_timestamp, cached_value = entry
+                    if (
+                        max_age_seconds is None
+                        or cache_timestamp is None
+                        or current_time - cache_timestamp <= max_age_seconds
+                    ):
+                        results[key] = (cached_value, cache_timestamp, False)
+                        continue
+                    self.l1.invalidate(key=key, subdirectory=subdirectory)
+            pending.append(key)
 
+        if not pending:
+            return results
+
+        group = self._get_metrics_group(subdirectory)
+        cache_keys = [self._get_cache_key(key, subdirectory) for key in pending]
+        started = time.perf_counter()
         try:
-            # 获取数据
-            data = await self.redis_client.get(cache_key)
+            # 获取数据（启用 L1 时同一往返内取回剩余 TTL）
+            if len(pending) == 1 and not use_l1:
+                raw_values = [await self.redis_client.execute_command("GET", cache_keys[0], **RAW_RESPONSE)]
+                remaining_ttls = [None]
+            else:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for cache_key in cache_keys:
+                    pipe.execute_command("GET", cache_key, **RAW_RESPONSE)
+                    if use_l1:
+                        pipe.ttl(cache_key)
+                replies = await pipe.execute()
+                if use_l1:
+                    raw_values, remaining_ttls = replies[0::2], replies[1::2]
+                else:
+                    raw_values, remaining_ttls = replies, [None] * len(replies)
+        except RedisError as e:
+            self.metrics.incr(group, "redis_errors")
+            logger.error(f"加载缓存失败 {', '.join(cache_keys[:3])}: {e}")
+            return results
+        self.metrics.observe(group, "redis_read_ms", (time.perf_counter() - started) * 1000)
+
+        expired_keys = []
+        for key, cache_key, data, remaining_ttl in zip(pending, cache_keys, raw_values, remaining_ttls):
             if data is None:
-                return None
+                self.metrics.incr(group, "redis_misses")
+                continue
+
+            # 解码（兼容旧版 JSON 文本）
+            started = time.perf_counter()
+            try:
+                cache_data = CacheCodec.decode(data)
+            except CacheCodecError as e:
+                self.metrics.incr(group, "decode_errors")
+                logger.error(f"加载缓存失败 {cache_key}: {e}")
+                continue
+            self.metrics.observe(group, "decode_ms", (time.perf_counter() - started) * 1000)
+            self.metrics.observe(group, "value_bytes", len(data), SIZE_BUCKETS_BYTES)
 
-            # 解析 JSON
-            cache_data = json.loads(data)
+            timestamp = None
+            soft_expires_at = None
+            if isinstance(cache_data, dict):
+                timestamp = cache_data.get("timestamp")
+                soft_expires_at = cache_data.get("soft_expires_at")
+
+                # 负缓存：对普通读取而言等同于未命中
+                negative = cache_data.get("negative")
+                if negative:
+                    self.metrics.incr(group, "negative_hits")
+                    if negatives is not None:
+                        negatives[key] = negative
+                    continue
+
+            is_stale = soft_expires_at is not None and current_time > soft_expires_at
 
             # 检查应用级过期时间（如果指定了 max_age_seconds）
-            if max_age_seconds is not None and isinstance(cache_data, dict) and "timestamp" in cache_data:
-                cache_timestamp = cache_data["timestamp"]
-                current_time = time.time()
-                cache_age = current_time - cache_timestamp
+            if max_age_seconds is not None and timestamp is not None:
+                cache_age = current_time - timestamp
 
                 if cache_age > max_age_seconds:
-                    logger.debug(f"缓存已过期 {cache_key}，缓存年龄: {cache_age:.1f}s > {max_age_seconds}s")
-                    # 删除过期的缓存
-                    await self.redis_client.delete(cache_key)
-                    return None
+                    if soft_expires_at is None:
+                        logger.debug(f"缓存已过期 {cache_key}，缓存年龄: {cache_age:.1f}s > {max_age_seconds}s")
+                        expired_keys.append(cache_key)
+                        self.metrics.incr(group, "redis_misses")
+                        continue
+                    # SWR 条目保留到硬 TTL，供后台刷新期间返回
+                    is_stale = True
+
+            if is_stale and not allow_stale:
+                self.metrics.incr(group, "redis_misses")
+                continue
+            self.metrics.incr(group, "redis_stale" if is_stale else "redis_hits")
 
             # 为了兼容性，保持返回数据格式
             # 原 CacheManager 返回的是 data 字段的内容
             if isinstance(cache_data, dict) and "data" in cache_data:
-                return cache_data["data"]
-            return cache_data
+                value = cache_data["data"]
+            else:
+                value = cache_data
 
-        except (json.JSONDecodeError, RedisError) as e:
-            logger.error(f"加载缓存失败 {cache_key}: {e}")
-            return None
+            if use_l1 and not is_stale:
+                l1_ttl = remaining_ttl if remaining_ttl and remaining_ttl > 0 else None
+                if soft_expires_at is not None:
+                    soft_remaining = soft_expires_at - current_time
+                    l1_ttl = soft_remaining if l1_ttl is None else min(l1_ttl, soft_remaining)
+                self.l1.set(key, value, timestamp, subdirectory, l1_ttl)
+
+            results[key] = (value, timestamp, is_stale)
+
+        if expired_keys:
+            # 删除过期的缓存
+            try:
+                await self.redis_client.delete(*expired_keys)
+            except RedisError as e:
+                logger.warning(f"删除过期缓存失败: {e}")
+
+        return results
+
+    async def load_many(
+        self, keys: list[str], subdirectory: str | None = None, max_age_seconds: int | None = None
+    ) -> dict[str, tuple[dict, float | None]]:
+        """
+        批量加载缓存（一次 Redis 往返），同时返回缓存时间戳
+
+        Args:
+            keys: 缓存键列表
+            subdirectory: 子目录
+            max_age_seconds: 最大缓存时间（秒），语义同 load_cache
+
+        Returns:
+            {缓存键: (数据, 缓存时间戳)}，未命中的键不出现在结果中
+        """
+        entries = await self._load_entries(keys, max_age_seconds, subdirectory, allow_stale=False)
+        return {key: (value, timestamp) for key, (value, timestamp, _) in entries.items()}
+
+    def _encode_entry(self, key: str, data: dict, subdirectory: str | None, ttl: int | None) -> tuple[bytes, int, int]:
+        """
+        构造并编码缓存条目
+
+        Returns:
+            (编码后的值, Redis 过期时间, 编码前字节数)
+        """
+        # 如果传入了ttl就用传入的，否则用自动计算的
+        if ttl is None:
+            ttl = self._get_ttl_for_subdirectory(subdirectory, key)
+
+        # 为了兼容性，保持数据格式
+        now = time.time()
+        cache_data = {"timestamp": now, "data": data}
+
+        # SWR：ttl 作为软 TTL 写入条目，Redis 中保留到硬 TTL
+        stale_ttl = self._get_stale_ttl_for_subdirectory(subdirectory)
+        if stale_ttl > 0:
+            cache_data["soft_expires_at"] = now + ttl
+
+        if self.codec:
+            value, raw_size = self.codec.encode(cache_data)
+        else:
+            value = json.dumps(cache_data, ensure_ascii=False).encode("utf-8")
+            raw_size = len(value)
+
+        return value, ttl + stale_ttl, raw_size
 
+    @timed_phase("cache")
     async def save_cache(self, key: str, data: dict, subdirectory: str | None = None, ttl: int | None = None):
         """
         保存数据到缓存，保持与 CacheManager 相同的接口
@@ -207,22 +533,149 @@ class RedisCacheManager:
             return
 
         cache_key = self._get_cache_key(key, subdirectory)
-        # 如果传入了ttl就用传入的，否则用自动计算的
-        if ttl is None:
-            ttl = self._get_ttl_for_subdirectory(subdirectory, key)
 
         try:
-            # 为了兼容性，保持数据格式
-            cache_data = {"timestamp": time.time(), "data": data}
+            value, redis_ttl, raw_size = self._encode_entry(key, data, subdirectory, ttl)
+
+            # 保存到 Redis，设置过期时间，并登记到子目录索引
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, redis_ttl, value)
+            self._add_to_index(pipe, subdirectory, [cache_key], redis_ttl)
+            started = time.perf_counter()
+            await pipe.execute()
+            self.metrics.observe(
+                self._get_metrics_group(subdirectory), "redis_write_ms", (time.perf_counter() - started) * 1000
+            )
+            self._record_size(subdirectory, raw_size, len(value))
+            self._maybe_prune_index(subdirectory)
 
-            # 保存到 Redis，设置过期时间
-            await self.redis_client.setex(cache_key, ttl, json.dumps(cache_data, ensure_ascii=False))
+            logger.debug(f"缓存已保存 {cache_key}，TTL: {redis_ttl}秒")
 
-            logger.debug(f"缓存已保存 {cache_key}，TTL: {ttl}秒")
+            # 失效本地及其他实例的 L1 条目
+            if self.l1 and self.l1.is_enabled_for(subdirectory):
+                self.l1.invalidate(key=key, subdirectory=subdirectory)
+                await self._publish_invalidation(key=key, subdirectory=subdirectory)
 
         except (RedisError, TypeError, ValueError) as e:
             logger.error(f"保存缓存失败 {cache_key}: {e}")
 
+    @timed_phase("cache")
+    async def save_negative(
+        self, key: str, subdirectory: str | None = None, reason: str = NEGATIVE_NOT_FOUND, ttl: int | None = None
+    ):
+        """
+        写入负缓存，在短时间内阻止对同一个注定失败的查询重复请求上游
+
+        NEGATIVE_NOT_FOUND 会覆盖已有条目（上游已确认不存在）；NEGATIVE_ERROR
+        只在键不存在时写入，暂时性错误不会覆盖仍可使用的过期数据
+
+        Args:
+            key: 缓存键
+            subdirectory: 子目录
+            reason: NEGATIVE_NOT_FOUND 或 NEGATIVE_ERROR
+            ttl: 可选的过期时间（秒），默认按原因使用 CACHE_NEGATIVE_TTL / CACHE_NEGATIVE_ERROR_TTL
+        """
+        if not self._connected:
+            return
+
+        if ttl is None:
+            if reason == NEGATIVE_ERROR:
+                ttl = self.config.cache_negative_error_ttl
+            else:
+                ttl = self.config.cache_negative_ttl
+        if ttl <= 0:
+            return
+
+        cache_key = self._get_cache_key(key, subdirectory)
+        cache_data = {"timestamp": time.time(), "data": None, "negative": reason}
+
+        try:
+            if self.codec:
+                value, _ = self.codec.encode(cache_data)
+            else:
+                value = json.dumps(cache_data).encode("utf-8")
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(cache_key, value, ex=ttl, nx=reason == NEGATIVE_ERROR)
+            self._add_to_index(pipe, subdirectory, [cache_key], ttl)
+            replies = await pipe.execute()
+        except (RedisError, TypeError, ValueError) as e:
+            logger.error(f"保存负缓存失败 {cache_key}: {e}")
+            return
+
+        if not replies[0]:
+            return
+        self.metrics.incr(self._get_metrics_group(subdirectory), "negative_writes")
+        logger.debug(f"负缓存已保存 {cache_key}（{reason}），TTL: {ttl}秒")
+
+        # 失效本地及其他实例的 L1 条目
+        if self.l1 and self.l1.is_enabled_for(subdirectory):
+            self.l1.invalidate(key=key, subdirectory=subdirectory)
+            await self._publish_invalidation(key=key, subdirectory=subdirectory)
+
+    @timed_phase("cache")
+    async def save_many(self, items: dict[str, dict], subdirectory: str | None = None, ttl: int | None = None) -> int:
+        """
+        批量保存缓存（一个 pipeline 内完成所有 SETEX）
+
+        Args:
+            items: {缓存键: 数据}
+            subdirectory: 子目录
+            ttl: 可选的过期时间（秒），如果不指定则按每个键使用默认TTL
+
+        Returns:
+            成功写入的条目数
+        """
+        if not self._connected:
+            logger.warning("Redis 未连接，无法保存缓存")
+            return 0
+        if not items:
+            return 0
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        written = []
+        max_ttl = 0
+        for key, data in items.items():
+            try:
+                value, redis_ttl, raw_size = self._encode_entry(key, data, subdirectory, ttl)
+            except (TypeError, ValueError) as e:
+                logger.error(f"保存缓存失败 {self._get_cache_key(key, subdirectory)}: {e}")
+                continue
+            pipe.setex(self._get_cache_key(key, subdirectory), redis_ttl, value)
+            written.append((key, raw_size, len(value)))
+            max_ttl = max(max_ttl, redis_ttl)
+
+        if not written:
+            return 0
+        self._add_to_index(
+            pipe, subdirectory, [self._get_cache_key(key, subdirectory) for key, _, _ in written], max_ttl
+        )
+
+        started = time.perf_counter()
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            self.metrics.incr(self._get_metrics_group(subdirectory), "redis_errors")
+            logger.error(f"批量保存缓存失败 ({subdirectory}, {len(written)} 个键): {e}")
+            return 0
+
+        self.metrics.observe(
+            self._get_metrics_group(subdirectory), "redis_write_ms", (time.perf_counter() - started) * 1000
+        )
+        for _, raw_size, stored_size in written:
+            self._record_size(subdirectory, raw_size, stored_size)
+        self._maybe_prune_index(subdirectory, len(written))
+        logger.debug(f"批量保存缓存 {len(written)} 个键，子目录: {subdirectory}")
+
+        # 失效本地及其他实例的 L1 条目
+        if self.l1 and self.l1.is_enabled_for(subdirectory):
+            keys = [key for key, _, _ in written]
+            for key in keys:
+                self.l1.invalidate(key=key, subdirectory=subdirectory)
+            await self._publish_invalidation(keys=keys, subdirectory=subdirectory)
+
+        return len(written)
+
     async def clear_cache(self, key: str | None = None, key_prefix: str | None = None, subdirectory: str | None = None):
         """
         清除缓存，保持与 CacheManager 相同的接口
@@ -236,17 +689,24 @@ class RedisCacheManager:
             logger.warning("Redis 未连接，无法清除缓存")
             return
 
+        # 先失效 L1，避免清除期间继续返回旧数据
+        if self.l1 and (subdirectory is None or self.l1.is_enabled_for(subdirectory)):
+            self.l1.invalidate(key=key, key_prefix=key_prefix, subdirectory=subdirectory)
+            await self._publish_invalidation(key=key, key_prefix=key_prefix, subdirectory=subdirectory)
+
         try:
             # 场景1：清除整个子目录
             if subdirectory and not key and not key_prefix:
-                pattern = f"cache:{subdirectory}:*"
-                await self._delete_by_pattern(pattern)
-                logger.info(f"已清除子目录缓存: {subdirectory}")
+                deleted = await self._unlink_index(subdirectory)
+                logger.info(f"已清除子目录缓存: {subdirectory}，共 {deleted} 个键")
 
             # 场景2：清除特定键
             elif key:
                 cache_key = self._get_cache_key(key, subdirectory)
-                result = await self.redis_client.delete(cache_key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.unlink(cache_key)
+                pipe.srem(self._get_index_key(subdirectory), cache_key)
+                result, _ = await pipe.execute()
                 if result:
                     logger.info(f"已清除缓存: {cache_key}")
                 else:
@@ -254,33 +714,472 @@ class RedisCacheManager:
 
             # 场景3：按前缀清除
             elif key_prefix:
-                pattern = f"cache:{subdirectory}:{key_prefix}*" if subdirectory else f"cache:{key_prefix}*"
-                await self._delete_by_pattern(pattern)
-                logger.info(f"已清除前缀缓存: {pattern}")
+                prefix = f"cache:{subdirectory}:{key_prefix}" if subdirectory else f"cache:{key_prefix}"
+                match = self._escape_glob(prefix) + "*"
+                # 不指定子目录时前缀可能跨子目录（与原 SCAN 模式语义一致）
+                index_names = [subdirectory] if subdirectory else await self._get_index_names()
+                deleted = 0
+                for index_name in index_names:
+                    deleted += await self._unlink_index_members(self._get_index_key(index_name), match)
+                logger.info(f"已清除前缀缓存: {prefix}*，共 {deleted} 个键")
 
             # 场景4：清除所有缓存（根目录）
             elif not subdirectory:
-                pattern = "cache:*"
-                await self._delete_by_pattern(pattern)
-                logger.info("已清除所有缓存")
+                deleted = 0
+                for index_name in await self._get_index_names():
+                    deleted += await self._unlink_index(index_name)
+                logger.info(f"已清除所有缓存，共 {deleted} 个键")
 
         except RedisError as e:
             logger.error(f"清除缓存失败: {e}")
 
-    async def _delete_by_pattern(self, pattern: str):
-        """通过模式删除键"""
+    # ===== 键索引 =====
+
+    @staticmethod
+    def _get_index_name(subdirectory: str | None) -> str:
+        return subdirectory or ROOT_SUBDIRECTORY
+
+    def _get_index_key(self, subdirectory: str | None) -> str:
+        """子目录索引 Set 的键名（独立命名空间，不会被 cache:* 匹配）"""
+        return f"{CACHE_INDEX_PREFIX}{self._get_index_name(subdirectory)}"
+
+    @staticmethod
+    def _escape_glob(text: str) -> str:
+        """转义 MATCH 模式中的通配符"""
+        for char in "\\*?[]":
+            text = text.replace(char, "\\" + char)
+        return text
+
+    def _spawn(self, coro):
+        """启动后台任务并保持引用"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    def _add_to_index(self, pipe, subdirectory: str | None, cache_keys: list[str], ttl: int):
+        """
+        在 pipeline 中登记缓存键到子目录索引
+
+        索引的过期时间只会延长（NX + GT），保证不早于其中最晚过期的键，
+        长期没有写入的子目录索引会随之自动消失
+        """
+        index_key = self._get_index_key(subdirectory)
+        pipe.sadd(index_key, *cache_keys)
+        pipe.expire(index_key, ttl, nx=True)
+        pipe.expire(index_key, ttl, gt=True)
+        pipe.sadd(CACHE_INDEX_REGISTRY, self._get_index_name(subdirectory))
+
+    def _maybe_prune_index(self, subdirectory: str | None, writes: int = 1):
+        """写入累计达到阈值时在后台清理索引中已过期的键"""
+        index_name = self._get_index_name(subdirectory)
+        count = self._index_writes.get(index_name, 0) + writes
+        if count < INDEX_PRUNE_EVERY:
+            self._index_writes[index_name] = count
+            return
+        self._index_writes[index_name] = 0
+        self._spawn(self.prune_index(subdirectory))
+
+    async def _get_index_names(self) -> list[str]:
+        return list(await self.redis_client.smembers(CACHE_INDEX_REGISTRY))
+
+    async def prune_index(self, subdirectory: str | None = None) -> int:
+        """
+        从子目录索引中移除已过期（不存在）的键
+
+        Returns:
+            移除的索引条目数
+        """
+        index_key = self._get_index_key(subdirectory)
+        removed = 0
+        try:
+            cursor = 0
+            while True:
+                cursor, members = await self.redis_client.sscan(index_key, cursor, count=UNLINK_BATCH_SIZE)
+                if members:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for member in members:
+                        pipe.exists(member)
+                    exists = await pipe.execute()
+                    missing = [member for member, alive in zip(members, exists) if not alive]
+                    if missing:
+                        removed += await self.redis_client.srem(index_key, *missing)
+                if cursor == 0:
+                    break
+        except RedisError as e:
+            logger.warning(f"清理缓存索引失败 {index_key}: {e}")
+
+        if removed:
+            logger.debug(f"缓存索引 {index_key} 移除了 {removed} 个已过期的键")
+        return removed
+
+    async def _unlink_index(self, subdirectory: str | None) -> int:
+        """删除子目录索引中的所有键以及索引本身"""
+        index_key = self._get_index_key(subdirectory)
+        # 先把索引改名，清除期间的新写入会进入新的索引，不会被误删或漏登记
+        clearing_key = f"{index_key}:clearing:{uuid.uuid4().hex}"
+        try:
+            await self.redis_client.rename(index_key, clearing_key)
+        except ResponseError:
+            # 索引不存在（子目录没有缓存）
+            return 0
+
+        deleted = await self._unlink_index_members(clearing_key, remove_from_index=False)
+        await self.redis_client.unlink(clearing_key)
+        return deleted
+
+    async def _unlink_index_members(
+        self, index_key: str, match: str | None = None, remove_from_index: bool = True
+    ) -> int:
+        """
+        分批 UNLINK 索引中（匹配 match 的）键，每批在一个 pipeline 内完成
+
+        Returns:
+            实际删除的键数
+        """
+        deleted = 0
         cursor = 0
-        deleted_count = 0
         while True:
-            cursor, keys = await self.redis_client.scan(cursor, match=pattern, count=100)
-            if keys:
-                deleted_count += len(keys)
-                await self.redis_client.delete(*keys)
-                logger.debug(f"删除了 {len(keys)} 个缓存键，匹配模式: {pattern}")
+            cursor, members = await self.redis_client.sscan(index_key, cursor, match=match, count=UNLINK_BATCH_SIZE)
+            if members:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.unlink(*members)
+                if remove_from_index:
+                    pipe.srem(index_key, *members)
+                replies = await pipe.execute()
+                deleted += replies[0]
+                logger.debug(f"删除了 {replies[0]} 个缓存键，索引: {index_key}")
             if cursor == 0:
                 break
+        return deleted
+
+    async def _get_known_subdirectories(self) -> list[str]:
+        """
+        获取所有已知子目录（按长度倒序，便于最长前缀匹配）
+
+        包括配置了 TTL、L1、SWR、预热的子目录，以及已经登记过索引的子目录
+        """
+        names = set(self._get_ttl_mapping()) | EXTRA_CACHE_SUBDIRECTORIES
+        names.update(self.config.cache_l1_subdirectories)
+        names.update(self.config.cache_swr_grace_periods)
+        names.update(self.config.cache_warm_top_n)
+        names.update(await self._get_index_names())
+        names.discard(ROOT_SUBDIRECTORY)
+        return sorted(names, key=len, reverse=True)
+
+    @staticmethod
+    def _match_subdirectory(cache_key: str, subdirectories: list[str]) -> str | None:
+        """
+        根据已知子目录识别缓存键所属的子目录，无法匹配时视为根目录的键
+
+        不能直接取键的第一段：根目录的键本身也可能包含 ":"
+        """
+        name = cache_key.removeprefix("cache:")
+        for subdirectory in subdirectories:
+            if name.startswith(f"{subdirectory}:"):
+                return subdirectory
+        return None
+
+    async def _backfill_indexes(self):
+        """为启用键索引前写入的缓存补建索引（一次性 SCAN，由首个启动的实例执行）"""
+        try:
+            if not await self.redis_client.set(CACHE_INDEX_BACKFILL_MARKER, int(time.time()), nx=True):
+                return
+
+            logger.info("🔄 开始为已有缓存建立键索引...")
+            subdirectories = await self._get_known_subdirectories()
+            indexed = 0
+            cursor = 0
+            while True:
+                cursor, keys = await self.redis_client.scan(cursor, match="cache:*", count=1000)
+                if keys:
+                    ttl_pipe = self.redis_client.pipeline(transaction=False)
+                    for cache_key in keys:
+                        ttl_pipe.ttl(cache_key)
+                    ttls = await ttl_pipe.execute()
+
+                    groups: dict[str | None, tuple[list[str], int]] = {}
+                    for cache_key, ttl in zip(keys, ttls):
+                        if ttl is None or ttl < 0:
+                            continue
+                        subdirectory = self._match_subdirectory(cache_key, subdirectories)
+                        members, max_ttl = groups.get(subdirectory, ([], 0))
+                        members.append(cache_key)
+                        groups[subdirectory] = (members, max(max_ttl, ttl))
+
+                    if groups:
+                        pipe = self.redis_client.pipeline(transaction=False)
+                        for subdirectory, (members, max_ttl) in groups.items():
+                            self._add_to_index(pipe, subdirectory, members, max_ttl)
+                            indexed += len(members)
+                        await pipe.execute()
+                if cursor == 0:
+                    break
+
+            logger.info(f"✅ 缓存键索引建立完成: {indexed} 个键")
+        except asyncio.CancelledError:
+            raise
+        except RedisError as e:
+            # 允许下次启动重试
+            logger.error(f"建立缓存键索引失败: {e}")
+            try:
+                await self.redis_client.delete(CACHE_INDEX_BACKFILL_MARKER)
+            except RedisError as marker_error:
+                logger.warning(f"重置缓存索引标记失败: {marker_error}")
+
+    async def _publish_invalidation(
+        self,
+        key: str | None = None,
+        key_prefix: str | None = None,
+        subdirectory: str | None = None,
+        keys: list[str] | None = None,
+    ):
+        """广播 L1 失效通知给其他实例（keys 用于批量写入后一次性通知）"""
+        message = {
+            "origin": self._instance_id,
+            "key": key,
+            "key_prefix": key_prefix,
+            "subdirectory": subdirectory,
+        }
+        if keys:
+            message["keys"] = keys
+        try:
+            await self.redis_client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(message))
+        except RedisError as e:
+            logger.warning(f"发布L1失效通知失败: {e}")
+
+    async def _invalidation_listener(self):
+        """订阅 L1 失效通知（断线后自动重连）"""
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                # 订阅（重新）建立前可能错过通知，清空 L1 保证一致性
+                self.l1.invalidate()
+                logger.debug("L1 失效通知订阅已建立")
+
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        payload = json.loads(message["data"])
+                    except (json.JSONDecodeError, TypeError):
+                        continue
+                    if payload.get("origin") == self._instance_id:
+                        continue
+                    if payload.get("keys"):
+                        for key in payload["keys"]:
+                            self.l1.invalidate(key=key, subdirectory=payload.get("subdirectory"))
+                        continue
+                    self.l1.invalidate(
+                        key=payload.get("key"),
+                        key_prefix=payload.get("key_prefix"),
+                        subdirectory=payload.get("subdirectory"),
+                    )
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"L1 失效通知订阅中断，5秒后重连: {e}")
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception as e:
+                    logger.debug(f"关闭 pubsub 连接失败: {e}")
+
+    def _record_access(self, keys: list[str], subdirectory: str | None):
+        """按采样率记录键的访问（仅限参与预热的子目录），由后台任务批量写入 Redis"""
+        if not self.config.cache_warm_enabled or subdirectory not in self.config.cache_warm_top_n:
+            return
+
+        sample_every = max(1, self.config.cache_popularity_sample_every)
+        counts = None
+        for key in keys:
+            if sample_every > 1 and random.random() * sample_every >= 1:
+                continue
+            if counts is None:
+                counts = self._popularity_counts.setdefault(subdirectory, {})
+            counts[key] = counts.get(key, 0) + sample_every
+
+    async def _flush_popularity(self):
+        """将本地采样计数写入 Redis"""
+        if not self._popularity_counts or not self._connected:
+            return
+
+        pending, self._popularity_counts = self._popularity_counts, {}
+        pipe = self.redis_client.pipeline(transaction=False)
+        for subdirectory, counts in pending.items():
+            popularity_key = f"{CACHE_POPULARITY_PREFIX}{subdirectory}"
+            for key, count in counts.items():
+                pipe.zincrby(popularity_key, count, key)
+            pipe.expire(popularity_key, POPULARITY_TTL)
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"写入访问热度失败: {e}")
+
+    async def _popularity_flusher(self):
+        """定期写入访问热度"""
+        while True:
+            try:
+                await asyncio.sleep(POPULARITY_FLUSH_INTERVAL)
+                await self._flush_popularity()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"访问热度写入任务异常: {e}")
+
+    async def get_popular_keys(self, subdirectory: str, top_n: int) -> list[tuple[str, float]]:
+        """获取子目录中访问最多的键 [(缓存键, 热度)]"""
+        if not self._connected or top_n <= 0:
+            return []
+        return await self.redis_client.zrevrange(
+            f"{CACHE_POPULARITY_PREFIX}{subdirectory}", 0, top_n - 1, withscores=True
+        )
+
+    async def decay_popularity(self, subdirectory: str, keep: int):
+        """衰减子目录的访问热度，并只保留排名前 keep 的键"""
+        popularity_key = f"{CACHE_POPULARITY_PREFIX}{subdirectory}"
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zunionstore(popularity_key, {popularity_key: POPULARITY_DECAY})
+        pipe.zremrangebyrank(popularity_key, 0, -(keep + 1))
+        pipe.expire(popularity_key, POPULARITY_TTL)
+        await pipe.execute()
+
+    async def get_remaining_freshness(self, keys: list[str], subdirectory: str) -> dict[str, float]:
+        """
+        获取键距失效的剩余秒数（一次 pipeline）
+
+        读取方按 max_age_seconds 判断过期并删除条目，因此以条目中的写入时间戳加上注册预热时
+        提供的 max_age 为准，同时不晚于软过期时间和 Redis TTL（SWR 子目录扣除宽限期）。
+        已失效的键返回负数；不存在的键和负缓存条目不出现在结果中
+        """
+        if not keys or not self._connected:
+            return {}
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            cache_key = self._get_cache_key(key, subdirectory)
+            pipe.execute_command("GET", cache_key, **RAW_RESPONSE)
+            pipe.ttl(cache_key)
+        replies = await pipe.execute()
+
+        now = time.time()
+        stale_ttl = self._get_stale_ttl_for_subdirectory(subdirectory)
+        result = {}
+        for key, raw_value, ttl in zip(keys, replies[0::2], replies[1::2]):
+            if raw_value is None:
+                continue
+            try:
+                cache_data = CacheCodec.decode(raw_value)
+            except CacheCodecError as e:
+                logger.debug(f"读取缓存新鲜度失败 {subdirectory}/{key}: {e}")
+                continue
+
+            bounds = [ttl - stale_ttl] if ttl is not None and ttl >= 0 else []
+            if isinstance(cache_data, dict):
+                if cache_data.get("negative"):
+                    continue
+                timestamp = cache_data.get("timestamp")
+                max_age = self._find_warm_entry(subdirectory, key)[2]
+                if timestamp is not None and max_age is not None:
+                    bounds.append(timestamp + max_age - now)
+                if cache_data.get("soft_expires_at") is not None:
+                    bounds.append(cache_data["soft_expires_at"] - now)
+            if bounds:
+                result[key] = min(bounds)
+        return result
+
+    def register_warm_fetcher(
+        self,
+        subdirectory: str,
+        fetcher: Callable[[str], Awaitable[bool]],
+        key_prefix: str = "",
+        max_age_seconds: int | None = None,
+    ):
+        """
+        注册缓存预热 fetcher
 
-        logger.info(f"总共删除了 {deleted_count} 个缓存键，匹配模式: {pattern}")
+        Args:
+            subdirectory: 子目录
+            fetcher: async fetcher(key) -> bool，重新获取数据并写入缓存，成功返回 True
+            key_prefix: 只处理以此开头的键，同一子目录有多个 fetcher 时按最长前缀匹配
+            max_age_seconds: 读取这些键时使用的 max_age_seconds，预热据此判断条目何时失效
+                （None 表示读取方不限制缓存年龄，仅由 TTL 决定）
+        """
+        fetchers = self._warm_fetchers.setdefault(subdirectory, [])
+        fetchers[:] = [entry for entry in fetchers if entry[0] != key_prefix]
+        fetchers.append((key_prefix, fetcher, max_age_seconds))
+        fetchers.sort(key=lambda entry: len(entry[0]), reverse=True)
+        logger.debug(f"已注册缓存预热: {subdirectory}/{key_prefix or '*'}")
+
+    def _find_warm_entry(
+        self, subdirectory: str, key: str
+    ) -> tuple[str, Callable[[str], Awaitable[bool]], int | None] | tuple[None, None, None]:
+        """查找负责该键的预热注册项 (key_prefix, fetcher, max_age_seconds)"""
+        for entry in self._warm_fetchers.get(subdirectory, ()):
+            if key.startswith(entry[0]):
+                return entry
+        return None, None, None
+
+    def get_warm_fetcher(self, subdirectory: str, key: str) -> Callable[[str], Awaitable[bool]] | None:
+        """查找负责该键的预热 fetcher"""
+        return self._find_warm_entry(subdirectory, key)[1]
+
+    def get_warm_subdirectories(self) -> list[str]:
+        """获取已注册预热 fetcher 的子目录"""
+        return list(self._warm_fetchers)
+
+    @staticmethod
+    def _get_metrics_group(subdirectory: str | None) -> str:
+        return subdirectory or ROOT_SUBDIRECTORY
+
+    def _record_size(self, subdirectory: str | None, raw_size: int, stored_size: int):
+        group = self._get_metrics_group(subdirectory)
+        self.metrics.incr(group, "writes")
+        self.metrics.incr(group, "raw_bytes", raw_size)
+        self.metrics.incr(group, "stored_bytes", stored_size)
+        self.metrics.observe(group, "write_bytes", stored_size, SIZE_BUCKETS_BYTES)
+
+    def get_size_stats(self) -> dict[str, dict[str, int]]:
+        """获取每个子目录写入的字节数（编码压缩前 / 实际存储）"""
+        result = {}
+        for group in self.metrics.groups():
+            counters = self.metrics.get_counters(group)
+            if counters.get("writes"):
+                result[group] = {name: counters.get(name, 0) for name in ("writes", "raw_bytes", "stored_bytes")}
+        return result
+
+    def record_swr_refresh(self, subdirectory: str | None, success: bool):
+        """记录一次 SWR 后台刷新结果"""
+        self.metrics.incr(self._get_metrics_group(subdirectory), "swr_refreshes" if success else "swr_refresh_failures")
+
+    def get_swr_stats(self) -> dict[str, dict[str, int]]:
+        """获取每个子目录返回过期数据及后台刷新的次数"""
+        result = {}
+        for group in self.metrics.groups():
+            counters = self.metrics.get_counters(group)
+            stats = {
+                "stale_served": counters.get("redis_stale", 0),
+                "refreshes": counters.get("swr_refreshes", 0),
+                "refresh_failures": counters.get("swr_refresh_failures", 0),
+            }
+            if any(stats.values()):
+                result[group] = stats
+        return result
+
+    def get_metrics_snapshot(self) -> dict:
+        """获取全部缓存指标的 JSON 快照（各子目录计数器、直方图及 L1 统计）"""
+        snapshot = self.metrics.snapshot()
+        snapshot["l1"] = self.get_l1_stats()
+        return snapshot
+
+    def get_l1_stats(self) -> dict[str, dict]:
+        """获取 L1 缓存每个子目录的命中统计"""
+        if not self.l1:
+            return {}
+        return self.l1.get_stats()
 
     async def get_cache_timestamp(self, key: str, subdirectory: str | None = None) -> float | None:
         """获取缓存的时间戳，保持兼容性"""
@@ -290,12 +1189,14 @@ class RedisCacheManager:
         cache_key = self._get_cache_key(key, subdirectory)
 
         try:
-            data = await self.redis_client.get(cache_key)
+            data = await self.redis_client.execute_command("GET", cache_key, **RAW_RESPONSE)
             if data:
-                cache_data = json.loads(data)
+                cache_data = CacheCodec.decode(data)
+                if cache_data.get("negative"):
+                    return None
                 return cache_data.get("timestamp")
             return None
-        except (json.JSONDecodeError, RedisError) as e:
+        except (CacheCodecError, RedisError) as e:
             logger.error(f"获取时间戳失败 {cache_key}: {e}")
             return None
 
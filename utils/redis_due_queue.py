@@ -0,0 +1,157 @@
+"""
+Redis 到期队列
+- 到期时间保存在 ZSET（分数为时间戳），任务数据保存在 HASH
+- 写入与领取都通过 Lua 脚本原子完成：领取时从 ZSET 中移除，多实例不会重复处理
+- 新任务成为最早到期的任务时发布通知，工作器按最早到期时间休眠、收到通知提前唤醒，
+  空闲时不再每秒轮询 Redis
+"""
+
+import asyncio
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# 兜底唤醒间隔（秒）：订阅中断等情况下漏掉通知时，最迟在该时间后重新检查
+MAX_IDLE_WAIT = 60
+
+# KEYS[1] 调度 ZSET, KEYS[2] 数据 HASH; ARGV: 成员, 到期时间, 数据, 通知频道
+_SCHEDULE_SCRIPT = """
+redis.call("HSET", KEYS[2], ARGV[1], ARGV[3])
+redis.call("ZADD", KEYS[1], ARGV[2], ARGV[1])
+local first = redis.call("ZRANGE", KEYS[1], 0, 0)
+if first[1] == ARGV[1] then
+    redis.call("PUBLISH", ARGV[4], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# KEYS[1] 调度 ZSET, KEYS[2] 数据 HASH; ARGV: 当前时间, 最多领取数, 是否同时取出并删除数据
+# 返回 [下一个到期时间或 "", 成员1, (数据1), 成员2, (数据2), ...]
+_CLAIM_SCRIPT = """
+local members = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, tonumber(ARGV[2]))
+local result = {""}
+if #members > 0 then
+    redis.call("ZREM", KEYS[1], unpack(members))
+    for _, member in ipairs(members) do
+        result[#result + 1] = member
+        if ARGV[3] == "1" then
+            result[#result + 1] = redis.call("HGET", KEYS[2], member) or ""
+        end
+    end
+    if ARGV[3] == "1" then
+        redis.call("HDEL", KEYS[2], unpack(members))
+    end
+end
+local next_due = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+if next_due[2] then
+    result[1] = next_due[2]
+end
+return result
+"""
+
+
+class RedisDueQueue:
+    """基于 ZSET 的到期队列"""
+
+    def __init__(self, redis_client, schedule_key: str, data_key: str, channel: str, name: str):
+        """
+        Args:
+            redis_client: redis.asyncio 客户端（decode_responses=True）
+            schedule_key: 到期时间 ZSET
+            data_key: 任务数据 HASH
+            channel: 唤醒通知频道
+            name: 日志中显示的名称
+        """
+        self.redis = redis_client
+        self.schedule_key = schedule_key
+        self.data_key = data_key
+        self.channel = channel
+        self.name = name
+        self._wakeup = asyncio.Event()
+        self._listener_task: asyncio.Task | None = None
+
+    def start(self):
+        """开始订阅唤醒通知"""
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listener())
+
+    def stop(self):
+        """停止订阅，并唤醒正在等待的工作器"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+        self._wakeup.set()
+
+    async def add(self, member: str, execute_at: float, data: str, pipe=None):
+        """
+        写入任务（已存在时覆盖数据和到期时间）
+
+        Args:
+            pipe: 传入 pipeline 时只追加命令，由调用方执行
+        """
+        args = (_SCHEDULE_SCRIPT, 2, self.schedule_key, self.data_key, member, repr(execute_at), data, self.channel)
+        if pipe is not None:
+            pipe.eval(*args)
+            return
+        if await self.redis.eval(*args):
+            self._wakeup.set()
+
+    async def claim(self, now: float, limit: int, pop_data: bool = False) -> tuple[list, float | None]:
+        """
+        原子领取到期任务
+
+        Args:
+            now: 当前时间戳
+            limit: 最多领取数
+            pop_data: 是否同时取出并删除任务数据
+
+        Returns:
+            (领取结果, 剩余任务中最早的到期时间)；pop_data 时领取结果为 [(成员, 数据)]，否则为 [成员]
+        """
+        # 先清除唤醒标记：领取之后才到达的通知会让下一次 wait 立即返回
+        self._wakeup.clear()
+        reply = await self.redis.eval(
+            _CLAIM_SCRIPT, 2, self.schedule_key, self.data_key, repr(now), limit, "1" if pop_data else "0"
+        )
+        next_due = float(reply[0]) if reply[0] else None
+        items = reply[1:]
+        if pop_data:
+            return list(zip(items[0::2], items[1::2])), next_due
+        return items, next_due
+
+    async def wait(self, next_due: float | None):
+        """休眠到下一个到期时间，有更早的任务写入时提前返回"""
+        timeout = MAX_IDLE_WAIT if next_due is None else min(max(next_due - time.time(), 0), MAX_IDLE_WAIT)
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _listener(self):
+        """订阅唤醒通知（断线后自动重连）"""
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # 订阅（重新）建立前可能错过通知，唤醒一次重新检查
+                self._wakeup.set()
+
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._wakeup.set()
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"{self.name} 唤醒通知订阅中断，5秒后重连: {e}")
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception as e:
+                    logger.debug(f"关闭 pubsub 连接失败: {e}")
@@ -1,19 +1,34 @@
 """
 Redis 消息删除管理器
 使用 Redis 的过期键功能实现消息自动删除
+
+到期任务通过 RedisDueQueue 原子领取（从调度表和任务表中一并移除），多实例不会重复处理，
+工作器休眠到最早的到期时间，有更早的任务写入时通过 pub/sub 提前唤醒；
+领取到的消息按聊天分组，每个聊天用 deleteMessages 批量删除（每次最多 100 条），
+不同聊天之间有限并发
 """
 
 import asyncio
 import json
 import logging
+import time
 
 import redis.asyncio as redis
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TelegramError
+
+from utils.redis_due_queue import RedisDueQueue
 
 
 logger = logging.getLogger(__name__)
 
+SCHEDULE_KEY = "msg:delete:schedule"
+TASKS_KEY = "msg:delete:tasks"
+WAKEUP_CHANNEL = "pubsub:msg:delete:wakeup"
+CLAIM_BATCH_SIZE = 1000  # 每次最多领取的到期任务数
+DELETE_BATCH_SIZE = 100  # deleteMessages 单次最多 100 条消息
+DELETE_CHAT_CONCURRENCY = 8  # 同时处理的聊天数
+DELETE_COALESCE_WINDOW = 1.0  # 到期后再等待的秒数，让相近时间到期的消息合并为一次 deleteMessages
 
 class RedisMessageDeleteScheduler:
     """Redis 消息删除调度器，替代文件系统版本"""
@@ -24,62 +39,30 @@ class RedisMessageDeleteScheduler:
         self.bot: Bot | None = None
         self._running = False
         self._task: asyncio.Task | None = None
+        self._queue = RedisDueQueue(redis_client, SCHEDULE_KEY, TASKS_KEY, WAKEUP_CHANNEL, "消息删除调度器")
 
     def start(self, bot: Bot):
         """启动调度器"""
         self.bot = bot
         self._running = True
 
-        # 启动监听任务
+        # 启动监听任务（先处理遗留的删除任务）
+        self._queue.start()
         self._task = asyncio.create_task(self._deletion_worker())
         logger.info("✅ Redis 消息删除调度器已启动")
 
-        # 启动时处理遗留的删除任务
-        asyncio.create_task(self._process_existing_deletions())
-
     async def _process_existing_deletions(self):
         """处理启动时存在的遗留删除任务"""
         try:
-            # 等待1秒确保调度器完全启动
-            await asyncio.sleep(1)
-
-            import time
-
-            current_time = time.time()
-            processed_count = 0
-
             logger.info("🔍 检查遗留的消息删除任务...")
 
-            # 获取所有已到期的任务（包括遗留任务）
-            expired_tasks = await self.redis.zrangebyscore("msg:delete:schedule", 0, current_time, withscores=False)
-
-            if expired_tasks:
-                for key in expired_tasks:
-                    # 获取任务数据
-                    task_data_str = await self.redis.hget("msg:delete:tasks", key)
-                    if task_data_str:
-                        try:
-                            task_data = json.loads(task_data_str)
-                            chat_id = task_data.get("chat_id")
-                            message_id = task_data.get("message_id")
-                            session_id = task_data.get("session_id")
-
-                            if chat_id and message_id:
-                                # 删除消息
-                                await self._delete_message(chat_id, message_id)
-                                processed_count += 1
-
-                                # 从会话集合中移除
-                                if session_id:
-                                    session_key = f"msg:session:{session_id}"
-                                    await self.redis.srem(session_key, key)
-
-                        except (json.JSONDecodeError, TypeError) as e:
-                            logger.error(f"解析遗留任务数据失败 {key}: {e}")
-
-                    # 清理任务
-                    await self.redis.hdel("msg:delete:tasks", key)
-                    await self.redis.zrem("msg:delete:schedule", key)
+            # 获取所有已到期的任务（包括遗留任务），多实例之间通过原子领取互斥
+            processed_count = 0
+            while True:
+                claimed, _ = await self._process_due(time.time())
+                processed_count += claimed
+                if claimed < CLAIM_BATCH_SIZE:
+                    break
 
             if processed_count > 0:
                 logger.info(f"📧 已处理 {processed_count} 个遗留的消息删除任务")
@@ -92,6 +75,7 @@ class RedisMessageDeleteScheduler:
     def stop(self):
         """停止调度器"""
         self._running = False
+        self._queue.stop()
         if self._task:
             self._task.cancel()
         logger.info("Redis 消息删除调度器已停止")
@@ -111,8 +95,6 @@ class RedisMessageDeleteScheduler:
             await self._delete_message(chat_id, message_id)
         else:
             # 计算执行时间
-            import time
-
             execute_at = time.time() + delay
 
             # 创建删除任务的数据
@@ -123,73 +105,120 @@ class RedisMessageDeleteScheduler:
                 "execute_at": execute_at,
             }
 
-            # 使用不过期的键存储任务数据，并在 sorted set 中管理时间
+            # 使用不过期的键存储任务数据，并在 sorted set 中管理时间（一次往返）
             key = f"msg:delete:{chat_id}:{message_id}"
-            await self.redis.hset("msg:delete:tasks", key, json.dumps(task_data))
-
-            # 添加到时间排序集合
-            await self.redis.zadd("msg:delete:schedule", {key: execute_at})
+            pipe = self.redis.pipeline(transaction=False)
+            await self._queue.add(key, execute_at, json.dumps(task_data), pipe=pipe)
 
             # 如果有 session_id，维护会话索引
             if session_id:
                 session_key = f"msg:session:{session_id}"
                 # 添加消息键到会话集合
-                await self.redis.sadd(session_key, key)
+                pipe.sadd(session_key, key)
                 # 设置会话键的过期时间（比消息稍长）
-                await self.redis.expire(session_key, delay + 60)
+                pipe.expire(session_key, delay + 60)
+            await pipe.execute()
 
             logger.debug(f"已调度消息删除: {key}, 延迟: {delay}秒, 会话: {session_id}")
 
     async def _deletion_worker(self):
         """监听到期任务并执行删除"""
         logger.info("消息删除工作器已启动")
+        await self._process_existing_deletions()
 
         while self._running:
             try:
-                import time
+                claimed, next_due = await self._process_due(time.time())
+
+                # 领取已满说明还有积压，立即继续；否则休眠到下一个到期时间（稍作合并）
+                if claimed < CLAIM_BATCH_SIZE:
+                    await self._queue.wait(next_due + DELETE_COALESCE_WINDOW if next_due else None)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"消息删除工作器错误: {e}")
+                await asyncio.sleep(5)  # 错误后等待5秒再重试
 
-                current_time = time.time()
+        logger.info("消息删除工作器已停止")
 
-                # 获取所有到期的任务
-                expired_tasks = await self.redis.zrangebyscore("msg:delete:schedule", 0, current_time, withscores=False)
+    async def _process_due(self, now: float) -> tuple[int, float | None]:
+        """
+        领取并删除到期的消息
 
-                if expired_tasks:
-                    for key in expired_tasks:
-                        # 获取任务数据
-                        task_data_str = await self.redis.hget("msg:delete:tasks", key)
-                        if task_data_str:
-                            try:
-                                task_data = json.loads(task_data_str)
-                                chat_id = task_data.get("chat_id")
-                                message_id = task_data.get("message_id")
-                                session_id = task_data.get("session_id")
+        Returns:
+            (领取的任务数, 剩余任务中最早的到期时间)
+        """
+        claimed, next_due = await self._queue.claim(now, CLAIM_BATCH_SIZE, pop_data=True)
+        if not claimed:
+            return 0, next_due
+
+        by_chat: dict[int, list[int]] = {}
+        sessions: dict[str, list[str]] = {}
+        for key, task_data_str in claimed:
+            if not task_data_str:
+                continue
+            try:
+                task_data = json.loads(task_data_str)
+            except (json.JSONDecodeError, TypeError) as e:
+                logger.error(f"解析任务数据失败 {key}: {e}")
+                continue
+
+            chat_id = task_data.get("chat_id")
+            message_id = task_data.get("message_id")
+            if chat_id and message_id:
+                by_chat.setdefault(chat_id, []).append(message_id)
+            session_id = task_data.get("session_id")
+            if session_id:
+                sessions.setdefault(session_id, []).append(key)
 
-                                if chat_id and message_id:
-                                    # 删除消息
-                                    await self._delete_message(chat_id, message_id)
+        # 从会话集合中移除
+        if sessions:
+            pipe = self.redis.pipeline(transaction=False)
+            for session_id, keys in sessions.items():
+                pipe.srem(f"msg:session:{session_id}", *keys)
+            await pipe.execute()
 
-                                    # 从会话集合中移除
-                                    if session_id:
-                                        session_key = f"msg:session:{session_id}"
-                                        await self.redis.srem(session_key, key)
+        if by_chat:
+            semaphore = asyncio.Semaphore(DELETE_CHAT_CONCURRENCY)
 
-                            except (json.JSONDecodeError, TypeError) as e:
-                                logger.error(f"解析任务数据失败 {key}: {e}")
+            async def delete_chat(chat_id: int, message_ids: list[int]):
+                async with semaphore:
+                    await self._delete_chat_messages(chat_id, message_ids)
 
-                        # 清理任务
-                        await self.redis.hdel("msg:delete:tasks", key)
-                        await self.redis.zrem("msg:delete:schedule", key)
+            await asyncio.gather(*(delete_chat(chat_id, ids) for chat_id, ids in by_chat.items()))
+            logger.debug(f"已处理 {len(claimed)} 个到期删除任务，涉及 {len(by_chat)} 个聊天")
 
-                # 每秒检查一次
-                await asyncio.sleep(1)
+        return len(claimed), next_due
 
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"消息删除工作器错误: {e}")
-                await asyncio.sleep(5)  # 错误后等待5秒再重试
+    async def _delete_chat_messages(self, chat_id: int, message_ids: list[int]):
+        """批量删除同一聊天中的消息（deleteMessages，找不到的消息会被跳过）"""
+        if not self.bot:
+            logger.warning("Bot 未初始化，无法删除消息")
+            return
 
-        logger.info("消息删除工作器已停止")
+        message_ids = sorted(set(message_ids))
+        for start in range(0, len(message_ids), DELETE_BATCH_SIZE):
+            batch = message_ids[start : start + DELETE_BATCH_SIZE]
+            for attempt in range(2):
+                try:
+                    if len(batch) == 1:
+                        await self.bot.delete_message(chat_id=chat_id, message_id=batch[0])
+                    else:
+                        await self.bot.delete_messages(chat_id=chat_id, message_ids=batch)
+                    logger.debug(f"消息已删除: chat_id={chat_id}, {len(batch)} 条")
+                    break
+                except RetryAfter as e:
+                    # 被限流时等待后重试一次
+                    if attempt:
+                        logger.error(f"删除消息被限流，放弃 chat_id={chat_id} 的 {len(batch)} 条消息")
+                        break
+                    await asyncio.sleep(e.retry_after + 1)  # 额外等待1秒
+                except TelegramError as e:
+                    # 忽略消息已删除的错误
+                    if "message to delete not found" not in str(e).lower():
+                        logger.error(f"删除消息失败 chat_id={chat_id}: {e}")
+                    break
 
     async def _delete_message(self, chat_id: int, message_id: int):
         """删除指定消息"""
@@ -1,29 +1,92 @@
 """
 Redis 统计管理器
 用于命令使用统计和活跃用户追踪
+
+活跃用户计数使用每小时一个的 HyperLogLog（stats:au:<YYYYmmddHH>，UTC），
+任意窗口的去重人数由多个小时桶/日桶合并计算；压缩任务把已结束日期的小时桶 PFMERGE
+到每日 HLL（stats:dau:<YYYY-MM-DD>）。需要具体用户 ID 时使用有上限的最近活跃用户 ZSET
 """
 
 import json
 import logging
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import redis.asyncio as redis
 
+from utils.write_behind import WriteBehindBuffer
+
 
 logger = logging.getLogger(__name__)
 
+DAILY_STATS_TTL = 7 * 24 * 60 * 60  # 每日命令计数保留7天
+DAU_TTL = 30 * 24 * 60 * 60  # 每日活跃用户保留30天
+USER_HISTORY_TTL = 30 * 24 * 60 * 60  # 用户命令历史保留30天
+USER_HISTORY_LENGTH = 10  # 每个用户保留的最近命令数
+ACTIVE_HOUR_TTL = 3 * 24 * 60 * 60  # 每小时活跃用户 HLL 保留3天，压缩任务在此之前合并到每日 HLL
+ACTIVE_HOURLY_WINDOW = 48  # 不超过该小时数的窗口按小时桶统计，更长的窗口按天统计
+RECENT_USERS_KEY = "stats:recent_users"  # 最近活跃用户 {user_id: 最后活跃时间}
+RECENT_USERS_MAX = 10000  # 最近活跃用户 ZSET 的成员上限
+RECENT_USERS_MAX_AGE = 7 * 24 * 60 * 60  # 压缩任务移除超过7天未活跃的用户
+LEGACY_ACTIVE_USERS_KEY = "stats:active_users"  # 旧版无上限的活跃用户 ZSET，压缩任务会删除
+
+
+def _hour_key(timestamp: float) -> str:
+    return f"stats:au:{datetime.fromtimestamp(timestamp, timezone.utc):%Y%m%d%H}"
+
+
+def _day_key(day: datetime) -> str:
+    return f"stats:dau:{day:%Y-%m-%d}"
+
+
+def _day_hour_keys(day: datetime) -> list[str]:
+    """某个 UTC 日期的全部小时桶"""
+    return [f"stats:au:{day:%Y%m%d}{hour:02d}" for hour in range(24)]
+
 
 class RedisStatsManager:
     """Redis 统计管理器"""
 
-    def __init__(self, redis_client: redis.Redis):
-        """初始化统计管理器"""
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        queue_size: int = 1000,
+        flush_interval: float = 1.0,
+        recent_users_max: int = RECENT_USERS_MAX,
+    ):
+        """
+        初始化统计管理器
+
+        Args:
+            redis_client: Redis 客户端
+            queue_size: 待写入命令记录的队列容量，满时丢弃新记录（统计不阻塞命令处理）
+            flush_interval: 攒批写入的最长等待时间（秒）
+            recent_users_max: 最近活跃用户 ZSET 的成员上限
+        """
         self.redis = redis_client
+        self.recent_users_max = recent_users_max
+        self.dropped_events = 0
+        self._usage_buffer = WriteBehindBuffer(
+            self._write_command_usage,
+            name="command-stats",
+            batch_size=100,
+            flush_interval=flush_interval,
+            max_pending=queue_size,
+        )
+
+    def enqueue_command_usage(self, command: str, user_id: int, chat_id: int, chat_type: str):
+        """
+        记录命令使用情况（不等待）
+
+        放入有界队列后立即返回，由后台任务批量写入 Redis；队列已满时丢弃
+        """
+        event = (command, user_id, chat_id, chat_type, time.time())
+        if not self._usage_buffer.put_nowait(event):
+            self.dropped_events += 1
 
     async def record_command_usage(self, command: str, user_id: int, chat_id: int, chat_type: str):
         """
-        记录命令使用情况
+        记录命令使用情况（一次 Redis 往返）
 
         Args:
             command: 命令名称
@@ -32,40 +95,72 @@ class RedisStatsManager:
             chat_type: 聊天类型（private/group/supergroup）
         """
         try:
-            # 获取当前日期
-            today = datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
-
-            # 1. 增加命令总计数
-            await self.redis.hincrby("stats:commands:total", command, 1)
-
-            # 2. 增加今日命令计数
-            await self.redis.hincrby(f"stats:commands:daily:{today}", command, 1)
-            # 设置过期时间（保留7天）
-            await self.redis.expire(f"stats:commands:daily:{today}", 7 * 24 * 60 * 60)
-
-            # 3. 记录用户活跃度
-            await self.redis.zadd("stats:active_users", {str(user_id): time.time()})
-
-            # 4. 记录每日活跃用户（使用 HyperLogLog）
-            await self.redis.pfadd(f"stats:dau:{today}", user_id)
-            await self.redis.expire(f"stats:dau:{today}", 30 * 24 * 60 * 60)  # 保留30天
-
-            # 5. 记录聊天类型统计
-            await self.redis.hincrby(f"stats:chat_type:{chat_type}", command, 1)
+            await self._write_command_usage([(command, user_id, chat_id, chat_type, time.time())])
+            logger.debug(f"命令使用已记录: {command} by {user_id}")
+        except Exception as e:
+            logger.error(f"记录命令使用失败: {e}")
 
-            # 6. 记录用户命令历史（最近10条）
-            user_history_key = f"stats:user_history:{user_id}"
-            history_entry = {"command": command, "chat_id": chat_id, "chat_type": chat_type, "timestamp": time.time()}
+    async def _write_command_usage(self, events: list[tuple]):
+        """
+        将一批命令记录合并后在一个 pipeline 中写入
 
-            # 使用列表存储，保持最近10条
-            await self.redis.lpush(user_history_key, json.dumps(history_entry))
-            await self.redis.ltrim(user_history_key, 0, 9)  # 只保留最近10条
-            await self.redis.expire(user_history_key, 30 * 24 * 60 * 60)  # 30天过期
+        Args:
+            events: [(command, user_id, chat_id, chat_type, timestamp)]
+        """
+        total_counts: dict[str, int] = {}
+        daily_counts: dict[str, dict[str, int]] = {}
+        chat_type_counts: dict[str, dict[str, int]] = {}
+        recent_users: dict[str, float] = {}
+        hourly_users: dict[str, set[int]] = {}
+        histories: dict[int, list[str]] = {}
+
+        for command, user_id, chat_id, chat_type, timestamp in events:
+            day = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+            total_counts[command] = total_counts.get(command, 0) + 1
+            day_counts = daily_counts.setdefault(day, {})
+            day_counts[command] = day_counts.get(command, 0) + 1
+            type_counts = chat_type_counts.setdefault(chat_type, {})
+            type_counts[command] = type_counts.get(command, 0) + 1
+            recent_users[str(user_id)] = max(timestamp, recent_users.get(str(user_id), 0))
+            hourly_users.setdefault(_hour_key(timestamp), set()).add(user_id)
+            histories.setdefault(user_id, []).append(
+                json.dumps({"command": command, "chat_id": chat_id, "chat_type": chat_type, "timestamp": timestamp})
+            )
+
+        pipe = self.redis.pipeline(transaction=False)
+        # 1. 命令总计数
+        for command, count in total_counts.items():
+            pipe.hincrby("stats:commands:total", command, count)
+        # 2. 每日命令计数
+        for day, counts in daily_counts.items():
+            for command, count in counts.items():
+                pipe.hincrby(f"stats:commands:daily:{day}", command, count)
+            pipe.expire(f"stats:commands:daily:{day}", DAILY_STATS_TTL)
+        # 3. 最近活跃用户（按最后活跃时间只保留最新的 recent_users_max 个）
+        pipe.zadd(RECENT_USERS_KEY, recent_users)
+        pipe.zremrangebyrank(RECENT_USERS_KEY, 0, -(self.recent_users_max + 1))
+        # 4. 每小时活跃用户（HyperLogLog，压缩任务合并到每日 HLL）
+        for hour_key, user_ids in hourly_users.items():
+            pipe.pfadd(hour_key, *user_ids)
+            pipe.expire(hour_key, ACTIVE_HOUR_TTL)
+        # 5. 聊天类型统计
+        for chat_type, counts in chat_type_counts.items():
+            for command, count in counts.items():
+                pipe.hincrby(f"stats:chat_type:{chat_type}", command, count)
+        # 6. 用户命令历史（最近 N 条，新的在前）
+        for user_id, entries in histories.items():
+            history_key = f"stats:user_history:{user_id}"
+            pipe.lpush(history_key, *entries)
+            pipe.ltrim(history_key, 0, USER_HISTORY_LENGTH - 1)
+            pipe.expire(history_key, USER_HISTORY_TTL)
 
-            logger.debug(f"命令使用已记录: {command} by {user_id}")
+        await pipe.execute()
 
-        except Exception as e:
-            logger.error(f"记录命令使用失败: {e}")
+    async def close(self, timeout: float = 5):
+        """写出队列中剩余的命令记录"""
+        await self._usage_buffer.close(timeout=timeout)
+        if self.dropped_events:
+            logger.warning(f"命令统计队列已满，共丢弃 {self.dropped_events} 条记录")
 
     async def get_command_stats(self, period: str = "total") -> dict[str, int]:
         """
@@ -85,7 +180,7 @@ class RedisStatsManager:
 
             elif period == "today":
                 # 获取今日统计
-                today = datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+                today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
                 stats = await self.redis.hgetall(f"stats:commands:daily:{today}")
                 return {cmd: int(count) for cmd, count in stats.items()}
 
@@ -93,7 +188,7 @@ class RedisStatsManager:
                 # 获取最近7天统计
                 week_stats = {}
                 for i in range(7):
-                    date = (datetime.now(datetime.timezone.utc) - timedelta(days=i)).strftime("%Y-%m-%d")
+                    date = (datetime.now(timezone.utc) - timedelta(days=i)).strftime("%Y-%m-%d")
                     daily_stats = await self.redis.hgetall(f"stats:commands:daily:{date}")
 
                     for cmd, count in daily_stats.items():
@@ -114,30 +209,49 @@ class RedisStatsManager:
         """
         获取活跃用户列表
 
+        只包含最近活跃用户 ZSET 中的用户：窗口内活跃用户超过 recent_users_max 时，
+        只返回最近活跃的部分；统计人数请使用 get_active_users_count
+
         Args:
             hours: 时间范围（小时）
 
         Returns:
-            活跃用户ID列表
+            活跃用户ID列表（最近活跃的在前）
         """
         try:
-            # 计算时间阈值
             threshold = time.time() - (hours * 60 * 60)
-
-            # 获取活跃用户
-            users = await self.redis.zrangebyscore("stats:active_users", threshold, "+inf")
-
+            users = await self.redis.zrevrangebyscore(RECENT_USERS_KEY, "+inf", threshold)
             return [int(user_id) for user_id in users]
 
         except Exception as e:
             logger.error(f"获取活跃用户失败: {e}")
             return []
 
+    def _active_user_keys(self, hours: int) -> list[str]:
+        """覆盖最近 hours 小时的 HLL 键"""
+        now = time.time()
+        hours = max(1, hours)
+        if hours <= ACTIVE_HOURLY_WINDOW:
+            # 按小时桶（含当前小时），窗口起点向下取整到整点
+            return [_hour_key(now - offset * 3600) for offset in range(hours)]
+
+        # 更长的窗口按天取整：已压缩的日桶 + 最近仍保留的小时桶（覆盖尚未压缩的日期）
+        today = datetime.fromtimestamp(now, timezone.utc)
+        days = -(-hours // 24)
+        keys = [_day_key(today - timedelta(days=offset)) for offset in range(days)]
+        keys.extend(_hour_key(now - offset * 3600) for offset in range(ACTIVE_HOURLY_WINDOW))
+        return keys
+
     async def get_active_users_count(self, hours: int = 24) -> int:
-        """获取活跃用户数量"""
+        """
+        获取活跃用户数量（HyperLogLog 近似去重，标准误差约 0.81%）
+
+        Args:
+            hours: 时间范围（小时），超过 ACTIVE_HOURLY_WINDOW 时按整天统计
+        """
         try:
-            threshold = time.time() - (hours * 60 * 60)
-            return await self.redis.zcount("stats:active_users", threshold, "+inf")
+            # 多键 PFCOUNT 在服务端合并各桶后计数，不写入临时键
+            return await self.redis.pfcount(*self._active_user_keys(hours))
         except Exception as e:
             logger.error(f"获取活跃用户数量失败: {e}")
             return 0
@@ -153,10 +267,10 @@ class RedisStatsManager:
             活跃用户数
         """
         try:
-            if date is None:
-                date = datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+            day = datetime.strptime(date, "%Y-%m-%d") if date else datetime.now(timezone.utc)
 
-            return await self.redis.pfcount(f"stats:dau:{date}")
+            # 当天及尚未压缩的日期仍在小时桶中
+            return await self.redis.pfcount(_day_key(day), *_day_hour_keys(day))
 
         except Exception as e:
             logger.error(f"获取DAU失败: {e}")
@@ -228,19 +342,39 @@ class RedisStatsManager:
         try:
             # 清理过期的每日统计
             for i in range(days, days + 30):  # 清理30-60天前的数据
-                date = (datetime.utcnow() - timedelta(days=i)).strftime("%Y-%m-%d")
+                date = (datetime.now(timezone.utc) - timedelta(days=i)).strftime("%Y-%m-%d")
                 await self.redis.delete(f"stats:commands:daily:{date}")
                 await self.redis.delete(f"stats:dau:{date}")
 
-            # 清理不活跃用户（超过30天）
-            threshold = time.time() - (30 * 24 * 60 * 60)
-            await self.redis.zremrangebyscore("stats:active_users", 0, threshold)
+            # 清理不活跃用户
+            threshold = time.time() - (days * 24 * 60 * 60)
+            await self.redis.zremrangebyscore(RECENT_USERS_KEY, 0, threshold)
 
             logger.info("旧统计数据清理完成")
 
         except Exception as e:
             logger.error(f"清理旧统计数据失败: {e}")
 
+    async def compact_active_users(self):
+        """
+        压缩活跃用户统计（由任务调度器每小时执行）
+
+        - 把已结束日期的小时桶 PFMERGE 到每日 HLL（重复合并不影响结果）
+        - 移除长期未活跃的最近活跃用户，并删除旧版无上限的活跃用户 ZSET
+        """
+        now = datetime.now(timezone.utc)
+        pipe = self.redis.pipeline(transaction=False)
+        # 小时桶保留3天，合并最近两个已结束的日期即可覆盖压缩任务短暂停止的情况
+        for offset in (1, 2):
+            day = now - timedelta(days=offset)
+            pipe.pfmerge(_day_key(day), *_day_hour_keys(day))
+            pipe.expire(_day_key(day), DAU_TTL)
+        pipe.zremrangebyscore(RECENT_USERS_KEY, 0, time.time() - RECENT_USERS_MAX_AGE)
+        pipe.zremrangebyrank(RECENT_USERS_KEY, 0, -(self.recent_users_max + 1))
+        pipe.delete(LEGACY_ACTIVE_USERS_KEY)
+        await pipe.execute()
+        logger.info("活跃用户统计压缩完成")
+
     async def reset_all_stats(self):
         """重置所有统计数据（谨慎使用）"""
         try:
@@ -1,6 +1,9 @@
 """
 Redis 任务调度器
 使用 Redis Sorted Set 实现定时任务调度
+
+工作器休眠到最早的到期时间，有更早的任务写入时通过 pub/sub 提前唤醒；
+到期任务由 Lua 脚本原子领取，多实例不会重复执行
 """
 
 import asyncio
@@ -11,9 +14,18 @@ from collections.abc import Callable
 
 import redis.asyncio as redis
 
+from utils.config_manager import get_config
+from utils.redis_due_queue import RedisDueQueue
+
 
 logger = logging.getLogger(__name__)
 
+# 缓存预热同时请求上游的最大数量
+CACHE_WARM_CONCURRENCY = 4
+# 每次最多领取的到期任务数
+TASK_CLAIM_BATCH_SIZE = 100
+TASK_WAKEUP_CHANNEL = "pubsub:tasks:wakeup"
+
 
 class RedisTaskScheduler:
     """Redis 任务调度器，替代文件系统版本"""
@@ -24,7 +36,10 @@ class RedisTaskScheduler:
         self._running = False
         self._task: asyncio.Task | None = None
         self._cache_manager = None
+        self._smart_cache_manager = None
+        self._stats_manager = None
         self._handlers: dict[str, Callable] = {}
+        self._queue = RedisDueQueue(redis_client, "tasks:scheduled", "tasks:details", TASK_WAKEUP_CHANNEL, "任务调度器")
 
         # 注册默认处理器
         self._register_default_handlers()
@@ -33,6 +48,14 @@ class RedisTaskScheduler:
         """设置缓存管理器（用于缓存清理任务）"""
         self._cache_manager = cache_manager
 
+    def set_smart_cache_manager(self, smart_cache_manager):
+        """设置智能缓存管理器（用于价格历史分区维护任务）"""
+        self._smart_cache_manager = smart_cache_manager
+
+    def set_stats_manager(self, stats_manager):
+        """设置统计管理器（用于活跃用户统计压缩任务）"""
+        self._stats_manager = stats_manager
+
     def set_rate_converter(self, rate_converter):
         """设置汇率转换器（用于汇率刷新任务）"""
         self._rate_converter = rate_converter
@@ -43,6 +66,10 @@ class RedisTaskScheduler:
         self._handlers["weekly_cleanup"] = self._handle_cache_cleanup
         self._handlers["rate_refresh"] = self._handle_rate_refresh
         self._handlers["kick_deleted_members"] = self._handle_kick_deleted_members
+        self._handlers["cache_warm"] = self._handle_cache_warm
+        self._handlers["price_history_maintenance"] = self._handle_price_history_maintenance
+        self._handlers["price_rollup"] = self._handle_price_rollup
+        self._handlers["stats_compaction"] = self._handle_stats_compaction
 
     def set_anti_spam_handler(self, anti_spam_handler, bot):
         """设置反垃圾处理器和 bot 实例（用于踢出已注销账号任务）"""
@@ -52,14 +79,28 @@ class RedisTaskScheduler:
     def start(self):
         """启动调度器"""
         self._running = True
+        self._queue.start()
         self._task = asyncio.create_task(self._scheduler_worker())
         # 自动启动汇率刷新任务
         asyncio.create_task(self._ensure_rate_refresh_task())
+        # 自动启动缓存预热任务
+        if get_config().cache_warm_enabled:
+            asyncio.create_task(self._ensure_cache_warm_task())
+        # 自动启动价格历史分区维护任务
+        if self._smart_cache_manager:
+            asyncio.create_task(self._ensure_price_history_maintenance_task())
+        # 自动启动每日价格汇总任务
+        if self._smart_cache_manager and get_config().price_rollup_interval > 0:
+            asyncio.create_task(self._ensure_price_rollup_task())
+        # 自动启动活跃用户统计压缩任务
+        if self._stats_manager:
+            asyncio.create_task(self._ensure_stats_compaction_task())
         logger.info("✅ Redis 任务调度器已启动")
 
     def stop(self):
         """停止调度器"""
         self._running = False
+        self._queue.stop()
         if self._task:
             self._task.cancel()
         logger.info("Redis 任务调度器已停止")
@@ -77,11 +118,8 @@ class RedisTaskScheduler:
         # 任务数据
         task_data = {"id": task_id, "type": task_type, "data": data or {}}
 
-        # 存储任务详情
-        await self.redis.hset("tasks:details", task_id, json.dumps(task_data))
-
-        # 添加到调度队列
-        await self.redis.zadd("tasks:scheduled", {task_id: execute_at})
+        # 存储任务详情并添加到调度队列（早于当前最早任务时唤醒工作器）
+        await self._queue.add(task_id, execute_at, json.dumps(task_data))
 
         logger.debug(f"任务已调度: {task_id}, 执行时间: {execute_at}")
 
@@ -129,22 +167,16 @@ class RedisTaskScheduler:
 
         while self._running:
             try:
-                # 获取当前时间
-                current_time = time.time()
-
-                # 获取到期任务
-                due_tasks = await self.redis.zrangebyscore("tasks:scheduled", 0, current_time, withscores=False)
+                # 原子领取到期任务（领取时已从调度队列移除，周期任务执行后重新调度）
+                due_tasks, next_due = await self._queue.claim(time.time(), TASK_CLAIM_BATCH_SIZE)
 
-                if due_tasks:
-                    # 处理到期任务
-                    for task_id in due_tasks:
-                        await self._execute_task(task_id)
+                # 处理到期任务
+                for task_id in due_tasks:
+                    await self._execute_task(task_id)
 
-                        # 从调度队列移除
-                        await self.redis.zrem("tasks:scheduled", task_id)
-
-                # 每秒检查一次
-                await asyncio.sleep(1)
+                # 休眠到下一个到期时间；执行期间新调度的更早任务会提前唤醒
+                if len(due_tasks) < TASK_CLAIM_BATCH_SIZE:
+                    await self._queue.wait(next_due)
 
             except asyncio.CancelledError:
                 break
@@ -201,6 +233,22 @@ class RedisTaskScheduler:
                 repeat_interval = data.get("repeat_interval", 86400)
                 next_run = time.time() + repeat_interval
                 await self.schedule_task(task_id, task_type, next_run, data)
+            elif task_type == "cache_warm":
+                # 缓存预热任务按配置的间隔重复执行
+                next_run = time.time() + get_config().cache_warm_interval
+                await self.schedule_task(task_id, task_type, next_run, data)
+            elif task_type == "price_history_maintenance":
+                # 价格历史分区维护每天执行一次
+                next_run = time.time() + data.get("repeat_interval", 86400)
+                await self.schedule_task(task_id, task_type, next_run, data)
+            elif task_type == "price_rollup":
+                # 每日价格汇总按配置的间隔增量更新
+                next_run = time.time() + get_config().price_rollup_interval
+                await self.schedule_task(task_id, task_type, next_run, data)
+            elif task_type == "stats_compaction":
+                # 活跃用户统计压缩每小时执行一次
+                next_run = time.time() + data.get("repeat_interval", 3600)
+                await self.schedule_task(task_id, task_type, next_run, data)
 
         except Exception as e:
             logger.error(f"执行任务失败 {task_id}: {e}")
@@ -248,6 +296,38 @@ class RedisTaskScheduler:
         except Exception as e:
             logger.error(f"缓存清理失败 {cache_key}: {e}")
 
+    async def _handle_price_history_maintenance(self, task_id: str, data: dict):
+        """处理价格历史分区维护：提前创建未来分区，并按保留期删除过期分区"""
+        if not self._smart_cache_manager:
+            logger.warning("smart_cache_manager 未设置，跳过价格历史分区维护")
+            return
+
+        # 未分区的旧表需要先单独迁移（python -m utils.database_init partition-price-history）
+        if not await self._smart_cache_manager.is_history_partitioned():
+            logger.info("price_history 未分区，跳过分区维护")
+            return
+
+        config = get_config()
+        created = await self._smart_cache_manager.ensure_partitions(config.price_history_partition_months_ahead)
+        deleted = 0
+        if config.price_history_retention_days > 0:
+            deleted = await self._smart_cache_manager.cleanup_old_data(config.price_history_retention_days)
+        logger.info(f"🗂️ 价格历史分区维护完成: 新建 {created} 个分区，清理约 {deleted} 条过期记录")
+
+    async def _handle_price_rollup(self, task_id: str, data: dict):
+        """处理每日价格汇总任务"""
+        if not self._smart_cache_manager:
+            logger.warning("smart_cache_manager 未设置，跳过每日价格汇总")
+            return
+        await self._smart_cache_manager.rollup_daily_prices()
+
+    async def _handle_stats_compaction(self, task_id: str, data: dict):
+        """处理活跃用户统计压缩任务"""
+        if not self._stats_manager:
+            logger.warning("stats_manager 未设置，跳过活跃用户统计压缩")
+            return
+        await self._stats_manager.compact_active_users()
+
     async def _handle_rate_refresh(self, task_id: str, data: dict):
         """处理汇率刷新任务"""
         if not hasattr(self, "_rate_converter") or not self._rate_converter:
@@ -266,6 +346,66 @@ class RedisTaskScheduler:
         except Exception as e:
             logger.error(f"汇率刷新失败: {e}")
 
+    async def _handle_cache_warm(self, task_id: str, data: dict):
+        """处理缓存预热任务：在最热的键过期前通过注册的 fetcher 刷新"""
+        if not self._cache_manager:
+            logger.warning("缓存管理器未设置，跳过缓存预热任务")
+            return
+
+        config = get_config()
+        if not config.cache_warm_enabled:
+            return
+
+        # 收集每个子目录中最热且即将过期的键
+        candidates = []
+        for subdirectory in self._cache_manager.get_warm_subdirectories():
+            top_n = config.cache_warm_top_n.get(subdirectory, 0)
+            if top_n <= 0:
+                continue
+            try:
+                popular = await self._cache_manager.get_popular_keys(subdirectory, top_n)
+                remaining = await self._cache_manager.get_remaining_freshness([key for key, _ in popular], subdirectory)
+                await self._cache_manager.decay_popularity(subdirectory, keep=top_n * 10)
+            except Exception as e:
+                logger.error(f"读取缓存热度失败 {subdirectory}: {e}")
+                continue
+
+            for key, score in popular:
+                freshness = remaining.get(key)
+                # 已不存在的键等下次访问时再缓存；还有较长有效期的键无需刷新
+                if freshness is None or freshness > config.cache_warm_lead_time:
+                    continue
+                fetcher = self._cache_manager.get_warm_fetcher(subdirectory, key)
+                if fetcher:
+                    candidates.append((score, subdirectory, key, fetcher))
+
+        if not candidates:
+            logger.debug("缓存预热：没有需要刷新的键")
+            return
+
+        # 按热度在预算内刷新
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        selected = candidates[: max(0, config.cache_warm_budget)]
+        semaphore = asyncio.Semaphore(CACHE_WARM_CONCURRENCY)
+
+        async def warm(subdirectory: str, key: str, fetcher: Callable) -> bool:
+            async with semaphore:
+                try:
+                    success = bool(await fetcher(key))
+                except Exception as e:
+                    logger.warning(f"缓存预热失败 {subdirectory}/{key}: {e}")
+                    success = False
+            self._cache_manager.metrics.incr(subdirectory, "warm_refreshes" if success else "warm_failures")
+            return success
+
+        outcomes = await asyncio.gather(
+            *(warm(subdirectory, key, fetcher) for _, subdirectory, key, fetcher in selected)
+        )
+        logger.info(
+            f"缓存预热完成: 刷新 {sum(outcomes)}/{len(selected)} 个键"
+            f"（候选 {len(candidates)} 个，预算 {config.cache_warm_budget}）"
+        )
+
     async def cancel_task(self, task_id: str):
         """取消任务"""
         # 从调度队列移除
@@ -327,6 +467,67 @@ class RedisTaskScheduler:
         except Exception as e:
             logger.error(f"检查汇率刷新任务失败: {e}")
 
+    async def _ensure_cache_warm_task(self):
+        """确保缓存预热任务存在，如果不存在则创建"""
+        try:
+            task_id = "cache_warm_periodic"
+            if await self.redis.zscore("tasks:scheduled", task_id) is None:
+                execute_at = time.time() + get_config().cache_warm_interval
+                await self.schedule_task(task_id=task_id, task_type="cache_warm", execute_at=execute_at, data={})
+                logger.info("✅ 自动创建缓存预热任务")
+            else:
+                logger.info("缓存预热任务已存在，跳过创建")
+        except Exception as e:
+            logger.error(f"检查缓存预热任务失败: {e}")
+
+    async def _ensure_price_history_maintenance_task(self):
+        """确保价格历史分区维护任务存在，如果不存在则创建（1分钟后首次执行）"""
+        try:
+            task_id = "price_history_maintenance_daily"
+            if await self.redis.zscore("tasks:scheduled", task_id) is None:
+                await self.schedule_task(
+                    task_id=task_id,
+                    task_type="price_history_maintenance",
+                    execute_at=time.time() + 60,
+                    data={"repeat_interval": 86400},
+                )
+                logger.info("✅ 自动创建价格历史分区维护任务")
+            else:
+                logger.info("价格历史分区维护任务已存在，跳过创建")
+        except Exception as e:
+            logger.error(f"检查价格历史分区维护任务失败: {e}")
+
+    async def _ensure_price_rollup_task(self):
+        """确保每日价格汇总任务存在，如果不存在则创建（2分钟后首次执行）"""
+        try:
+            task_id = "price_rollup_periodic"
+            if await self.redis.zscore("tasks:scheduled", task_id) is None:
+                await self.schedule_task(
+                    task_id=task_id, task_type="price_rollup", execute_at=time.time() + 120, data={}
+                )
+                logger.info("✅ 自动创建每日价格汇总任务")
+            else:
+                logger.info("每日价格汇总任务已存在，跳过创建")
+        except Exception as e:
+            logger.error(f"检查每日价格汇总任务失败: {e}")
+
+    async def _ensure_stats_compaction_task(self):
+        """确保活跃用户统计压缩任务存在，如果不存在则创建（5分钟后首次执行）"""
+        try:
+            task_id = "stats_compaction_hourly"
+            if await self.redis.zscore("tasks:scheduled", task_id) is None:
+                await self.schedule_task(
+                    task_id=task_id,
+                    task_type="stats_compaction",
+                    execute_at=time.time() + 300,
+                    data={"repeat_interval": 3600},
+                )
+                logger.info("✅ 自动创建活跃用户统计压缩任务")
+            else:
+                logger.info("活跃用户统计压缩任务已存在，跳过创建")
+        except Exception as e:
+            logger.error(f"检查活跃用户统计压缩任务失败: {e}")
+
     def register_handler(self, task_type: str, handler: Callable):
         """注册任务处理器"""
         self._handlers[task_type] = handler
@@ -0,0 +1,128 @@
+"""
+请求合并（Singleflight）与分布式锁
+- SingleFlight: 同一进程内相同 key 的并发调用只执行一次，其余调用等待并共享结果
+- RedisLock: 基于 SET NX + 租约的跨实例互斥锁，同一时间只有一个实例刷新某个 key
+"""
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+# 仅当锁仍属于自己时才删除，避免租约过期后误删其他实例的锁
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# 领头任务被取消时发给等待者的信号，等待者收到后重新竞争执行
+_LEADER_CANCELLED = object()
+
+
+class SingleFlight:
+    """进程内请求合并"""
+
+    def __init__(self, name: str = "singleflight", result_ttl: float = 0):
+        """
+        Args:
+            name: 日志中显示的名称
+            result_ttl: 完成后结果继续保留的秒数，用于合并紧随其后的重复请求（0 表示不保留）
+        """
+        self.name = name
+        self.result_ttl = result_ttl
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._results: dict[Hashable, Any] = {}
+
+    def is_inflight(self, key: Hashable) -> bool:
+        """检查 key 是否正在执行"""
+        return key in self._inflight
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        执行 func，相同 key 的并发调用只会真正执行一次
+
+        领头调用抛出的异常会同样抛给所有等待者；领头任务被取消时，等待者重新竞争，
+        由其中一个成为新的领头者继续执行
+        """
+        while True:
+            if key in self._results:
+                logger.debug(f"[{self.name}] 复用最近结果: {key}")
+                return self._results[key]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+
+            logger.info(f"[{self.name}] 等待已有任务: {key}")
+            # shield: 等待者被取消时不影响领头任务
+            result = await asyncio.shield(future)
+            if result is not _LEADER_CANCELLED:
+                return result
+            logger.info(f"[{self.name}] 领头任务被取消，重新执行: {key}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            # 取消只属于领头调用方自己，不传播给等待者
+            self._release(key, future)
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            self._release(key, future)
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            self._release(key, future)
+            future.set_result(result)
+            if self.result_ttl > 0:
+                self._results[key] = result
+                asyncio.get_running_loop().call_later(self.result_ttl, self._results.pop, key, None)
+            return result
+
+    def _release(self, key: Hashable, future: asyncio.Future):
+        """移除进行中的任务（仅当仍是 future 自己时，避免误删新的领头任务）"""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+
+class RedisLock:
+    """基于 SET NX 的分布式锁（带租约，持有者崩溃后自动过期）"""
+
+    def __init__(self, redis_client, key: str, lease_seconds: float = 30):
+        """
+        Args:
+            redis_client: redis.asyncio 客户端
+            key: 锁的 Redis 键
+            lease_seconds: 租约时长（秒）
+        """
+        self.redis_client = redis_client
+        self.key = key
+        self.lease_ms = max(1, int(lease_seconds * 1000))
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+
+    async def acquire(self) -> bool:
+        """尝试获取锁（不阻塞），成功返回 True"""
+        self.acquired = bool(await self.redis_client.set(self.key, self.token, nx=True, px=self.lease_ms))
+        return self.acquired
+
+    async def release(self):
+        """释放锁（仅当仍由本实例持有时）"""
+        if not self.acquired:
+            return
+        self.acquired = False
+        try:
+            await self.redis_client.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception as e:
+            # 释放失败时锁会在租约到期后自动过期
+            logger.warning(f"释放分布式锁失败 {self.key}: {e}")
@@ -10,14 +10,20 @@ Redis热缓存(6h) + MySQL持久化(24h)
 
 import asyncio
 import logging
+import time
 from typing import Callable, Dict, Optional
 
-from utils.constants import TIME_ONE_DAY, TIME_SIX_HOURS
+from utils.constants import TIME_ONE_DAY, TIME_SEVEN_DAYS, TIME_SIX_HOURS
 from utils.price_history_manager import PriceHistoryManager
-from utils.redis_cache_manager import RedisCacheManager
+from utils.redis_cache_manager import NEGATIVE_ERROR, NEGATIVE_NOT_FOUND, RedisCacheManager
+from utils.singleflight import RedisLock, SingleFlight
+from utils.write_behind import WriteBehindBuffer
 
 logger = logging.getLogger(__name__)
 
+# 等待其他实例刷新时轮询Redis的间隔（秒）
+LOCK_POLL_INTERVAL = 0.2
+
 
 class SmartCacheManager:
     """
@@ -29,6 +35,14 @@ class SmartCacheManager:
         self,
         redis_cache_manager: RedisCacheManager,
         price_history_manager: PriceHistoryManager,
+        lock_enabled: bool = True,
+        lock_lease: int = 30,
+        lock_wait_timeout: int = 10,
+        stale_max_age: int = TIME_SEVEN_DAYS,
+        fetch_concurrency: int = 4,
+        write_batch_size: int = 100,
+        write_flush_interval: float = 2.0,
+        write_max_pending: int = 1000,
     ):
         """
         初始化智能缓存管理器
@@ -36,10 +50,33 @@ class SmartCacheManager:
         Args:
             redis_cache_manager: Redis缓存管理器实例
             price_history_manager: 价格历史管理器实例
+            lock_enabled: 爬取前是否获取Redis分布式锁（多实例防击穿）
+            lock_lease: 分布式锁租约（秒）
+            lock_wait_timeout: 未抢到锁时等待其他实例刷新的最长时间（秒）
+            stale_max_age: 未抢到锁时可返回的MySQL过期数据最大年龄（秒）
+            fetch_concurrency: 批量查询时每个服务同时调用fetcher的最大数量
+            write_batch_size: 异步写入MySQL时每批最多记录数
+            write_flush_interval: 异步写入MySQL时最多攒批的秒数
+            write_max_pending: 异步写入缓冲容量，满时爬取结果的保存会等待（背压）
         """
         self.redis = redis_cache_manager
         self.db = price_history_manager
         self.background_tasks: set = set()  # 追踪后台任务（防止内存泄漏）
+        self.lock_enabled = lock_enabled
+        self.lock_lease = lock_lease
+        self.lock_wait_timeout = lock_wait_timeout
+        self.stale_max_age = stale_max_age
+        self.fetch_concurrency = fetch_concurrency
+        self._fetch_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._singleflight = SingleFlight("SmartCache")
+        # 爬取结果写后缓冲：合并为 save_prices_batch 批量写入，避免每条结果占用一个连接
+        self._write_buffer = WriteBehindBuffer(
+            self._flush_price_writes,
+            name="SmartCache-MySQL",
+            batch_size=write_batch_size,
+            flush_interval=write_flush_interval,
+            max_pending=write_max_pending,
+        )
         logger.info("✅ SmartCacheManager 已初始化")
 
     async def get_or_fetch(
@@ -63,6 +100,14 @@ class SmartCacheManager:
         2. MySQL查询 (新鲜度: db_freshness) → 有且新鲜则使用，回写Redis
         3. 爬取新数据 → 保存到MySQL → 缓存到Redis
 
+        SWR：Redis 条目过了软 TTL 但仍在宽限期内时直接返回，并在后台调用 fetcher 刷新一次
+
+        负缓存：fetcher 返回空值视为上游确认不存在，抛出异常视为暂时性错误，两者都会以
+        较短的 TTL 写入负缓存；负缓存有效期内直接返回空字典，不再查询 MySQL 或调用 fetcher
+
+        防击穿：Redis 未命中后，同一进程内相同 (service, item_id, country_code)
+        只有一个请求继续向下查询；爬取前再获取 Redis 分布式锁，保证全局只有一个实例刷新
+
         Args:
             service: 服务名称 (steam/app_store/google_play等)
             item_id: 商品ID
@@ -78,25 +123,97 @@ class SmartCacheManager:
         Returns:
             价格数据字典
         """
-        # ===== 第1层：Redis热缓存查询 =====
+        # ===== 第1层：Redis热缓存查询（SWR：过期数据立即返回并后台刷新）=====
         if cache_key:
+            negatives: Dict[str, str] = {}
             try:
-                cached = await self.redis.load_cache(
-                    cache_key, max_age_seconds=redis_ttl, subdirectory=service
+                entries = await self.redis.load_cache_swr_many(
+                    [cache_key],
+                    max_age_seconds=redis_ttl,
+                    subdirectory=service,
+                    negatives=negatives,
                 )
-                if cached:
+                entry = entries.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Redis查询失败，继续查询MySQL: {e}")
+                entry = None
+
+            if cache_key in negatives:
+                logger.debug(
+                    f"🚫 负缓存命中({negatives[cache_key]}): {service}/{item_id}/{country_code}"
+                )
+                return {}
+
+            if entry and entry[0]:
+                cached, is_stale = entry
+                if is_stale:
+                    logger.debug(
+                        f"♻️ Redis过期数据命中，后台刷新: {service}/{item_id}/{country_code}"
+                    )
+                    self._schedule_refresh(
+                        service,
+                        item_id,
+                        country_code,
+                        fetcher,
+                        cache_key,
+                        item_name,
+                        fetcher_kwargs,
+                    )
+                else:
                     logger.debug(
                         f"✅ Redis缓存命中: {service}/{item_id}/{country_code}"
                     )
-                    return cached
-            except Exception as e:
-                logger.warning(f"Redis查询失败，继续查询MySQL: {e}")
+                return cached
+
+        # 同一进程内的并发请求合并为一次
+        return await self._singleflight.do(
+            (service, item_id, country_code),
+            self._load_or_fetch,
+            service,
+            item_id,
+            country_code,
+            fetcher,
+            redis_ttl,
+            db_freshness,
+            cache_key,
+            item_name,
+            async_save,
+            fetcher_kwargs,
+        )
 
+    async def _load_from_redis(
+        self, cache_key: str, redis_ttl: int, service: str
+    ) -> Optional[Dict]:
+        """查询Redis缓存，失败时返回None"""
+        try:
+            return await self.redis.load_cache(
+                cache_key, max_age_seconds=redis_ttl, subdirectory=service
+            )
+        except Exception as e:
+            logger.warning(f"Redis查询失败，继续查询MySQL: {e}")
+            return None
+
+    async def _load_or_fetch(
+        self,
+        service: str,
+        item_id: str,
+        country_code: str,
+        fetcher: Callable,
+        redis_ttl: int,
+        db_freshness: int,
+        cache_key: Optional[str],
+        item_name: Optional[str],
+        async_save: bool,
+        fetcher_kwargs: Dict,
+    ) -> Dict:
+        """Redis未命中后的查询流程（MySQL → 爬取），由 singleflight 保证进程内只执行一次"""
         # ===== 第2层：MySQL持久化查询 =====
         try:
+            started = time.perf_counter()
             db_data = await self.db.get_latest_price(
                 service, item_id, country_code, db_freshness
             )
+            self._record_mysql_read(service, started, 1 if db_data else 0, 0 if db_data else 1)
 
             if db_data:
                 age_hours = db_data.get("age_hours", 0)
@@ -119,17 +236,252 @@ class SmartCacheManager:
         except Exception as e:
             logger.warning(f"MySQL查询失败，将爬取新数据: {e}")
 
-        # ===== 第3层：爬取新数据 =====
+        # ===== 第3层：爬取新数据（分布式锁保护）=====
+        return await self._fetch_with_lock(
+            service,
+            item_id,
+            country_code,
+            fetcher,
+            redis_ttl,
+            cache_key,
+            item_name,
+            async_save,
+            fetcher_kwargs,
+        )
+
+    async def _fetch_with_lock(
+        self,
+        service: str,
+        item_id: str,
+        country_code: str,
+        fetcher: Callable,
+        redis_ttl: int,
+        cache_key: Optional[str],
+        item_name: Optional[str],
+        async_save: bool,
+        fetcher_kwargs: Dict,
+    ) -> Dict:
+        """获取分布式锁后爬取；其他实例正在爬取时返回过期数据或等待其结果"""
+        lock = None
+        if self.lock_enabled and self.redis.redis_client:
+            lock = RedisLock(
+                self.redis.redis_client,
+                f"lock:fetch:{service}:{item_id}:{country_code}",
+                self.lock_lease,
+            )
+            try:
+                acquired = await lock.acquire()
+            except Exception as e:
+                # Redis 不可用时退化为无锁爬取
+                logger.warning(f"获取分布式锁失败，直接爬取: {e}")
+                acquired = True
+                lock = None
+
+            if not acquired:
+                peer_data = await self._wait_for_peer_refresh(
+                    lock, service, item_id, country_code, cache_key, redis_ttl
+                )
+                if peer_data is not None:
+                    return peer_data
+                # 持有者失败或等待超时，自行爬取
+                lock = None
+
+        try:
+            return await self._fetch_and_store(
+                service,
+                item_id,
+                country_code,
+                fetcher,
+                cache_key,
+                item_name,
+                async_save,
+                fetcher_kwargs,
+            )
+        finally:
+            if lock:
+                await lock.release()
+
+    def _schedule_refresh(
+        self,
+        service: str,
+        item_id: str,
+        country_code: str,
+        fetcher: Callable,
+        cache_key: str,
+        item_name: Optional[str],
+        fetcher_kwargs: Dict,
+    ):
+        """为过期的Redis条目安排一次后台刷新（同一条目同时只会刷新一次）"""
+        refresh_key = ("refresh", service, item_id, country_code)
+        if self._singleflight.is_inflight(refresh_key):
+            return
+
+        task = asyncio.create_task(
+            self._singleflight.do(
+                refresh_key,
+                self._refresh_stale,
+                service,
+                item_id,
+                country_code,
+                fetcher,
+                cache_key,
+                item_name,
+                fetcher_kwargs,
+            )
+        )
+        # 追踪后台任务（防止内存泄漏）
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def _refresh_stale(
+        self,
+        service: str,
+        item_id: str,
+        country_code: str,
+        fetcher: Callable,
+        cache_key: str,
+        item_name: Optional[str],
+        fetcher_kwargs: Dict,
+    ):
+        """后台刷新过期条目（其他实例已在刷新时跳过）"""
+        lock = None
+        if self.lock_enabled and self.redis.redis_client:
+            lock = RedisLock(
+                self.redis.redis_client,
+                f"lock:fetch:{service}:{item_id}:{country_code}",
+                self.lock_lease,
+            )
+            try:
+                if not await lock.acquire():
+                    logger.debug(
+                        f"其他实例正在刷新，跳过: {service}/{item_id}/{country_code}"
+                    )
+                    return
+            except Exception as e:
+                logger.warning(f"获取分布式锁失败，直接刷新: {e}")
+                lock = None
+
+        try:
+            fresh_data = await self._fetch_and_store(
+                service,
+                item_id,
+                country_code,
+                fetcher,
+                cache_key,
+                item_name,
+                True,
+                fetcher_kwargs,
+                record_negative=False,
+            )
+            self.redis.record_swr_refresh(service, bool(fresh_data))
+        finally:
+            if lock:
+                await lock.release()
+
+    async def _wait_for_peer_refresh(
+        self,
+        lock: RedisLock,
+        service: str,
+        item_id: str,
+        country_code: str,
+        cache_key: Optional[str],
+        redis_ttl: int,
+    ) -> Optional[Dict]:
+        """
+        其他实例正在爬取时：优先返回MySQL中的过期数据，否则等待对方写入Redis
+
+        Returns:
+            过期数据或对方刷新后的数据；对方写入了负缓存时返回空字典；
+            对方失败或等待超时返回None
+        """
+        try:
+            stale_data = await self.db.get_latest_price(
+                service, item_id, country_code, self.stale_max_age
+            )
+            if stale_data:
+                logger.info(
+                    f"🔒 其他实例正在刷新，返回过期数据: {service}/{item_id}/{country_code}, "
+                    f"年龄={stale_data.get('age_hours', 0)}小时"
+                )
+                return stale_data
+        except Exception as e:
+            logger.debug(f"查询过期数据失败: {e}")
+
+        if not cache_key:
+            return None
+
+        logger.info(f"🔒 等待其他实例刷新: {service}/{item_id}/{country_code}")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_wait_timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            try:
+                cached, negative = await self.redis.load_cache_or_negative(
+                    cache_key, max_age_seconds=redis_ttl, subdirectory=service
+                )
+            except Exception as e:
+                logger.warning(f"Redis查询失败: {e}")
+                cached, negative = None, None
+            if cached:
+                return cached
+            if negative:
+                # 持有者已确认查询失败，不再重复请求上游
+                return {}
+            try:
+                if not await self.redis.redis_client.exists(lock.key):
+                    # 锁已释放但没有写入缓存：持有者爬取失败
+                    return None
+            except Exception:
+                return None
+
+        logger.warning(f"⏱ 等待其他实例刷新超时: {service}/{item_id}/{country_code}")
+        return None
+
+    async def _fetch_and_store(
+        self,
+        service: str,
+        item_id: str,
+        country_code: str,
+        fetcher: Callable,
+        cache_key: Optional[str],
+        item_name: Optional[str],
+        async_save: bool,
+        fetcher_kwargs: Dict,
+        record_negative: bool = True,
+    ) -> Dict:
+        """
+        调用爬虫获取新数据，并保存到MySQL和Redis
+
+        record_negative=True 时失败结果写入负缓存（后台刷新时关闭，保留仍可使用的过期数据）
+        """
         logger.info(f"🔄 缓存未命中，开始爬取: {service}/{item_id}/{country_code}")
 
         try:
             # 调用爬虫函数获取数据
-            fresh_data = await fetcher(**fetcher_kwargs)
+            started = time.perf_counter()
+            try:
+                fresh_data = await fetcher(**fetcher_kwargs)
+            except Exception:
+                # 上游暂时性错误：短时间内不再重复请求
+                if cache_key and record_negative:
+                    await self.redis.save_negative(
+                        cache_key, subdirectory=service, reason=NEGATIVE_ERROR
+                    )
+                raise
+            finally:
+                self.redis.metrics.observe(service, "fetch_ms", (time.perf_counter() - started) * 1000)
 
             if not fresh_data:
+                self.redis.metrics.incr(service, "fetch_failures")
                 logger.error(f"爬取数据失败: {service}/{item_id}/{country_code}")
+                if cache_key and record_negative:
+                    await self.redis.save_negative(
+                        cache_key, subdirectory=service, reason=NEGATIVE_NOT_FOUND
+                    )
                 return {}
 
+            self.redis.metrics.incr(service, "fetches")
+
             # 提取item_name（如果未提供）
             if not item_name:
                 item_name = (
@@ -138,15 +490,16 @@ class SmartCacheManager:
 
             # ===== 保存到MySQL =====
             if async_save:
-                # 异步保存，不阻塞响应（性能优化2）
-                task = asyncio.create_task(
-                    self._save_to_db_async(
-                        service, item_id, item_name, country_code, fresh_data
-                    )
+                # 放入写后缓冲，由后台批量写入，不阻塞响应（性能优化2）
+                await self._write_buffer.put(
+                    {
+                        "service": service,
+                        "item_id": item_id,
+                        "item_name": item_name,
+                        "country_code": country_code,
+                        "price_data": fresh_data,
+                    }
                 )
-                # 追踪后台任务（防止内存泄漏）
-                self.background_tasks.add(task)
-                task.add_done_callback(self.background_tasks.discard)
             else:
                 # 同步保存
                 await self.db.save_price(
@@ -167,36 +520,22 @@ class SmartCacheManager:
             return fresh_data
 
         except Exception as e:
+            self.redis.metrics.incr(service, "fetch_failures")
             logger.error(f"爬取数据失败: {service}/{item_id}/{country_code}, 错误: {e}")
             return {}
 
-    async def _save_to_db_async(
-        self,
-        service: str,
-        item_id: str,
-        item_name: str,
-        country_code: str,
-        price_data: Dict,
-    ):
+    async def _flush_price_writes(self, records: list[Dict]):
         """
-        异步保存到MySQL（后台任务）
+        写后缓冲的批量写入函数
 
-        Args:
-            service: 服务名称
-            item_id: 商品ID
-            item_name: 商品名称
-            country_code: 国家代码
-            price_data: 价格数据
+        同一批内相同 (service, item_id, country_code) 只保留最后一条
         """
-        try:
-            await self.db.save_price(
-                service, item_id, item_name, country_code, price_data
-            )
-            logger.debug(f"MySQL异步保存完成: {service}/{item_id}/{country_code}")
-        except Exception as e:
-            logger.error(
-                f"MySQL异步保存失败: {service}/{item_id}/{country_code}, 错误: {e}"
-            )
+        latest = {
+            (record["service"], record["item_id"], record["country_code"]): record
+            for record in records
+        }
+        count = await self.db.save_prices_batch(list(latest.values()))
+        logger.debug(f"MySQL批量异步保存完成: {count}/{len(records)} 条")
 
     async def get_or_fetch_batch(
         self,
@@ -208,11 +547,17 @@ class SmartCacheManager:
         db_freshness: int = TIME_ONE_DAY,
         cache_key_template: Optional[str] = None,
         item_name: Optional[str] = None,
+        with_timing: bool = False,
         **fetcher_kwargs,
-    ) -> Dict[str, Dict]:
+    ):
         """
         批量查询多个国家的价格（性能优化）
 
+        查询流程（每层只处理上一层未命中的国家）：
+        1. 一次 Redis pipeline 读取所有国家的缓存
+        2. 一次 MySQL 查询取回剩余国家的最新记录
+        3. 仍缺失的国家并发调用 fetcher（按服务限制并发数）
+
         Args:
             service: 服务名称
             item_id: 商品ID
@@ -222,55 +567,165 @@ class SmartCacheManager:
             db_freshness: 数据库新鲜度
             cache_key_template: 缓存键模板，使用{country_code}占位符
             item_name: 商品名称
+            with_timing: 是否同时返回每个国家的命中层级和耗时
             **fetcher_kwargs: 传给fetcher的参数
 
         Returns:
-            {country_code: price_data} 字典
+            {country_code: price_data} 字典；with_timing=True 时返回
+            (结果字典, {country_code: {"tier": redis/redis_stale/negative/mysql/fetch/error,
+            "elapsed_ms": 从批量查询开始到该国家就绪的毫秒数}})
         """
-        results = {}
-        tasks = []
-
-        for cc in country_codes:
-            # 生成缓存键
-            cache_key = (
-                cache_key_template.format(country_code=cc)
-                if cache_key_template
-                else None
-            )
-
-            # 更新fetcher参数中的country_code
-            kwargs = fetcher_kwargs.copy()
-            kwargs["country_code"] = cc
-
-            # 创建任务
-            task = self.get_or_fetch(
-                service=service,
-                item_id=item_id,
-                country_code=cc,
-                fetcher=fetcher,
-                redis_ttl=redis_ttl,
-                db_freshness=db_freshness,
-                cache_key=cache_key,
-                item_name=item_name,
-                async_save=True,  # 批量查询使用异步保存
-                **kwargs,
-            )
-            tasks.append((cc, task))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        country_codes = list(dict.fromkeys(country_codes))
+        results: Dict[str, Dict] = {}
+        timings: Dict[str, Dict] = {}
+
+        def mark(cc: str, tier: str):
+            timings[cc] = {
+                "tier": tier,
+                "elapsed_ms": round((loop.time() - started) * 1000, 1),
+            }
+
+        cache_keys: Dict[str, str] = {}
+        if cache_key_template:
+            cache_keys = {
+                cc: cache_key_template.format(country_code=cc) for cc in country_codes
+            }
+
+        # ===== 第1层：Redis 批量查询 =====
+        if cache_keys:
+            negatives: Dict[str, str] = {}
+            try:
+                cached = await self.redis.load_cache_swr_many(
+                    list(cache_keys.values()),
+                    max_age_seconds=redis_ttl,
+                    subdirectory=service,
+                    negatives=negatives,
+                )
+            except Exception as e:
+                logger.warning(f"Redis批量查询失败，继续查询MySQL: {e}")
+                cached = {}
+
+            for cc, cache_key in cache_keys.items():
+                if cache_key in negatives:
+                    # 负缓存有效期内不再查询
+                    results[cc] = {}
+                    mark(cc, "negative")
+                    continue
+                entry = cached.get(cache_key)
+                if not entry or not entry[0]:
+                    continue
+                data, is_stale = entry
+                results[cc] = data
+                if is_stale:
+                    self._schedule_refresh(
+                        service,
+                        item_id,
+                        cc,
+                        fetcher,
+                        cache_key,
+                        item_name,
+                        {**fetcher_kwargs, "country_code": cc},
+                    )
+                mark(cc, "redis_stale" if is_stale else "redis")
 
-        # 并发执行所有查询
-        for cc, task in tasks:
+        # ===== 第2层：MySQL 批量查询 =====
+        missing = [cc for cc in country_codes if cc not in results]
+        if missing:
             try:
-                result = await task
-                results[cc] = result
+                db_started = time.perf_counter()
+                db_results = await self.db.get_latest_prices(
+                    service, item_id, missing, db_freshness
+                )
+                self._record_mysql_read(
+                    service, db_started, len(db_results), len(missing) - len(db_results)
+                )
             except Exception as e:
-                logger.error(f"批量查询失败: {service}/{item_id}/{cc}, 错误: {e}")
-                results[cc] = {}
+                logger.warning(f"MySQL批量查询失败，将爬取新数据: {e}")
+                db_results = {}
+
+            writebacks = []
+            for cc, db_data in db_results.items():
+                results[cc] = db_data
+                mark(cc, "mysql")
+                # 回写Redis（使数据重新热起来）
+                if cc in cache_keys:
+                    writebacks.append(
+                        self.redis.save_cache(
+                            cache_keys[cc], db_data, subdirectory=service
+                        )
+                    )
+            if writebacks:
+                for outcome in await asyncio.gather(
+                    *writebacks, return_exceptions=True
+                ):
+                    if isinstance(outcome, Exception):
+                        logger.warning(f"回写Redis失败: {outcome}")
+
+        # ===== 第3层：并发爬取（按服务限制并发数）=====
+        missing = [cc for cc in country_codes if cc not in results]
+        if missing:
+            semaphore = self._get_fetch_semaphore(service)
+
+            async def fetch_one(cc: str):
+                async with semaphore:
+                    data = await self._singleflight.do(
+                        (service, item_id, cc),
+                        self._fetch_with_lock,
+                        service,
+                        item_id,
+                        cc,
+                        fetcher,
+                        redis_ttl,
+                        cache_keys.get(cc),
+                        item_name,
+                        True,  # 批量查询使用异步保存
+                        {**fetcher_kwargs, "country_code": cc},
+                    )
+                results[cc] = data
+                mark(cc, "fetch" if data else "error")
 
+            outcomes = await asyncio.gather(
+                *(fetch_one(cc) for cc in missing), return_exceptions=True
+            )
+            for cc, outcome in zip(missing, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"批量查询失败: {service}/{item_id}/{cc}, 错误: {outcome}")
+                    results[cc] = {}
+                    mark(cc, "error")
+
+        tier_counts: Dict[str, int] = {}
+        for timing in timings.values():
+            tier_counts[timing["tier"]] = tier_counts.get(timing["tier"], 0) + 1
+        success = sum(1 for cc in country_codes if results.get(cc))
         logger.info(
-            f"批量查询完成: {service}/{item_id}, 成功 {len(results)}/{len(country_codes)} 个国家"
+            f"批量查询完成: {service}/{item_id}, 成功 {success}/{len(country_codes)} 个国家, "
+            f"层级分布={tier_counts}, 耗时 {(loop.time() - started) * 1000:.0f}ms"
         )
+
+        results = {cc: results.get(cc, {}) for cc in country_codes}
+        if with_timing:
+            return results, timings
         return results
 
+    def _record_mysql_read(self, service: str, started: float, hits: int, misses: int):
+        """记录 MySQL 查询耗时与命中数"""
+        metrics = self.redis.metrics
+        metrics.observe(service, "mysql_read_ms", (time.perf_counter() - started) * 1000)
+        if hits:
+            metrics.incr(service, "mysql_hits", hits)
+        if misses:
+            metrics.incr(service, "mysql_misses", misses)
+
+    def _get_fetch_semaphore(self, service: str) -> asyncio.Semaphore:
+        """获取服务级别的爬取并发信号量"""
+        semaphore = self._fetch_semaphores.get(service)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.fetch_concurrency)
+            self._fetch_semaphores[service] = semaphore
+        return semaphore
+
     async def save_prices_batch(self, prices_list: list[Dict]) -> int:
         """
         批量保存价格到MySQL（性能优化1）
@@ -305,10 +760,49 @@ class SmartCacheManager:
         except Exception as e:
             logger.error(f"清除Redis缓存失败: {e}")
 
+    async def is_history_partitioned(self) -> bool:
+        """price_history 是否已按月分区（查询失败时视为未分区）"""
+        try:
+            return await self.db.is_partitioned()
+        except Exception as e:
+            logger.error(f"查询MySQL分区失败: {e}")
+            return False
+
+    async def ensure_partitions(self, months_ahead: int = 3) -> int:
+        """
+        提前创建 price_history 的月分区
+
+        Args:
+            months_ahead: 需要覆盖的未来月份数
+
+        Returns:
+            新建的分区数
+        """
+        try:
+            return await self.db.ensure_partitions(months_ahead)
+        except Exception as e:
+            logger.error(f"创建MySQL分区失败: {e}")
+            return 0
+
+    async def rollup_daily_prices(self) -> int:
+        """
+        增量更新每日价格汇总
+
+        Returns:
+            受影响的行数
+        """
+        try:
+            return await self.db.rollup_daily()
+        except Exception as e:
+            logger.error(f"更新每日价格汇总失败: {e}")
+            return 0
+
     async def cleanup_old_data(self, days_to_keep: int = 90) -> int:
         """
         清理MySQL旧数据（性能优化4）
 
+        price_history 已分区时以删除整月分区的方式完成，不产生逐行删除的 undo 日志
+
         Args:
             days_to_keep: 保留天数，默认90天
 
@@ -354,7 +848,7 @@ class SmartCacheManager:
             service: 服务名称
             item_id: 商品ID
             country_code: 国家代码（可选）
-            days: 查询天数
+            days: 查询天数（超过7天时按天返回汇总记录）
 
         Returns:
             价格历史记录列表
@@ -370,7 +864,7 @@ class SmartCacheManager:
 
     async def wait_for_background_tasks(self, timeout: float = 10.0):
         """
-        等待所有后台任务完成（优雅关闭时使用）
+        写出写后缓冲中的价格记录，并等待所有后台任务完成（优雅关闭时使用）
 
         Args:
             timeout: 超时时间（秒），默认10秒
@@ -378,6 +872,11 @@ class SmartCacheManager:
         Returns:
             完成的任务数
         """
+        pending = self._write_buffer.pending
+        if await self._write_buffer.close(timeout=timeout):
+            if pending:
+                logger.info(f"✅ 写后缓冲已写出 {pending} 条价格记录")
+
         if not self.background_tasks:
             logger.info("没有后台任务需要等待")
             return 0
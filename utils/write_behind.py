@@ -0,0 +1,186 @@
+"""
+写后缓冲（Write-behind）
+调用方只把记录放入有界队列，后台任务按数量或时间凑成一批后统一写入，
+把大量单行写入合并为少量批量事务；队列满时 put() 阻塞，形成背压
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+class _FlushMarker:
+    """插入队列的刷新标记，后台任务处理到它时说明之前的记录都已写出"""
+
+    __slots__ = ("future", "stop")
+
+    def __init__(self, future: asyncio.Future, stop: bool):
+        self.future = future
+        self.stop = stop
+
+
+class WriteBehindBuffer:
+    """按数量或时间批量写出的有界缓冲队列"""
+
+    def __init__(
+        self,
+        flush_func: Callable[[list[Any]], Awaitable[Any]],
+        name: str = "write-behind",
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        max_pending: int = 1000,
+    ):
+        """
+        Args:
+            flush_func: 批量写入函数，接收一批记录
+            name: 日志中显示的名称
+            batch_size: 凑满该数量立即写出
+            flush_interval: 第一条记录入队后最多等待的秒数
+            max_pending: 队列容量，满时 put() 等待（背压）
+        """
+        self.flush_func = flush_func
+        self.name = name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_pending))
+        self._worker: asyncio.Task | None = None
+        self._closed = False
+        self._full_warned = False  # 每次写出前只提示一次缓冲已满
+
+    @property
+    def pending(self) -> int:
+        """队列中等待写出的记录数"""
+        return self._queue.qsize()
+
+    async def put(self, record: Any):
+        """放入一条记录（队列满时等待）；关闭后直接同步写出"""
+        if self._closed:
+            await self._write([record])
+            return
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        if self._queue.full() and not self._full_warned:
+            self._full_warned = True
+            logger.warning(f"[{self.name}] 写缓冲已满（{self._queue.maxsize}），等待写出")
+        await self._queue.put(record)
+        # 等待期间缓冲已关闭且后台任务已退出：记录排在停止标记之后，由自己写出
+        if self._closed and (self._worker is None or self._worker.done()):
+            await self._drain()
+
+    def put_nowait(self, record: Any) -> bool:
+        """
+        放入一条记录（不等待，用于调用方不能被阻塞的场景）
+
+        Returns:
+            是否已入队；队列已满或已关闭时丢弃记录并返回 False
+        """
+        if self._closed:
+            return False
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            if not self._full_warned:
+                self._full_warned = True
+                logger.warning(f"[{self.name}] 写缓冲已满（{self._queue.maxsize}），丢弃新记录")
+            return False
+        return True
+
+    async def flush(self, timeout: float | None = None) -> bool:
+        """
+        等待此前放入的记录全部写出
+
+        Returns:
+            是否在超时前完成
+        """
+        return await self._enqueue_marker(stop=False, timeout=timeout)
+
+    async def close(self, timeout: float | None = None) -> bool:
+        """写出剩余记录并停止后台任务，之后的 put() 直接写出"""
+        if self._closed:
+            return True
+        self._closed = True
+        if not await self._enqueue_marker(stop=True, timeout=timeout):
+            return False
+        # 关闭前已阻塞在 put() 上的记录会排在停止标记之后
+        await self._drain()
+        return True
+
+    async def _drain(self):
+        """后台任务退出后，同步写出队列中剩余的记录"""
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if not isinstance(item, _FlushMarker):
+                    batch.append(item)
+                elif not item.future.done():
+                    item.future.set_result(None)
+            if batch:
+                await self._write(batch)
+
+    async def _enqueue_marker(self, stop: bool, timeout: float | None) -> bool:
+        if self._worker is None or self._worker.done():
+            if self._queue.empty():
+                return True
+            self._worker = asyncio.create_task(self._run())
+
+        marker = _FlushMarker(asyncio.get_running_loop().create_future(), stop)
+        try:
+            await asyncio.wait_for(self._put_marker(marker), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"[{self.name}] 等待写出超时，剩余 {self.pending} 条记录")
+            return False
+
+    async def _put_marker(self, marker: _FlushMarker):
+        await self._queue.put(marker)
+        # shield: 超时只停止等待，不打断正在进行的写入
+        await asyncio.shield(marker.future)
+
+    async def _run(self):
+        """后台写出循环"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: list[Any] = []
+            markers: list[_FlushMarker] = []
+
+            item = await self._queue.get()
+            if isinstance(item, _FlushMarker):
+                markers.append(item)
+            else:
+                batch.append(item)
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if isinstance(item, _FlushMarker):
+                        markers.append(item)
+                        break
+                    batch.append(item)
+
+            if batch:
+                await self._write(batch)
+            for marker in markers:
+                if not marker.future.done():
+                    marker.future.set_result(None)
+            if any(marker.stop for marker in markers):
+                return
+
+    async def _write(self, batch: list[Any]):
+        self._full_warned = False
+        try:
+            await self.flush_func(batch)
+            logger.debug(f"[{self.name}] 已写出 {len(batch)} 条记录")
+        except Exception as e:
+            logger.error(f"[{self.name}] 批量写出失败，丢弃 {len(batch)} 条记录: {e}")